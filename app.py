@@ -5,7 +5,7 @@ import pathlib
 import time
 import pandas as pd
 from typing import Optional
-from kfa.cli import run as run_cli
+from kfa.cli import stream_run
 from kfa.config import load_config
 from kfa.config_manager import ConfigManager, create_config_sidebar
 
@@ -147,9 +147,14 @@ def main():
             st.success(f"✅ File uploaded: {uploaded_file.name}")
             st.info(f"📊 File size: {uploaded_file.size / 1024:.1f} KB")
             
+            # Optional labels for the tag analytics index
+            speaker = st.text_input("Speaker (optional)")
+            event = st.text_input("Event (optional)")
+            
             # Process button
             if st.button("🚀 Analyze Keynote", type="primary", use_container_width=True):
-                process_file(uploaded_file, strategy, chunk_tokens, overlap_tokens, temperature, max_output_tokens)
+                process_file(uploaded_file, strategy, chunk_tokens, overlap_tokens, temperature, max_output_tokens,
+                             speaker=speaker, event=event)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -175,7 +180,8 @@ def main():
                 else:
                     st.info("No sample file found")
 
-def process_file(uploaded_file, strategy, chunk_tokens, overlap_tokens, temperature, max_output_tokens):
+def process_file(uploaded_file, strategy, chunk_tokens, overlap_tokens, temperature, max_output_tokens,
+                 speaker=None, event=None):
     """Process the uploaded file and display results"""
     
     # Create progress indicators
@@ -202,17 +208,34 @@ def process_file(uploaded_file, strategy, chunk_tokens, overlap_tokens, temperat
         cfg['chunking']['overlap_tokens'] = overlap_tokens
         cfg['params']['temperature'] = temperature
         cfg['params']['max_output_tokens'] = max_output_tokens
+        # Index under the uploaded name, not the temp file
+        cfg['analytics'].update(document=uploaded_file.name, speaker=speaker or cfg['analytics'].get('speaker'),
+                                event=event or cfg['analytics'].get('event'))
         
         # Process the file
         status_text.text("🤖 Processing with AI...")
         progress_bar.progress(30)
         
-        # Create output directory
-        out_dir = pathlib.Path('out')
-        out_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Run the analysis
-        run_cli(tmp_path, cfg)
+        # Run the analysis, rendering each chunk's critique as it streams in
+        live = st.container()
+        placeholders, texts, total, done = {}, {}, 0, None
+        for event in stream_run(tmp_path, cfg):
+            if event['event'] == 'chunks':
+                total = max(1, event['total'])
+                status_text.text(f"🤖 Critiquing {event['total']} chunks...")
+            elif event['event'] == 'chunk_start':
+                with live:
+                    st.markdown(f"#### Scene {event['id']}")
+                    placeholders[event['id']] = st.empty()
+                texts[event['id']] = ''
+            elif event['event'] == 'delta':
+                texts[event['id']] += event['text']
+                placeholders[event['id']].markdown(texts[event['id']])
+            elif event['event'] == 'chunk_end':
+                placeholders[event['id']].markdown(event['kfa'])
+                progress_bar.progress(30 + int(65 * (event['id'] + 1) / total))
+            elif event['event'] == 'done':
+                done = event
         
         progress_bar.progress(100)
         status_text.text("✅ Analysis complete!")
@@ -221,24 +244,24 @@ def process_file(uploaded_file, strategy, chunk_tokens, overlap_tokens, temperat
         os.unlink(tmp_path)
         
         # Display results
-        display_results()
+        display_results(done['md_path'], done['csv_path'])
         
     except Exception as e:
         st.error(f"❌ Error processing file: {str(e)}")
         progress_bar.empty()
         status_text.empty()
 
-def display_results():
-    """Display the analysis results"""
+def display_results(md_path, csv_path=None):
+    """Display the analysis results of one run"""
     
     st.markdown('<div class="results-section">', unsafe_allow_html=True)
     
     # Success message
     st.markdown('<div class="success-badge">🎉 Analysis Complete!</div>', unsafe_allow_html=True)
     
-    # File paths
-    md_path = pathlib.Path('out/keynote_kfa.md')
-    csv_path = pathlib.Path('out/keynote_kfa_notes.csv')
+    # File paths (each run writes to its own out/runs/<run_id>/ directory)
+    md_path = pathlib.Path(md_path)
+    csv_path = pathlib.Path(csv_path) if csv_path else md_path.with_name('keynote_kfa_notes.csv')
     
     # Download buttons
     col1, col2, col3 = st.columns([1, 1, 1])
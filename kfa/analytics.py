@@ -0,0 +1,130 @@
+"""
+Tag analytics across runs: an SQLite index of (document, chunk, tag, run, time) rows,
+appended to as each run finishes
+"""
+import argparse, pathlib, time
+from typing import Any, Dict, List, Optional, Sequence
+from .files import connect_sqlite
+from .parse import critique_of
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    run_id TEXT NOT NULL,
+    document TEXT NOT NULL,
+    speaker TEXT,
+    event TEXT,
+    chunks INTEGER NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (run_id, document)
+);
+CREATE TABLE IF NOT EXISTS tag_hits (
+    run_id TEXT NOT NULL,
+    document TEXT NOT NULL,
+    chunk INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    speaker TEXT,
+    event TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tag_hits_tag ON tag_hits (tag, created);
+CREATE INDEX IF NOT EXISTS tag_hits_speaker ON tag_hits (speaker, tag);
+CREATE INDEX IF NOT EXISTS tag_hits_event ON tag_hits (event, tag);
+CREATE INDEX IF NOT EXISTS tag_hits_run ON tag_hits (run_id, document);
+"""
+
+# Grouping keys accepted by TagIndex.frequency
+_BY = {
+    'tag': 'tag',
+    'speaker': 'speaker',
+    'event': 'event',
+    'document': 'document',
+    'run': 'run_id',
+    'day': "strftime('%Y-%m-%d', created, 'unixepoch')",
+    'month': "strftime('%Y-%m', created, 'unixepoch')",
+}
+
+
+class TagIndex:
+    """Tag hits per (run, document) in SQLite, with grouped frequency queries"""
+
+    def __init__(self, path='out/tags.sqlite3'):
+        self.path = str(path)
+        pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with connect_sqlite(self.path) as db:
+            db.executescript(_SCHEMA)
+
+    def add_run(self, run_id: str, document: str, outputs: List[Dict], speaker: Optional[str] = None,
+                event: Optional[str] = None, created: Optional[float] = None) -> int:
+        """Index one document of one run; re-indexing the same pair replaces its rows"""
+        created = time.time() if created is None else created
+        rows = [(run_id, document, o['id'], tag, speaker, event, created)
+                for o in outputs for tag in critique_of(o).tags]
+        with connect_sqlite(self.path) as db:
+            db.execute("DELETE FROM tag_hits WHERE run_id = ? AND document = ?", (run_id, document))
+            db.execute(
+                "INSERT OR REPLACE INTO documents (run_id, document, speaker, event, chunks, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, document, speaker, event, len(outputs), created),
+            )
+            db.executemany("INSERT INTO tag_hits VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def frequency(self, by: Sequence[str] = ('tag',), tag: Optional[str] = None, speaker: Optional[str] = None,
+                  event: Optional[str] = None, document: Optional[str] = None, since: Optional[float] = None,
+                  until: Optional[float] = None, latest_only: bool = False) -> List[Dict[str, Any]]:
+        """Tag hit counts grouped by `by` (tag/speaker/event/document/run/day/month), most frequent first.
+
+        `documents` is how many (run, document) pairs had a hit; latest_only counts only
+        the newest run of each document, so re-analysing a talk doesn't double it.
+        """
+        unknown = set(by) - set(_BY)
+        if unknown:
+            raise ValueError(f'Unknown grouping: {sorted(unknown)}')
+        where, args = [], []
+        for col, value in (('tag', tag), ('speaker', speaker), ('event', event), ('document', document)):
+            if value is not None:
+                where.append(f"{col} = ?")
+                args.append(value)
+        if since is not None:
+            where.append("created >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("created < ?")
+            args.append(until)
+        if latest_only:
+            where.append("created = (SELECT MAX(d.created) FROM documents d WHERE d.document = tag_hits.document)")
+        keys = ", ".join(f"{_BY[b]} AS {b}" for b in by)
+        sql = (f"SELECT {keys}, COUNT(*) AS hits, COUNT(DISTINCT run_id || char(0) || document) AS documents "
+               f"FROM tag_hits {'WHERE ' + ' AND '.join(where) if where else ''} "
+               f"GROUP BY {', '.join(by)} ORDER BY hits DESC, {', '.join(by)}")
+        with connect_sqlite(self.path) as db:
+            return [dict(r) for r in db.execute(sql, args)]
+
+    def documents(self, speaker: Optional[str] = None, event: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Indexed (run, document) pairs, newest first"""
+        where, args = [], []
+        for col, value in (('speaker', speaker), ('event', event)):
+            if value is not None:
+                where.append(f"{col} = ?")
+                args.append(value)
+        sql = f"SELECT * FROM documents {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY created DESC"
+        with connect_sqlite(self.path) as db:
+            return [dict(r) for r in db.execute(sql, args)]
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Query the tag analytics index')
+    ap.add_argument('--index', default='out/tags.sqlite3')
+    ap.add_argument('--by', default='tag', help=f"Comma-separated grouping: {', '.join(_BY)}")
+    ap.add_argument('--tag')
+    ap.add_argument('--speaker')
+    ap.add_argument('--event')
+    ap.add_argument('--days', type=float, help='Only runs from the last N days')
+    ap.add_argument('--latest', action='store_true', help='Only the newest run of each document')
+    args = ap.parse_args()
+    by = [b.strip() for b in args.by.split(',') if b.strip()]
+    rows = TagIndex(args.index).frequency(
+        by, tag=args.tag, speaker=args.speaker, event=args.event,
+        since=time.time() - args.days * 86400 if args.days else None, latest_only=args.latest,
+    )
+    for r in rows:
+        print("\t".join(str(r[b]) for b in by) + f"\t{r['hits']}\t{r['documents']}")
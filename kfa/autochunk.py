@@ -0,0 +1,127 @@
+"""
+Adaptive chunk sizing (chunking.strategy: auto): pick chunk size and overlap per document
+from its length, the concurrency budget and a persisted profile of provider latency
+"""
+import json, math, pathlib, threading
+from typing import Dict, List, NamedTuple, Optional
+from .files import atomic_write
+
+PROFILE_NAME = 'latency_profile.json'
+MAX_SAMPLES = 1000  # per model, newest kept
+MIN_SAMPLES = 8     # below this (or with no spread in sizes) the prior is used
+
+
+class Fit(NamedTuple):
+    # latency_s ~ base_s + per_token_s * input tokens; output tokens ~ out_base + out_per_token * input tokens
+    base_s: float
+    per_token_s: float
+    out_base: float
+    out_per_token: float
+    samples: int = 0
+
+
+# Rough figures for a chat model critiquing a chunk, used until a model has been profiled
+PRIOR = Fit(base_s=2.0, per_token_s=0.002, out_base=300.0, out_per_token=0.4)
+
+
+def _line(xs: List[float], ys: List[float]):
+    # Least-squares intercept and slope, both clamped at zero; None without spread in xs
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    var = sum((x - mx) ** 2 for x in xs)
+    if not var:
+        return None
+    slope = max(0.0, sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var)
+    return max(0.0, my - slope * mx), slope
+
+
+class LatencyProfile:
+    """(input tokens, output tokens, latency) of past chunk critiques per model, in a JSON file.
+
+    Samples come from run reports (kfa.telemetry): only calls that went to the provider
+    once and succeeded, so cache hits and retries don't skew the fit.
+    """
+    _lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+
+    def load(self) -> Dict[str, List[List[float]]]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def add_report(self, report: Dict) -> int:
+        """Add the chunk calls of a run report; returns how many samples were kept"""
+        model = report.get('settings', {}).get('style_model')
+        rows = [[c['input_tokens'], c['output_tokens'], c['latency_s']] for c in report.get('chunks', [])
+                if c['attempts'] == 1 and c['calls'] == 1 and not c['cached'] and not c['error'] and c['input_tokens']]
+        if not model or not rows:
+            return 0
+        with self._lock:
+            data = self.load()
+            data[model] = (data.get(model, []) + rows)[-MAX_SAMPLES:]
+            atomic_write(self.path, json.dumps(data))
+        return len(rows)
+
+    def fit(self, model: str) -> Fit:
+        """Linear fits of latency and output length on input length, or PRIOR"""
+        rows = self.load().get(model, [])
+        if len(rows) < MIN_SAMPLES:
+            return PRIOR
+        xs = [r[0] for r in rows]
+        lat, out = _line(xs, [r[2] for r in rows]), _line(xs, [r[1] for r in rows])
+        if lat is None or out is None:
+            return PRIOR
+        return Fit(lat[0], lat[1], out[0], out[1], len(rows))
+
+
+class Choice(NamedTuple):
+    chunk_tokens: int
+    overlap_tokens: int
+    calls: int
+    est_wall_s: float
+    est_cost: float  # in units of input_cost/output_cost per 1k tokens
+
+
+def estimate(doc_tokens: int, chunk_tokens: int, overlap_tokens: int, fit: Fit, concurrency: int,
+             prompt_tokens: int = 0, max_output_tokens: Optional[int] = None,
+             input_cost: float = 1.0, output_cost: float = 4.0) -> Choice:
+    """Calls, wall time and cost of critiquing a document in chunks of this size"""
+    if doc_tokens <= chunk_tokens:
+        n, per_chunk = 1, max(1, doc_tokens)
+    else:
+        n = math.ceil((doc_tokens - overlap_tokens) / (chunk_tokens - overlap_tokens))
+        per_chunk = (doc_tokens + (n - 1) * overlap_tokens) / n  # overlap is sent twice
+    tokens_in = per_chunk + prompt_tokens
+    tokens_out = fit.out_base + fit.out_per_token * tokens_in
+    if max_output_tokens:
+        tokens_out = min(tokens_out, max_output_tokens)
+    latency = fit.base_s + fit.per_token_s * tokens_in
+    wall = math.ceil(n / max(1, concurrency)) * latency
+    cost = n * (tokens_in * input_cost + tokens_out * output_cost) / 1000
+    return Choice(chunk_tokens, overlap_tokens, n, round(wall, 3), round(cost, 4))
+
+
+def choose(doc_tokens: int, fit: Fit, concurrency: int, objective: str = 'time',
+           min_chunk_tokens: int = 800, max_chunk_tokens: int = 4000, step: int = 100,
+           overlap_ratio: float = 0.1, min_overlap_tokens: int = 50, tolerance: float = 0.05, **costs) -> Choice:
+    """The chunking that minimizes estimated wall time ('time') or cost ('cost').
+
+    Chunks are never smaller than min_chunk_tokens nor overlaps smaller than
+    min_overlap_tokens (the quality floor). Candidates within `tolerance` of the best
+    are equivalent; among them the cheaper (for 'time') or faster (for 'cost') one wins.
+    """
+    if objective not in ('time', 'cost'):
+        raise ValueError(f"Unknown objective: {objective!r} (expected 'time' or 'cost')")
+    options = []
+    for size in range(min_chunk_tokens, max(min_chunk_tokens, max_chunk_tokens) + 1, step):
+        overlap = min(max(min_overlap_tokens, round(size * overlap_ratio)), size // 2)
+        options.append(estimate(doc_tokens, size, overlap, fit, concurrency, **costs))
+        if options[-1].calls == 1:
+            break  # larger chunks change nothing
+    primary, secondary = ('est_wall_s', 'est_cost') if objective == 'time' else ('est_cost', 'est_wall_s')
+    best = min(getattr(o, primary) for o in options)
+    close = [o for o in options if getattr(o, primary) <= best * (1 + tolerance)]
+    return min(close, key=lambda o: (getattr(o, secondary), -o.chunk_tokens))
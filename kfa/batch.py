@@ -0,0 +1,90 @@
+"""
+Batch-API style pass: write all chunk critiques to one JSONL file, submit, poll, collect
+"""
+import json, pathlib, time
+from typing import Dict, List, Optional
+from .critique import critique_messages
+
+
+def write_batch_file(chunks: List[str], model: str, path, temperature=0.2, max_output_tokens=1500) -> str:
+    p = pathlib.Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open('w', encoding='utf-8') as f:
+        for i, ch in enumerate(chunks):
+            row = {
+                'custom_id': f'chunk-{i}',
+                'method': 'POST',
+                'url': '/v1/responses',
+                'body': {
+                    'model': model,
+                    'input': critique_messages(ch),
+                    'temperature': temperature,
+                    'max_output_tokens': max_output_tokens,
+                },
+            }
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return str(p)
+
+
+def wait_for_batch(batch_provider, batch_id: str, poll_interval: float = 30, timeout: float = None) -> str:
+    """Poll until the batch leaves 'running'; returns the final status"""
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        status = batch_provider.status(batch_id)
+        if status != 'running':
+            return status
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f'Batch {batch_id} still running after {timeout}s')
+        time.sleep(poll_interval)
+
+
+def _saved_batch(batch_provider, path, previous: Optional[bytes]) -> Optional[str]:
+    # Id of a batch an earlier attempt submitted from the same requests, if it is still
+    # running or completed. A failed/expired/cancelled or unknown batch is forgotten, so
+    # the caller submits a new one rather than failing on every resume.
+    id_path = pathlib.Path(path).with_suffix('.id')
+    if previous is None or not id_path.exists() or pathlib.Path(path).read_bytes() != previous:
+        return None
+    batch_id = id_path.read_text(encoding='utf-8').strip()
+    try:
+        status = batch_provider.status(batch_id)
+    except Exception as e:
+        # KeyError: a LocalBatchProvider batch of a process that is gone; 404: openai.NotFoundError
+        if not isinstance(e, KeyError) and getattr(e, 'status_code', None) != 404:
+            raise
+        status = None
+    if status not in ('running', 'completed'):
+        id_path.unlink(missing_ok=True)
+        return None
+    return batch_id
+
+
+def critique_chunks_batch(batch_provider, model, chunks, path, temperature=0.2, max_output_tokens=1500,
+                          poll_interval=30, timeout=None, resume=False) -> List[Dict]:
+    # Same result shape as critique.critique_chunks: one dict per chunk, in order,
+    # with an 'error' key for chunks the batch could not answer. The batch id is saved
+    # next to the requests file; resume=True polls that batch again instead of paying
+    # for a new one, as long as the requests are unchanged.
+    if not chunks:
+        return []
+    p = pathlib.Path(path)
+    previous = p.read_bytes() if resume and p.exists() else None
+    write_batch_file(chunks, model, path, temperature=temperature, max_output_tokens=max_output_tokens)
+    batch_id = _saved_batch(batch_provider, path, previous)
+    if batch_id:
+        print(f"Resume: polling batch {batch_id} submitted by the interrupted run")
+    else:
+        batch_id = batch_provider.submit(str(path))
+        p.with_suffix('.id').write_text(batch_id, encoding='utf-8')
+    status = wait_for_batch(batch_provider, batch_id, poll_interval=poll_interval, timeout=timeout)
+    if status != 'completed':
+        raise RuntimeError(f'Batch {batch_id} ended with status {status}')
+    results = batch_provider.results(batch_id)
+    outputs = []
+    for i, ch in enumerate(chunks):
+        res = results.get(f'chunk-{i}', {'error': 'missing from batch output'})
+        if 'error' in res:
+            outputs.append({'id': i, 'text': ch, 'kfa': f"[ERROR]: {res['error']}", 'error': res['error']})
+        else:
+            outputs.append({'id': i, 'text': ch, 'kfa': res['text']})
+    return outputs
@@ -0,0 +1,103 @@
+"""
+End-to-end pipeline benchmark on the offline MockProvider
+
+    python -m kfa.bench --words 2000,10000,50000 --repeats 3 --latency 0.05 > bench_output.txt
+
+For each document size it runs kfa.cli.run on a synthetic keynote and reports, as
+JSON: wall time, chunks/sec, tokens, and p50/p95 across repeats of every stage in the
+run reports (kfa.telemetry), of chunk critique calls and of whole runs.
+"""
+import argparse, json, pathlib, random, tempfile, time
+from typing import Dict, List, Optional
+from .cli import run
+from .config import load_config
+from .providers.mock import MockProvider
+from .telemetry import percentile
+
+_OPENERS = ["So here's the thing.", "Let me tell you a story.", "Picture this.", "Now, think about it.",
+            "Here's what surprised us.", "And then everything changed.", "Let's pause on that."]
+_WORDS = ("we you people team product idea data customers future world change build learn ship "
+          "problem question moment stage room story year week night first last every never always "
+          "simple hard small big fast slow real better together").split()
+
+
+def synthetic_keynote(words: int, seed: int = 0) -> str:
+    """A deterministic talk of about `words` words in short paragraphs of sentences"""
+    rng = random.Random(seed)
+    paras, n = [], 0
+    while n < words:
+        sents = [rng.choice(_OPENERS)]
+        for _ in range(rng.randint(3, 6)):
+            s = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 16)))
+            sents.append(s[0].upper() + s[1:] + rng.choice(".!?"))
+        para = " ".join(sents)
+        paras.append(para)
+        n += len(para.split())
+    return "\n\n".join(paras)
+
+
+def _summary(values: List[float]) -> Dict[str, Optional[float]]:
+    p50, p95 = percentile(values, 50), percentile(values, 95)
+    return {'p50_s': p50 and round(p50, 6), 'p95_s': p95 and round(p95, 6)}
+
+
+def bench_size(words: int, cfg: dict, mock: dict, repeats: int = 3, seed: int = 0) -> Dict:
+    """Benchmark kfa.cli.run on one synthetic document size"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / f'keynote_{words}.txt'
+        path.write_text(synthetic_keynote(words, seed), encoding='utf-8')
+        cfg = {**cfg, 'io': {**cfg['io'], 'out_dir': str(pathlib.Path(tmp) / 'out')}}
+        stages: Dict[str, List[float]] = {}
+        walls, calls = [], []
+        chunks = failures = tokens_in = tokens_out = 0
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            result = run(str(path), cfg, provider=MockProvider(**mock))
+            walls.append(time.perf_counter() - t0)
+            report = result['report']
+            for name, seconds in report['stages'].items():
+                stages.setdefault(name, []).append(seconds)
+            calls += [ch['latency_s'] for ch in report['chunks']]
+            chunks = report['chunks_total']
+            tokens_in += report['calls']['input_tokens']
+            tokens_out += report['calls']['output_tokens']
+            failures += sum(1 for o in result['outputs'] if o.get('error'))
+    total = sum(walls)
+    return {
+        'words': words,
+        'chunks': chunks,
+        'repeats': repeats,
+        'wall_s': round(total / repeats, 6),
+        'chunks_per_s': round(chunks * repeats / total, 3) if total else None,
+        'failed_chunks': failures,
+        'input_tokens': tokens_in // repeats,
+        'output_tokens': tokens_out // repeats,
+        'stages': {**{name: _summary(v) for name, v in stages.items()},
+                   'chunk_call': _summary(calls), 'run': _summary(walls)},
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Benchmark kfa.cli.run on synthetic keynotes with the mock provider')
+    ap.add_argument('--config', default='config.yaml', help='Chunking and concurrency settings (missing file: defaults)')
+    ap.add_argument('--words', default='2000,10000,50000', help='Comma-separated document sizes in words')
+    ap.add_argument('--repeats', type=int, default=3)
+    ap.add_argument('--latency', type=float, default=0.05, help='Mock seconds per call')
+    ap.add_argument('--jitter', type=float, default=0.02)
+    ap.add_argument('--per-token', type=float, default=0.0)
+    ap.add_argument('--error-rate', type=float, default=0.0)
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args(argv)
+
+    cfg = load_config(args.config)
+    cfg['chunking']['incremental'] = False  # every repeat does the full work
+    cfg['analytics'] = {**cfg['analytics'], 'enabled': False}
+    mock = {'latency': args.latency, 'jitter': args.jitter, 'per_token': args.per_token,
+            'error_rate': args.error_rate, 'seed': args.seed}
+    results = [bench_size(int(w), cfg, mock, args.repeats, args.seed) for w in args.words.split(',') if w.strip()]
+    print(json.dumps({'mock': mock, 'concurrency': cfg['params'].get('concurrency', 4),
+                      'strategy': cfg['chunking']['strategy'], 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Content-addressed on-disk cache for provider responses
+"""
+import asyncio, hashlib, json, os, pathlib, threading, time
+from typing import Dict, Iterator, List, Optional
+from .files import atomic_write
+from .providers.base import BaseProvider
+from .telemetry import note_cache_hit
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], temperature=0.2, max_output_tokens=1500,
+              source: Optional[str] = None) -> str:
+    """Stable hash of everything that determines a response. `source` names a provider other
+    than OpenAI (mock settings, replay fixtures); None keeps the keys of plain OpenAI runs"""
+    request = {
+        'model': model,
+        'messages': [{'role': m['role'], 'content': m['content']} for m in messages],
+        'temperature': temperature,
+        'max_output_tokens': max_output_tokens,
+    }
+    if source is not None:
+        request['source'] = source
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """One JSON file per response under `path`, evicted by age and total size"""
+
+    def __init__(self, path: str = '.kfa_cache', max_mb: float = 500, max_age_days: float = 30):
+        self.root = pathlib.Path(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.root / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> Optional[str]:
+        p = self._path(key)
+        try:
+            st = p.stat()
+            if self.max_age and time.time() - st.st_mtime > self.max_age:
+                p.unlink(missing_ok=True)
+                raise FileNotFoundError(p)
+            value = json.loads(p.read_text(encoding='utf-8'))['response']
+            os.utime(p)  # refresh recency for size-based eviction
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        atomic_write(self._path(key), json.dumps({'response': value, 'created': time.time()}, ensure_ascii=False))
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under max_mb"""
+        now = time.time()
+        entries, removed = [], 0
+        for p in self.root.glob('*/*.json'):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            if self.max_age and now - st.st_mtime > self.max_age:
+                p.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((st.st_mtime, st.st_size, p))
+        if self.max_bytes:
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class CachedProvider(BaseProvider):
+    """Wraps any provider; `bypass=True` skips lookups but still refreshes entries.
+    `source` is passed to cache_key so entries from different providers never mix"""
+
+    def __init__(self, provider: BaseProvider, cache: ResponseCache, bypass: bool = False,
+                 source: Optional[str] = None):
+        self.provider = provider
+        self.cache = cache
+        self.bypass = bypass
+        self.source = source
+
+    def _key(self, messages, model, kwargs):
+        return cache_key(model, messages, kwargs.get('temperature', 0.2), kwargs.get('max_output_tokens', 1500),
+                         self.source)
+
+    def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        key = self._key(messages, model, kwargs)
+        if not self.bypass:
+            hit = self.cache.get(key)
+            if hit is not None:
+                note_cache_hit()
+                return hit
+        out = self.provider.respond(messages, model, **kwargs)
+        self.cache.put(key, out)
+        return out
+
+    async def arespond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        # Disk reads and writes go to a thread so they don't stall the event loop
+        key = self._key(messages, model, kwargs)
+        if not self.bypass:
+            hit = await asyncio.to_thread(self.cache.get, key)
+            if hit is not None:
+                note_cache_hit()
+                return hit
+        out = await self.provider.arespond(messages, model, **kwargs)
+        await asyncio.to_thread(self.cache.put, key, out)
+        return out
+
+    def stream(self, messages: List[Dict[str, str]], model: str, **kwargs) -> Iterator[str]:
+        # A hit is replayed as one delta; a miss is passed through and stored once complete
+        key = self._key(messages, model, kwargs)
+        if not self.bypass:
+            hit = self.cache.get(key)
+            if hit is not None:
+                note_cache_hit()
+                yield hit
+                return
+        parts = []
+        for delta in self.provider.stream(messages, model, **kwargs):
+            parts.append(delta)
+            yield delta
+        self.cache.put(key, "".join(parts))
@@ -0,0 +1,136 @@
+"""
+Append-only checkpoint journal per run, so a crashed or killed run can resume
+without paying again for chunks that already finished
+"""
+import json, os, pathlib, threading
+from typing import Dict, List, Optional, Tuple
+from .incremental import fingerprint
+from .runs import runs_root
+
+JOURNAL_NAME = 'checkpoint.jsonl'
+DONE_LINE = json.dumps({'type': 'done'}) + '\n'
+
+
+def journal_path(run_dir) -> pathlib.Path:
+    return pathlib.Path(run_dir) / JOURNAL_NAME
+
+
+class Journal:
+    """One JSON line per finished chunk, flushed and fsynced as it is written.
+
+    The first line is a header with the input file and style settings; a resumed run
+    only reuses entries whose header matches. A torn last line (killed mid-write) is
+    ignored on load.
+    """
+
+    def __init__(self, run_dir, input_path: str, settings: Dict):
+        self.path = journal_path(run_dir)
+        self.input = str(pathlib.Path(input_path).resolve())
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def load(self) -> Dict[str, str]:
+        """Fingerprint -> kfa output of chunks finished by an earlier attempt of this run"""
+        header, entries = read_journal(self.path)
+        if not header or header.get('input') != self.input or header.get('settings') != self.settings:
+            return {}
+        return {e['fp']: e['kfa'] for e in entries if e.get('type') == 'chunk'}
+
+    def _open(self):
+        if self._fh is None:
+            # Rewrite the kept entries (dropping a torn tail or a stale journal) before appending
+            header = {'type': 'header', 'input': self.input, 'settings': self.settings}
+            prior, entries = read_journal(self.path)
+            kept = [e for e in entries if e.get('type') == 'chunk'] if prior == header else []
+            self._fh = self.path.open('w', encoding='utf-8')
+            for rec in [header] + kept:
+                self._fh.write(json.dumps(rec, ensure_ascii=False) + '\n')
+            self._sync()
+        return self._fh
+
+    def _sync(self):
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def record(self, out: Dict) -> None:
+        # Failed chunks are not journaled, so a resume retries them
+        if 'error' in out:
+            return
+        line = json.dumps({'type': 'chunk', 'id': out['id'], 'fp': fingerprint(out['text']), 'kfa': out['kfa']},
+                          ensure_ascii=False)
+        with self._lock:
+            fh = self._open()
+            fh.write(line + '\n')
+            self._sync()
+
+    def complete(self) -> None:
+        with self._lock:
+            fh = self._open()
+            fh.write(DONE_LINE)
+            self._sync()
+            fh.close()
+            self._fh = None
+
+
+def is_complete(run_dir) -> bool:
+    """Whether a run directory holds journals (its own, or one per document of a
+    multi-document run) that all end with the completion marker"""
+    journals = [*pathlib.Path(run_dir).glob(JOURNAL_NAME), *pathlib.Path(run_dir).glob(f'*/{JOURNAL_NAME}')]
+    for p in journals:
+        try:
+            with p.open('rb') as fh:
+                fh.seek(max(0, p.stat().st_size - len(DONE_LINE)))
+                if fh.read() != DONE_LINE.encode('utf-8'):
+                    return False
+        except OSError:
+            return False
+    return bool(journals)
+
+
+def read_journal(path) -> Tuple[Optional[Dict], List[Dict]]:
+    """Header and entries of a journal; a truncated or corrupt line ends the read"""
+    p = pathlib.Path(path)
+    if not p.exists():
+        return None, []
+    header, entries = None, []
+    with p.open(encoding='utf-8') as fh:
+        for line in fh:
+            if not line.endswith('\n'):
+                break
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            if header is None:
+                if rec.get('type') != 'header':
+                    return None, []
+                header = rec
+            else:
+                entries.append(rec)
+    return header, entries
+
+
+def plan(chunks: List[str], reused: Dict[int, Dict], todo: List[int], journaled: Dict[str, str]):
+    """Move chunks that the journal already holds from `todo` to `reused`"""
+    reused, rest = dict(reused), []
+    for i in todo:
+        prior = journaled.get(fingerprint(chunks[i]))
+        if prior is None:
+            rest.append(i)
+        else:
+            reused[i] = {'id': i, 'text': chunks[i], 'kfa': prior}
+    return reused, rest
+
+
+def find_unfinished(out_dir: str, input_path: str) -> Optional[str]:
+    """Run id of the newest run of `input_path` whose journal has no completion marker"""
+    root = runs_root(out_dir)
+    if not root.exists():
+        return None
+    target = str(pathlib.Path(input_path).resolve())
+    for p in sorted(root.glob(f'*/{JOURNAL_NAME}'), key=lambda p: p.stat().st_mtime, reverse=True):
+        header, entries = read_journal(p)
+        if header and header.get('input') == target and not any(e.get('type') == 'done' for e in entries):
+            return p.parent.name
+    return None
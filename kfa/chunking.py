@@ -1,30 +1,188 @@
-import re
+import hashlib, re
+from collections import deque
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
 
 def naive_sentence_split(text: str):
-    return re.split(r'(?<=[.!?])\s+', text)
+    return _SENT_SPLIT.split(text)
 
 def simple_token_estimate(s: str):
     return max(1, len(s) // 4)  # ~4 chars/token heuristic
 
-def chunk_text(text: str, chunk_tokens=2000, overlap_tokens=200, prefer_sentence_boundary=True):
-    sentences = naive_sentence_split(text)
-    chunks, cur, cur_tokens = [], [], 0
-    for sent in sentences:
-        t = simple_token_estimate(sent)
-        if cur_tokens + t > chunk_tokens:
-            chunks.append(" ".join(cur).strip())
-            # build overlap
-            overlap = []
-            ot = 0
-            for s in reversed(cur):
-                st = simple_token_estimate(s)
-                if ot + st > overlap_tokens: break
-                overlap.append(s)
-                ot += st
-            cur = list(reversed(overlap))
-            cur_tokens = sum(simple_token_estimate(s) for s in cur)
-        cur.append(sent)
-        cur_tokens += t
-    if cur:
-        chunks.append(" ".join(cur).strip())
-    return chunks
+class Chunk:
+    """One chunk of a document: chars [start, end) of the source text, its token count,
+    how many of its leading chars repeat the end of the previous chunk and, for SRT
+    input, the media seconds it covers. The text is not copied: chunks of one string
+    slice it on demand (`text`, `str(chunk)`); only chunks of a streamed source keep a
+    buffer of their own."""
+    __slots__ = ('id', 'start', 'end', 'tokens', 'overlap', 'start_s', 'end_s', '_buf', '_base', '_hash')
+
+    def __init__(self, buf: str, start: int, end: int, tokens: int = 0, overlap: int = 0, id: int = 0,
+                 base: int = 0, start_s: Optional[float] = None, end_s: Optional[float] = None):
+        # `buf` holds the source from offset `base` on (the whole source when base is 0)
+        self._buf, self._base, self._hash = buf, base, None
+        self.id, self.start, self.end, self.tokens, self.overlap = id, start, end, tokens, overlap
+        self.start_s, self.end_s = start_s, end_s
+
+    @property
+    def text(self) -> str:
+        return self._buf[self.start - self._base:self.end - self._base]
+
+    @property
+    def hash(self) -> str:
+        """sha256 of the text: the chunk's identity for incremental runs and checkpoints"""
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.text.encode('utf-8')).hexdigest()
+        return self._hash
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __eq__(self, other):
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return (self.start, self.end, self.overlap) == (other.start, other.end, other.overlap) and self.text == other.text
+
+    def __hash__(self):
+        return hash((self.start, self.end, self.overlap))
+
+    def __repr__(self):
+        return f'Chunk(id={self.id}, start={self.start}, end={self.end}, tokens={self.tokens}, overlap={self.overlap})'
+
+def strip_span(text: str, first: int, last: int) -> Tuple[int, int]:
+    # [first, last) of `text` without surrounding whitespace, without slicing it out
+    while first < last and text[first].isspace():
+        first += 1
+    while last > first and text[last - 1].isspace():
+        last -= 1
+    return first, last
+
+def overlap_of(chunk) -> int:
+    """Length of the chunk's leading text shared with the previous chunk (0 if unknown)"""
+    return getattr(chunk, 'overlap', 0)
+
+def _sentence_runs(source: Union[str, Iterable[str]]) -> Iterator[Tuple[int, str, str]]:
+    # (offset in the source, sentence, whitespace after it) triples. `source` may be a
+    # string or any iterable of text pieces (e.g. an open file); the sentences are the
+    # same as splitting the concatenation, holding only the unfinished tail in memory
+    # and scanning each character once.
+    if isinstance(source, str):
+        pos = 0
+        for m in _SENT_SPLIT.finditer(source):
+            yield pos, source[pos:m.start()], m.group()
+            pos = m.end()
+        yield pos, source[pos:], ''
+        return
+    buf, scan, base = '', 0, 0
+    for piece in source:
+        buf += piece
+        start = 0
+        for m in _SENT_SPLIT.finditer(buf, scan):
+            if m.end() == len(buf):
+                break  # whitespace run may continue in the next piece
+            yield base + start, buf[start:m.start()], m.group()
+            start = m.end()
+        else:
+            m = None
+        scan = (m.start() if m else len(buf)) - start
+        buf = buf[start:]
+        base += start
+    pos = 0
+    for m in _SENT_SPLIT.finditer(buf):
+        yield base + pos, buf[pos:m.start()], m.group()
+        pos = m.end()
+    yield base + pos, buf[pos:], ''
+
+def iter_sentences(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    # Streaming naive_sentence_split
+    for _, sent, _ in _sentence_runs(source):
+        yield sent
+
+def _pack(source, chunk_tokens, overlap_tokens, cut=None, count_tokens=None) -> Iterator[Chunk]:
+    # Sliding window of sentences with their token counts and a running total. Each
+    # sentence is counted once; on flush the window is trimmed from the left down to the
+    # overlap budget, so every sentence is appended and dropped at most once. The
+    # sentences kept by a flush are the overlap of the next chunk.
+    # Chunks of a string (or of a Chunk: a piece of a scene) slice its buffer; chunks
+    # of a stream of pieces get a buffer of their own from the window's sentences.
+    count = count_tokens or simple_token_estimate
+    if isinstance(source, Chunk):
+        shift, times = source.start, {'start_s': source.start_s, 'end_s': source.end_s}
+        buf, base, runs = source._buf, source._base, _sentence_runs(source.text)
+    else:
+        shift, times, base, runs = 0, {}, 0, _sentence_runs(source)
+        buf = source if isinstance(source, str) else None
+    sents, toks, total, fresh, carried, n = deque(), deque(), 0, False, 0, 0
+
+    def chunk():
+        nonlocal n
+        first_at, first, _ = sents[0]
+        last_at, last, _ = sents[-1]
+        start, end = first_at + len(first) - len(first.lstrip()), last_at + len(last.rstrip())
+        overlap = 0
+        if carried:
+            at, sent, _ = sents[carried - 1]
+            overlap = at + len(sent.rstrip()) - start
+        if buf is None:
+            own = "".join(s + gap for _, s, gap in sents)[start - first_at:end - first_at]
+            c = Chunk(own, start, end, total, overlap, n, base=start)
+        else:
+            c = Chunk(buf, shift + start, shift + end, total, overlap, n, base, **times)
+        n += 1
+        return c
+
+    def trim():
+        nonlocal total
+        while toks and total > overlap_tokens:
+            total -= toks.popleft()
+            sents.popleft()
+        return len(sents)
+
+    for at, sent, gap in runs:
+        if not sent.strip():
+            continue
+        t = count(sent)
+        if fresh and total + t > chunk_tokens:
+            yield chunk()
+            carried = trim()
+            fresh = False
+        sents.append((at, sent, gap))
+        toks.append(t)
+        total += t
+        fresh = True
+        if cut and cut(sent, t, total):
+            yield chunk()
+            carried = trim()
+            fresh = False
+    if fresh:
+        yield chunk()
+
+def iter_chunks(source: Union[str, Chunk, Iterable[str]], chunk_tokens=2000, overlap_tokens=200, prefer_sentence_boundary=True, count_tokens=None) -> Iterator[Chunk]:
+    # Generator form of chunk_text; pass a file object to chunk without loading it whole.
+    # count_tokens is any str -> int callable (see kfa.tokens); defaults to simple_token_estimate.
+    # A Chunk source (a long scene) is split into Chunks with offsets into its document.
+    return _pack(source, chunk_tokens, overlap_tokens, count_tokens=count_tokens)
+
+def chunk_text(text: Union[str, Chunk, Iterable[str]], chunk_tokens=2000, overlap_tokens=200, prefer_sentence_boundary=True, count_tokens=None):
+    return list(iter_chunks(text, chunk_tokens, overlap_tokens, prefer_sentence_boundary, count_tokens))
+
+def _boundary_hash(sent: str):
+    # Deterministic value in [0, 1) that depends only on the sentence itself
+    return int(hashlib.sha1(sent.encode('utf-8')).hexdigest()[:8], 16) / 0x100000000
+
+def chunk_text_stable(text: Union[str, Chunk, Iterable[str]], chunk_tokens=2000, overlap_tokens=200, prefer_sentence_boundary=True, count_tokens=None):
+    # Content-defined variant of chunk_text used by incremental runs: once a chunk holds
+    # half the budget, a sentence ends it when its hash falls under a token-weighted
+    # threshold. Cuts depend on local content, so an edit only moves the boundaries of the
+    # chunk it lands in and the chunks re-synchronise right after it.
+    min_tokens = chunk_tokens // 2
+    window = max(1, chunk_tokens // 4)
+
+    def cut(sent, t, total):
+        return total >= min_tokens and _boundary_hash(sent) < t / window
+
+    return list(_pack(text, chunk_tokens, overlap_tokens, cut, count_tokens))
@@ -1,54 +1,546 @@
-import argparse, pathlib, os
+import argparse, asyncio, json, pathlib, os
 from .config import load_config
 from .providers.openai_provider import OpenAIProvider
-from .chunking import chunk_text
-from .scenemap import build_scene_map, parse_scene_map, cut_by_scenes
-from .critique import critique_chunk
-from .export import export_markdown, export_csv
-from .merge import merge_chunks
+from .providers.mock import MockProvider
+from .providers.replay import ReplayProvider
+from .chunking import chunk_text, chunk_text_stable, iter_sentences
+from .scenemap import build_scene_map, abuild_scene_map, parse_scene_map, cut_by_scenes
+from .critique import critique_chunks, acritique_chunks, stream_critique_chunks, critique_messages
+from .export import ReportWriter
+from .cache import ResponseCache, CachedProvider
+from . import autochunk, checkpoint, incremental, runs
+from .analytics import TagIndex
+from .ratelimit import RateLimitedProvider, AIMDController
+from .batch import critique_chunks_batch
+from .tokens import get_token_counter
+from .timing import chunk_by_time
+from .telemetry import RunMetrics
 
-def run(input_path: str, cfg: dict):
-    # Read input
-    from .reader import read_input
-    text = read_input(input_path, cfg['io'].get('input_format','auto'))
+def _base_provider(cfg: dict, max_retries=None):
+    # cfg['provider']: 'openai', or 'mock' for the offline MockProvider (settings in cfg['mock']).
+    # replay.mode record/replay/auto puts a ReplayProvider in front of it (kfa.providers.replay).
+    replay = cfg.get('replay') or {}
+    mode = replay.get('mode')
 
-    provider = OpenAIProvider()
+    def base():
+        kind = cfg.get('provider', 'openai')
+        if kind == 'mock':
+            return MockProvider(**(cfg.get('mock') or {}))
+        if kind != 'openai':
+            raise ValueError(f"Unknown provider: {kind!r} (expected 'openai' or 'mock')")
+        return OpenAIProvider(max_retries=max_retries)
+
+    if not mode:
+        return base()
+    return ReplayProvider(None if mode == 'replay' else base(), replay.get('dir', 'fixtures'), mode)
+
+def _provider_source(cfg: dict):
+    # Where responses come from when it isn't plain OpenAI: the mock and its settings,
+    # and/or a replay fixtures dir. Keys the cache, manifests and journals, so offline
+    # runs never hand their output to real ones. None for plain OpenAI (keys unchanged).
+    source = {}
+    if cfg.get('provider', 'openai') != 'openai':
+        source.update(provider=cfg['provider'], mock=cfg.get('mock') or {})
+    replay = cfg.get('replay') or {}
+    if replay.get('mode'):
+        source['replay'] = str(replay.get('dir', 'fixtures'))
+    return json.dumps(source, sort_keys=True) if source else None
+
+def make_provider(cfg: dict):
+    # OpenAI <- rate limiter <- cache: cache hits never spend quota
+    rl = cfg.get('rate_limit', {})
+    if rl.get('enabled', True):
+        concurrency = int(cfg['params'].get('concurrency', 4))
+        provider = RateLimitedProvider(
+            _base_provider(cfg, max_retries=0),
+            rpm=rl.get('rpm'),
+            tpm=rl.get('tpm'),
+            controller=AIMDController(
+                initial=concurrency,
+                min_limit=rl.get('min_concurrency', 1),
+                max_limit=concurrency,
+                target_latency=rl.get('target_latency_s'),
+            ),
+            max_retries=rl.get('max_retries', 6),
+        )
+    else:
+        provider = _base_provider(cfg)
+    cache_cfg = cfg.get('cache', {})
+    if cache_cfg.get('enabled', True):
+        cache = ResponseCache(
+            cache_cfg.get('dir', '.kfa_cache'),
+            max_mb=cache_cfg.get('max_mb', 500),
+            max_age_days=cache_cfg.get('max_age_days', 30),
+        )
+        provider = CachedProvider(provider, cache, bypass=cache_cfg.get('bypass', False), source=_provider_source(cfg))
+    return provider
+
+def _finish_provider(provider):
+    if isinstance(provider, CachedProvider):
+        provider.cache.evict()
+        st = provider.cache.stats()
+        print(f"Cache: {st['hits']} hits, {st['misses']} misses")
+        provider = provider.provider
+    if isinstance(provider, RateLimitedProvider) and provider.retries:
+        print(f"Rate limit: {provider.throttled} throttled, {provider.retries} retries, "
+              f"concurrency settled at {provider.controller.limit:.1f}")
+
+def _read(input_path: str, cfg: dict, stream=True):
+    # Returns (text, cues). Token chunking consumes the file as a stream of pieces unless
+    # stream=False; scene maps and auto sizing need the whole text, and SRT inputs keep
+    # their cue timings for time and scene chunking
+    from .reader import read_input, read_srt, iter_text, detect_format
+    fmt = detect_format(input_path, cfg['io'].get('input_format','auto'))
+    strategy = cfg['chunking']['strategy']
+    if fmt == 'srt' and strategy in ('time', 'scene_map'):
+        return read_srt(input_path)
+    if strategy in ('scene_map', 'auto') or not stream:
+        return read_input(input_path, fmt), None
+    return iter_text(input_path, fmt), None
+
+def _profile(cfg: dict):
+    return autochunk.LatencyProfile(cfg['chunking'].get('auto', {}).get('profile')
+                                    or pathlib.Path(_out_dir(cfg)) / autochunk.PROFILE_NAME)
+
+def _learn(cfg: dict, report: dict):
+    # Feeds the chunk call latencies of a finished run into the auto sizing profile
+    if cfg['chunking'].get('auto', {}).get('learn', True):
+        _profile(cfg).add_report(report)
+
+def _auto_size(text: str, cfg: dict, count):
+    # chunking.strategy: auto - chunk size and overlap for this document (kfa.autochunk)
+    auto = cfg['chunking'].get('auto', {})
+    fit = _profile(cfg).fit(cfg['models']['style_model'])
+    choice = autochunk.choose(
+        sum(count(s) for s in iter_sentences(text) if s),
+        fit,
+        cfg['params'].get('concurrency', 4),
+        objective=auto.get('objective', 'time'),
+        min_chunk_tokens=auto.get('min_chunk_tokens', 800),
+        max_chunk_tokens=auto.get('max_chunk_tokens', 4000),
+        overlap_ratio=auto.get('overlap_ratio', 0.1),
+        min_overlap_tokens=auto.get('min_overlap_tokens', 50),
+        prompt_tokens=sum(count(m['content']) for m in critique_messages('')),
+        max_output_tokens=cfg['params']['max_output_tokens'],
+        input_cost=auto.get('input_cost', 1.0),
+        output_cost=auto.get('output_cost', 4.0),
+    )
+    print(f"Auto chunking: {choice.chunk_tokens} tokens with {choice.overlap_tokens} overlap, "
+          f"{choice.calls} calls, ~{choice.est_wall_s:.0f}s "
+          + (f"({fit.samples} profiled calls)" if fit.samples else "(no latency profile yet)"))
+    return choice
+
+def _split(text, cfg: dict, scene_map_md: str = None, cues=None, metrics=None):
+    # `text` is a string, or an iterable of text pieces when there is no scene map.
+    # With the auto strategy the chosen sizes are added to `metrics` (a RunMetrics), if given.
+    # Returns kfa.chunking.Chunk records, numbered in order, with offsets into the document.
+    count = get_token_counter(cfg['chunking'].get('tokenizer', 'auto'), cfg['models']['style_model'])
+    split = chunk_text_stable if cfg['chunking'].get('incremental') else chunk_text
+    size, overlap = cfg['chunking']['chunk_tokens'], cfg['chunking']['overlap_tokens']
+    if cfg['chunking']['strategy'] == 'auto':
+        choice = _auto_size(text, cfg, count)
+        size, overlap = choice.chunk_tokens, choice.overlap_tokens
+        if metrics:
+            metrics.info['auto_chunking'] = choice._asdict()
+
+    def by_tokens(t):
+        return split(t, size, overlap, cfg['chunking']['prefer_sentence_boundary'], count_tokens=count)
+
+    if scene_map_md is None:
+        if cfg['chunking']['strategy'] == 'time':
+            if cues:
+                return chunk_by_time(text, cues, cfg['chunking'].get('window_minutes', 5) * 60, count_tokens=count)
+            print("Time chunking needs SRT cue timings; falling back to token chunks")
+        return by_tokens(text)
+    # Scenes become chunks; one longer than the token budget is split like token mode,
+    # into pieces that keep the scene's time span
+    chunks = []
+    for scene in cut_by_scenes(text, parse_scene_map(scene_map_md), cues=cues, count_tokens=count):
+        if scene.tokens <= cfg['chunking']['chunk_tokens']:
+            chunks.append(scene)
+        else:
+            chunks.extend(by_tokens(scene))
+    for i, c in enumerate(chunks):
+        c.id = i
+    return chunks
+
+def _scene_map_opts(cfg: dict):
+    return {
+        'window_tokens': cfg['chunking'].get('scene_window_tokens', 6000),
+        'concurrency': cfg['params'].get('concurrency', 4),
+    }
+
+def _out_dir(cfg: dict):
+    return cfg['io'].get('out_dir', 'out')
+
+def _writer(cfg: dict, paths: dict, reused=None):
+    # Report files are written chunk by chunk in order; reused outputs go in first
+    writer = ReportWriter(
+        paths['md_path'],
+        paths['csv_path'] if cfg['io']['export_csv'] else None,
+        paths['records_path'] if cfg['io'].get('export_records', True) else None,
+    )
+    for out in (reused or {}).values():
+        writer.add(out)
+    return writer
+
+def _export(outputs, cfg: dict, input_path: str, paths: dict, writer=None):
+    # Finishes the run's artifacts. With a `writer` the report files were already
+    # streamed as chunks finished; without one, all outputs are written now.
+    if writer is None:
+        writer = _writer(cfg, paths)
+        for out in outputs:
+            writer.add(out)
+    writer.close()
+    failed = [o['id'] for o in outputs if 'error' in o]
+    if failed:
+        print(f"Warning: {len(failed)} of {len(outputs)} chunks failed: {failed}")
+    analytics = cfg.get('analytics', {})
+    if analytics.get('enabled', True):
+        # Uploads run from a temp file, so callers name the document (analytics.document)
+        TagIndex(analytics.get('path') or pathlib.Path(_out_dir(cfg)) / 'tags.sqlite3').add_run(
+            paths['run_id'], analytics.get('document') or str(pathlib.Path(input_path).resolve()), outputs,
+            speaker=analytics.get('speaker'), event=analytics.get('event'),
+        )
+    if cfg['chunking'].get('incremental'):
+        incremental.save_manifest(incremental.manifest_path(_out_dir(cfg), input_path), outputs, _style_settings(cfg))
+    runs.cleanup_runs(
+        _out_dir(cfg),
+        keep=cfg['io'].get('keep_runs', 20),
+        max_age_days=cfg['io'].get('max_run_age_days', 7),
+        protect=(paths['run_id'].split('/')[0],),
+    )
+    return dict(
+        paths,
+        csv_path=paths['csv_path'] if cfg['io']['export_csv'] else None,
+        records_path=paths['records_path'] if cfg['io'].get('export_records', True) else None,
+        outputs=outputs,
+    )
+
+def _style_settings(cfg: dict):
+    # Prior outputs are only reusable if they were produced the same way
+    settings = {
+        'style_model': cfg['models']['style_model'],
+        'temperature': cfg['params']['temperature'],
+        'max_output_tokens': cfg['params']['max_output_tokens'],
+    }
+    source = _provider_source(cfg)
+    if source is not None:
+        settings['source'] = source
+    return settings
+
+def _plan(chunks, cfg: dict, input_path: str, journal=None, resume=False):
+    reused, todo = {}, list(range(len(chunks)))
+    if cfg['chunking'].get('incremental'):
+        previous = incremental.load_manifest(incremental.manifest_path(_out_dir(cfg), input_path), _style_settings(cfg))
+        reused, todo = incremental.plan(chunks, previous)
+        print(f"Incremental: reusing {len(reused)} of {len(chunks)} chunks")
+    if journal and resume:
+        before = len(todo)
+        reused, todo = checkpoint.plan(chunks, reused, todo, journal.load())
+        print(f"Resume: {before - len(todo)} of {len(chunks)} chunks already in the checkpoint journal")
+    return reused, todo
+
+def _run_paths(cfg: dict, input_path: str, run_id=None, resume=False):
+    # --resume without --run-id picks the newest unfinished run of the same input
+    if resume and not run_id:
+        run_id = checkpoint.find_unfinished(_out_dir(cfg), input_path)
+        print(f"Resuming run {run_id}" if run_id else "No unfinished run to resume; starting a new one")
+    paths = runs.run_paths(_out_dir(cfg), run_id)
+    return paths, checkpoint.Journal(paths['out_dir'], input_path, _style_settings(cfg))
+
+def _metrics(cfg: dict, paths: dict, **info):
+    # Settings that explain the timings, so reports from different runs can be compared
+    return RunMetrics(paths['run_id'], **info, settings={
+        'provider': cfg.get('provider', 'openai'),
+        'strategy': cfg['chunking']['strategy'],
+        'chunk_tokens': cfg['chunking']['chunk_tokens'],
+        'overlap_tokens': cfg['chunking']['overlap_tokens'],
+        'concurrency': cfg['params'].get('concurrency', 4),
+        **_style_settings(cfg),
+    })
+
+def _report(metrics, cfg: dict, result: dict, chunks, todo):
+    # Adds the run report to the result and writes run_report.json next to the outputs
+    metrics.info.update(chunks_total=len(chunks), chunks_critiqued=len(todo))
+    path = result['report_path'] if cfg.get('metrics', {}).get('report', True) else None
+    result['report'] = metrics.finish(path, todo)
+    result['report_path'] = path
+    _learn(cfg, result['report'])
+    return result
+
+def _finish_run(metrics, cfg: dict, input_path: str, paths: dict, journal, base, chunks, reused, todo, fresh,
+                writer=None):
+    # The tail of every single-document entry point (run, arun, stream_run, run_batch):
+    # export, mark the journal complete, evict/report the cache, write the run report
+    outputs = incremental.assemble(chunks, reused, todo, fresh)
+    with metrics.span('export'):
+        result = _export(outputs, cfg, input_path, paths, writer)
+    journal.complete()
+    _finish_provider(base)
+    return _report(metrics, cfg, result, chunks, todo)
+
+def _finished(journal, writer, todo):
+    # on_output hook: critique helpers number outputs within `todo`, so renumber to chunk
+    # indices, then journal the output and stream it into the report files
+    def done(out):
+        out['id'] = todo[out['id']]
+        journal.record(out)
+        if writer:
+            writer.add(out)
+    return done
+
+def run(input_path: str, cfg: dict, provider=None, on_progress=None, run_id=None, resume=False):
+    # Writes to out/runs/<run_id>/ and returns a dict with run_id, out_dir, md_path,
+    # csv_path, records_path and outputs; report files fill in chunk order as chunks
+    # finish. on_progress(done, total), if given, is called as chunks finish (used by
+    # kfa.jobs). Finished chunks are journaled as they land; resume=True skips chunks
+    # an earlier attempt of the same run already finished. Stage and provider call
+    # timings go to run_report.json (result['report']).
+    paths, journal = _run_paths(cfg, input_path, run_id, resume)
+    metrics = _metrics(cfg, paths, input=str(input_path))
+    # Read input (token chunking reads lazily, so most of the reading lands in 'chunk')
+    with metrics.span('read'):
+        text, cues = _read(input_path, cfg)
+
+    base = provider or make_provider(cfg)
+    provider = metrics.instrument(base)
 
     # Global pass (optional)
+    sm_md = None
     if cfg['chunking']['strategy'] == 'scene_map':
-        sm_md = build_scene_map(provider, cfg['models']['global_model'], text)
-        scenes = parse_scene_map(sm_md)
-        chunks = cut_by_scenes(text, scenes)
-    else:
-        chunks = chunk_text(
-            text,
-            cfg['chunking']['chunk_tokens'],
-            cfg['chunking']['overlap_tokens'],
-            cfg['chunking']['prefer_sentence_boundary'],
+        with metrics.span('scene_map'):
+            sm_md = build_scene_map(provider, cfg['models']['global_model'], text, **_scene_map_opts(cfg))
+    with metrics.span('chunk'):
+        chunks = _split(text, cfg, sm_md, cues, metrics)
+
+    # Style pass (only chunks without a reusable prior output)
+    with metrics.span('plan'):
+        reused, todo = _plan(chunks, cfg, input_path, journal, resume)
+        writer = _writer(cfg, paths, reused)
+    if on_progress:
+        on_progress(len(reused), len(chunks))
+    with metrics.span('critique'):
+        fresh = critique_chunks(
+            provider,
+            cfg['models']['style_model'],
+            [chunks[i] for i in todo],
+            temperature=cfg['params']['temperature'],
+            max_output_tokens=cfg['params']['max_output_tokens'],
+            concurrency=cfg['params'].get('concurrency', 4),
+            on_progress=on_progress and (lambda n: on_progress(len(reused) + n, len(chunks))),
+            on_output=_finished(journal, writer, todo),
         )
 
-    # Style pass
-    outputs = []
-    for i, ch in enumerate(chunks):
-        out = critique_chunk(
+    # Merge & export (the report itself was written as chunks finished)
+    return _finish_run(metrics, cfg, input_path, paths, journal, base, chunks, reused, todo, fresh, writer)
+
+async def arun(input_path: str, cfg: dict, provider=None, run_id=None, resume=False):
+    # Same pipeline as run(), but provider calls are awaited and blocking
+    # file work is pushed to a thread, so callers on an event loop stay responsive.
+    paths, journal = _run_paths(cfg, input_path, run_id, resume)
+    metrics = _metrics(cfg, paths, input=str(input_path))
+    with metrics.span('read'):
+        text, cues = await asyncio.to_thread(_read, input_path, cfg, False)
+
+    base = provider or make_provider(cfg)
+    provider = metrics.instrument(base)
+
+    sm_md = None
+    if cfg['chunking']['strategy'] == 'scene_map':
+        with metrics.span('scene_map'):
+            sm_md = await abuild_scene_map(provider, cfg['models']['global_model'], text, **_scene_map_opts(cfg))
+    with metrics.span('chunk'):
+        chunks = await asyncio.to_thread(_split, text, cfg, sm_md, cues, metrics)
+
+    with metrics.span('plan'):
+        reused, todo = await asyncio.to_thread(_plan, chunks, cfg, input_path, journal, resume)
+        writer = await asyncio.to_thread(_writer, cfg, paths, reused)
+    with metrics.span('critique'):
+        fresh = await acritique_chunks(
             provider,
             cfg['models']['style_model'],
-            ch,
+            [chunks[i] for i in todo],
+            temperature=cfg['params']['temperature'],
+            max_output_tokens=cfg['params']['max_output_tokens'],
+            concurrency=cfg['params'].get('concurrency', 4),
+            on_output=_finished(journal, writer, todo),
+        )
+
+    return await asyncio.to_thread(_finish_run, metrics, cfg, input_path, paths, journal, base,
+                                   chunks, reused, todo, fresh, writer)
+
+def run_batch(input_path: str, cfg: dict, batch_provider=None, provider=None, run_id=None, resume=False):
+    # Offline variant of run(): every chunk critique goes into one batch file
+    # (out/runs/<run_id>/batch_requests.jsonl), submitted through a BaseBatchProvider
+    # and polled until done. `provider` is used for the scene_map global pass and, when
+    # the configured provider is not OpenAI (mock, replay), to run the batch in-process.
+    from .providers.openai_provider import OpenAIBatchProvider
+    from .providers.local_batch import LocalBatchProvider
+    # Batch calls are not timed one by one; the report has the stage spans.
+    paths, journal = _run_paths(cfg, input_path, run_id, resume)
+    metrics = _metrics(cfg, paths, input=str(input_path))
+    with metrics.span('read'):
+        text, cues = _read(input_path, cfg)
+    base = provider
+    if batch_provider is None:
+        if cfg.get('provider', 'openai') == 'openai' and not cfg.get('replay', {}).get('mode'):
+            batch_provider = OpenAIBatchProvider()
+        else:
+            base = base or make_provider(cfg)
+            batch_provider = LocalBatchProvider(base, workers=cfg['params'].get('concurrency', 4))
+
+    sm_md = None
+    if cfg['chunking']['strategy'] == 'scene_map':
+        base = base or make_provider(cfg)
+        provider = metrics.instrument(base)
+        with metrics.span('scene_map'):
+            sm_md = build_scene_map(provider, cfg['models']['global_model'], text, **_scene_map_opts(cfg))
+    with metrics.span('chunk'):
+        chunks = _split(text, cfg, sm_md, cues, metrics)
+
+    with metrics.span('plan'):
+        reused, todo = _plan(chunks, cfg, input_path, journal, resume)
+    batch_cfg = cfg.get('batch', {})
+    with metrics.span('critique'):
+        fresh = critique_chunks_batch(
+            batch_provider,
+            cfg['models']['style_model'],
+            [chunks[i] for i in todo],
+            pathlib.Path(paths['out_dir']) / 'batch_requests.jsonl',
             temperature=cfg['params']['temperature'],
-            max_output_tokens=cfg['params']['max_output_tokens']
+            max_output_tokens=cfg['params']['max_output_tokens'],
+            poll_interval=batch_cfg.get('poll_interval_s', 30),
+            timeout=batch_cfg.get('timeout_s'),
+            resume=resume,
         )
-        outputs.append({'id': i, 'text': ch, 'kfa': out})
+    record = _finished(journal, None, todo)
+    for out in fresh:
+        record(out)
+    return _finish_run(metrics, cfg, input_path, paths, journal, base, chunks, reused, todo, fresh)
+
+def stream_run(input_path: str, cfg: dict, provider=None, run_id=None, resume=False):
+    # Same pipeline as run(), as a generator of progress events for live UIs:
+    #   {'event': 'chunks', 'total': n}
+    #   {'event': 'chunk_start', 'id': i}
+    #   {'event': 'delta', 'id': i, 'text': str}
+    #   {'event': 'chunk_end', 'id': i, 'kfa': str, 'error': str | None}
+    #   {'event': 'done', 'run_id': str, 'md_path': str, 'csv_path': str | None, 'report_path': str | None}
+    # Chunks are reported in order; later chunks are critiqued concurrently in the background.
+    # The 'critique' span includes the time the consumer takes between events.
+    paths, journal = _run_paths(cfg, input_path, run_id, resume)
+    metrics = _metrics(cfg, paths, input=str(input_path))
+    with metrics.span('read'):
+        text, cues = _read(input_path, cfg)
+
+    base = provider or make_provider(cfg)
+    provider = metrics.instrument(base)
+
+    sm_md = None
+    if cfg['chunking']['strategy'] == 'scene_map':
+        with metrics.span('scene_map'):
+            sm_md = build_scene_map(provider, cfg['models']['global_model'], text, **_scene_map_opts(cfg))
+    with metrics.span('chunk'):
+        chunks = _split(text, cfg, sm_md, cues, metrics)
+    yield {'event': 'chunks', 'total': len(chunks)}
 
-    # Merge & export
-    md = merge_chunks(outputs)
-    export_markdown(md, 'out/keynote_kfa.md')
-    if cfg['io']['export_csv']:
-        export_csv(outputs, 'out/keynote_kfa_notes.csv')
+    with metrics.span('plan'):
+        reused, todo = _plan(chunks, cfg, input_path, journal, resume)
+        writer = _writer(cfg, paths, reused)
+    finished = _finished(journal, writer, todo)
+    fresh = []
+    emitted = 0
+
+    def flush_reused(upto):
+        nonlocal emitted
+        while emitted < upto:
+            out = reused[emitted]
+            yield {'event': 'chunk_start', 'id': emitted}
+            yield {'event': 'chunk_end', 'id': emitted, 'kfa': out['kfa'], 'error': None}
+            emitted += 1
+
+    started = set()
+    with metrics.span('critique'):
+        for j, delta, out in stream_critique_chunks(
+            provider,
+            cfg['models']['style_model'],
+            [chunks[i] for i in todo],
+            temperature=cfg['params']['temperature'],
+            max_output_tokens=cfg['params']['max_output_tokens'],
+            concurrency=cfg['params'].get('concurrency', 4),
+        ):
+            i = todo[j]
+            if i not in started:
+                yield from flush_reused(i)
+                started.add(i)
+                yield {'event': 'chunk_start', 'id': i}
+            if out is None:
+                yield {'event': 'delta', 'id': i, 'text': delta}
+            else:
+                fresh.append(out)
+                finished(out)
+                emitted = i + 1
+                yield {'event': 'chunk_end', 'id': i, 'kfa': out['kfa'], 'error': out.get('error')}
+        yield from flush_reused(len(chunks))
+
+    result = _finish_run(metrics, cfg, input_path, paths, journal, base, chunks, reused, todo, fresh, writer)
+    yield {'event': 'done', 'run_id': result['run_id'], 'md_path': result['md_path'],
+           'csv_path': result['csv_path'], 'report_path': result['report_path']}
 
 if __name__ == '__main__':
     ap = argparse.ArgumentParser()
-    ap.add_argument('--input', required=True, help='Path to keynote text/markdown/docx (as text)')
+    ap.add_argument('--input', nargs='+', default=[], help='Keynote file(s) (txt/md/docx/srt), directories or globs')
+    ap.add_argument('--manifest', help='Text file listing inputs, one path/directory/glob per line')
     ap.add_argument('--config', default='config.yaml')
+    ap.add_argument('--concurrency', type=int, help='Max chunk critiques in flight (overrides params.concurrency)')
+    ap.add_argument('--no-cache', action='store_true', help='Ignore cached responses (fresh results are still stored)')
+    ap.add_argument('--incremental', action='store_true', help='Only re-critique chunks that changed since the last run')
+    ap.add_argument('--run-id', help='Name of the output directory under out/runs/ (default: timestamped)')
+    ap.add_argument('--batch', action='store_true', help='Submit all chunk critiques through the provider batch API and wait')
+    ap.add_argument('--provider', choices=['openai', 'mock'], help='Provider backend (overrides provider:)')
+    ap.add_argument('--replay', choices=['record', 'replay', 'auto'], help='Record responses to, or replay them from, replay.dir fixtures')
+    ap.add_argument('--speaker', help='Speaker recorded with this run in the tag analytics index')
+    ap.add_argument('--event', help='Event recorded with this run in the tag analytics index')
+    ap.add_argument('--resume', action='store_true',
+                    help='Skip chunks already finished by an interrupted run (--run-id, or the newest unfinished run)')
     args = ap.parse_args()
     cfg = load_config(args.config)
-    run(args.input, cfg)
+    if args.incremental:
+        cfg['chunking']['incremental'] = True
+    if args.no_cache:
+        cfg['cache']['bypass'] = True
+    if args.concurrency:
+        cfg['params']['concurrency'] = args.concurrency
+    if args.provider:
+        cfg['provider'] = args.provider
+    if args.replay:
+        cfg['replay']['mode'] = args.replay
+    if args.speaker:
+        cfg['analytics']['speaker'] = args.speaker
+    if args.event:
+        cfg['analytics']['event'] = args.event
+    from .scheduler import expand_inputs, run_many
+    if not args.input and not args.manifest:
+        ap.error('--input or --manifest is required')
+    inputs = expand_inputs(args.input, args.manifest)
+    single = len(inputs) == 1 and not args.manifest and pathlib.Path(args.input[0]).is_file()
+    if args.batch:
+        if not single:
+            ap.error('--batch takes a single input file')
+        result = run_batch(inputs[0], cfg, run_id=args.run_id, resume=args.resume)
+    elif single:
+        result = run(inputs[0], cfg, run_id=args.run_id, resume=args.resume)
+    else:
+        if args.resume and not args.run_id:
+            ap.error('--resume with several inputs needs the --run-id of the interrupted run')
+        summary = run_many(inputs, cfg, run_id=args.run_id, resume=args.resume)
+        failed = [d['input'] for d in summary['documents'] if d['error']]
+        print(f"Processed {len(inputs)} documents into {summary['out_dir']} (index.md)"
+              + (f"; {len(failed)} failed: {failed}" if failed else ""))
+        raise SystemExit(1 if failed else 0)
+    print(f"Wrote {result['md_path']}" + (f" and {result['csv_path']}" if result['csv_path'] else ""))
+    report = result['report']
+    calls = report['calls']
+    print(f"Took {report['wall_s']:.1f}s: " + ", ".join(f"{k} {v:.1f}s" for k, v in report['stages'].items())
+          + f"; {calls['count']} calls, {calls['input_tokens']} in / {calls['output_tokens']} out tokens"
+          + (f" ({result['report_path']})" if result['report_path'] else ""))
@@ -18,8 +18,16 @@ def load_config(path: str = 'config.yaml'):
     cfg['models'].setdefault('global_model', 'gpt-4')
     cfg['models'].setdefault('style_model', 'gpt-4o-mini')
     # Defaults
-    cfg.setdefault('params', {'temperature': 0.2, 'max_output_tokens': 1500})
-    cfg.setdefault('chunking', {'strategy': 'tokens','chunk_tokens':2000,'overlap_tokens':200,'prefer_sentence_boundary':True})
-    cfg.setdefault('io', {'input_format':'auto','export_md':True,'export_docx':False,'export_csv':True})
+    cfg.setdefault('params', {'temperature': 0.2, 'max_output_tokens': 1500, 'concurrency': 4})
+    cfg.setdefault('chunking', {'strategy': 'tokens','chunk_tokens':2000,'overlap_tokens':200,'prefer_sentence_boundary':True,'incremental':False,'tokenizer':'auto','scene_window_tokens':6000,'window_minutes':5,'auto':{'objective':'time','min_chunk_tokens':800,'max_chunk_tokens':4000,'overlap_ratio':0.1,'min_overlap_tokens':50,'input_cost':1.0,'output_cost':4.0,'learn':True,'profile':None}})
+    cfg.setdefault('io', {'input_format':'auto','export_md':True,'export_docx':False,'export_csv':True,'export_records':True,'out_dir':'out','keep_runs':20,'max_run_age_days':7})
     cfg.setdefault('provider', 'openai')
+    cfg.setdefault('mock', {'latency': 0.0, 'jitter': 0.0, 'per_token': 0.0, 'error_rate': 0.0, 'throttle_rate': 0.0, 'seed': 0})
+    cfg.setdefault('replay', {'mode': None, 'dir': 'fixtures'})
+    cfg.setdefault('cache', {'enabled': True, 'dir': '.kfa_cache', 'max_mb': 500, 'max_age_days': 30})
+    cfg.setdefault('jobs', {'workers': 2})
+    cfg.setdefault('rate_limit', {'enabled': True, 'rpm': None, 'tpm': None, 'max_retries': 6, 'min_concurrency': 1, 'target_latency_s': None})
+    cfg.setdefault('batch', {'poll_interval_s': 30, 'timeout_s': None})
+    cfg.setdefault('metrics', {'report': True, 'prometheus': False})
+    cfg.setdefault('analytics', {'enabled': True, 'path': None, 'speaker': None, 'event': None, 'document': None})
     return cfg
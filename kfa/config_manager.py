@@ -116,17 +116,22 @@ def create_config_sidebar(config_manager: ConfigManager) -> Dict[str, Any]:
     # Processing strategy
     strategy = st.selectbox(
         "Processing Strategy",
-        options=["tokens", "scene_map"],
-        index=0 if current_values.get("strategy") == "tokens" else 1,
+        options=["tokens", "auto", "scene_map", "time"],
+        index=["tokens", "auto", "scene_map", "time"].index(current_values.get("strategy", "tokens"))
+        if current_values.get("strategy") in ("tokens", "auto", "scene_map", "time") else 0,
         format_func=lambda x: {
             "tokens": "Token-based Chunking (Recommended)",
-            "scene_map": "Scene Map Analysis (Advanced)"
+            "auto": "Auto-sized Chunks (from measured latency)",
+            "scene_map": "Scene Map Analysis (Advanced)",
+            "time": "Time Windows (SRT subtitles)"
         }[x],
         help="Choose how to split your content for analysis"
     )
     
     # Advanced settings
     with st.expander("Advanced Settings"):
+        if strategy == "auto":
+            st.caption("Auto: chunk size and overlap are picked per document; the sliders below are ignored.")
         chunk_tokens = st.slider(
             "Chunk Size (tokens)", 
             500, 4000, 
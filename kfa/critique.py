@@ -1,9 +1,123 @@
+import asyncio, queue, threading
+from concurrent.futures import ThreadPoolExecutor
 from .prompts import SYSTEM, CRITIQUE_USER
+from .telemetry import labelled
 
-def critique_chunk(provider, model, snippet: str, temperature=0.2, max_output_tokens=1500):
-    msg = [
+def critique_messages(snippet):
+    # `snippet` is chunk text: a str or a kfa.chunking.Chunk
+    return [
         {"role":"system","content": SYSTEM},
-        {"role":"user","content": CRITIQUE_USER.format(snippet=snippet)},
+        {"role":"user","content": CRITIQUE_USER.format(snippet=str(snippet))},
     ]
+
+def critique_chunk(provider, model, snippet: str, temperature=0.2, max_output_tokens=1500):
+    msg = critique_messages(snippet)
     out = provider.respond(msg, model=model, temperature=temperature, max_output_tokens=max_output_tokens)
     return out
+
+def stream_critique_chunk(provider, model, snippet: str, temperature=0.2, max_output_tokens=1500):
+    # Yields text deltas as the provider produces them
+    msg = critique_messages(snippet)
+    yield from provider.stream(msg, model=model, temperature=temperature, max_output_tokens=max_output_tokens)
+
+async def acritique_chunk(provider, model, snippet: str, temperature=0.2, max_output_tokens=1500):
+    msg = critique_messages(snippet)
+    return await provider.arespond(msg, model=model, temperature=temperature, max_output_tokens=max_output_tokens)
+
+def critique_output(provider, model, i, snippet: str, temperature=0.2, max_output_tokens=1500):
+    # One chunk as an output record; failures become an 'error' record instead of raising
+    try:
+        with labelled(chunk=i):
+            out = critique_chunk(provider, model, snippet, temperature=temperature, max_output_tokens=max_output_tokens)
+        return {'id': i, 'text': snippet, 'kfa': out}
+    except Exception as e:
+        return {'id': i, 'text': snippet, 'kfa': f"[ERROR]: {e}", 'error': str(e)}
+
+def critique_chunks(provider, model, chunks, temperature=0.2, max_output_tokens=1500, concurrency=4, on_progress=None, on_output=None):
+    # Runs up to `concurrency` critiques in flight; results come back in chunk order.
+    # A failed chunk is recorded with an 'error' key instead of aborting the whole run.
+    # on_progress(finished_count) and on_output(output), if given, are called from worker
+    # threads as chunks complete (on_output is how kfa.checkpoint journals them).
+    lock = threading.Lock()
+    finished = 0
+
+    def one(item):
+        nonlocal finished
+        i, ch = item
+        result = critique_output(provider, model, i, ch, temperature=temperature, max_output_tokens=max_output_tokens)
+        if on_output:
+            on_output(result)
+        if on_progress:
+            with lock:
+                finished += 1
+                on_progress(finished)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency))) as pool:
+        return list(pool.map(one, enumerate(chunks)))
+
+async def acritique_chunks(provider, model, chunks, temperature=0.2, max_output_tokens=1500, concurrency=4, on_output=None):
+    # Async twin of critique_chunks: a semaphore bounds in-flight calls on the running loop.
+    # on_output does blocking file work (journal fsync, report flush), so it runs in a thread.
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def one(i, ch):
+        async with sem:
+            try:
+                with labelled(chunk=i):
+                    out = await acritique_chunk(provider, model, ch, temperature=temperature, max_output_tokens=max_output_tokens)
+                result = {'id': i, 'text': ch, 'kfa': out}
+            except Exception as e:
+                result = {'id': i, 'text': ch, 'kfa': f"[ERROR]: {e}", 'error': str(e)}
+        if on_output:
+            await asyncio.to_thread(on_output, result)
+        return result
+
+    return list(await asyncio.gather(*(one(i, ch) for i, ch in enumerate(chunks))))
+
+_DONE = object()
+
+def stream_critique_chunks(provider, model, chunks, temperature=0.2, max_output_tokens=1500, concurrency=4):
+    # Streams critiques as (index, delta, output) events in chunk order: the earliest
+    # unfinished chunk streams live while at most `concurrency` - 1 later ones run ahead
+    # and buffer their deltas (a chunk is submitted only when the one `concurrency` places
+    # before it has been consumed). `output` is None for deltas and the final dict when a
+    # chunk ends. If the consumer stops early (closes the generator), running chunks stop
+    # at their next delta and no more are started.
+    queues = [queue.Queue() for _ in chunks]
+    stop = threading.Event()
+
+    def one(i, ch):
+        q = queues[i]
+        parts = []
+        try:
+            with labelled(chunk=i):
+                for delta in stream_critique_chunk(provider, model, ch, temperature=temperature, max_output_tokens=max_output_tokens):
+                    if stop.is_set():
+                        return
+                    parts.append(delta)
+                    q.put(delta)
+            q.put({'id': i, 'text': ch, 'kfa': "".join(parts)})
+        except Exception as e:
+            q.put({'id': i, 'text': ch, 'kfa': f"[ERROR]: {e}", 'error': str(e)})
+        q.put(_DONE)
+
+    ahead = max(1, int(concurrency))
+    pool = ThreadPoolExecutor(max_workers=ahead)
+    try:
+        for i in range(min(ahead, len(chunks))):
+            pool.submit(one, i, chunks[i])
+        for i, q in enumerate(queues):
+            while True:
+                item = q.get()
+                if item is _DONE:
+                    if i + ahead < len(chunks):
+                        pool.submit(one, i + ahead, chunks[i + ahead])
+                    break
+                if isinstance(item, dict):
+                    yield i, None, item
+                else:
+                    yield i, item, None
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -1,21 +1,89 @@
-import csv, pathlib
+import csv, json, pathlib, threading
+from typing import Dict, Optional
+from .merge import REPORT_HEADER, render_chunk
+from .parse import attach_critiques, critique_of
+from .timing import time_span
 
-def export_markdown(md_text: str, path: str):
+CSV_HEADER = ['chunk_id','tags','diagnosis_1line','start_s','end_s']
+
+def _open(path):
     p = pathlib.Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(md_text, encoding='utf-8')
+    return p.open('w', newline='', encoding='utf-8')
+
+def csv_row(o):
+    c = critique_of(o)
+    span = time_span(o['text']) or ('', '')
+    return [o['id'], ';'.join(c.tags), c.summary(), *span]
+
+def record_line(o):
+    # One JSON object per chunk with the parsed critique, for tools that shouldn't re-parse markdown
+    span = time_span(o['text']) or (None, None)
+    rec = {'chunk_id': o['id'], 'start_s': span[0], 'end_s': span[1], **critique_of(o)._asdict(), 'error': o.get('error')}
+    return json.dumps(rec, ensure_ascii=False) + '\n'
+
+def export_markdown(md_text: str, path: str):
+    with _open(path) as f:
+        f.write(md_text)
 
 def export_csv(outputs, path: str):
-    p = pathlib.Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open('w', newline='', encoding='utf-8') as f:
+    with _open(path) as f:
         w = csv.writer(f)
-        w.writerow(['chunk_id','tags','diagnosis_1line'])
+        w.writerow(CSV_HEADER)
         for o in outputs:
-            # naive extraction: first line of [DIAGNOSIS]
-            diag_line = ''
-            for line in o['kfa'].splitlines():
-                if line.strip().startswith('[DIAGNOSIS]'):
-                    diag_line = line.strip()
-                    break
-            w.writerow([o['id'], '', diag_line])
+            w.writerow(csv_row(o))
+
+def export_records(outputs, path: str):
+    with _open(path) as f:
+        for o in outputs:
+            f.write(record_line(o))
+
+class ReportWriter:
+    """Writes the report, CSV and records files chunk by chunk as outputs complete.
+
+    Outputs may arrive in any order (from worker threads); they are held only until
+    every earlier chunk has arrived, then written and flushed in chunk order, so
+    memory is bounded by how far completions run ahead, not by report length.
+    """
+
+    def __init__(self, md_path: str, csv_path: Optional[str] = None, records_path: Optional[str] = None):
+        self._md = _open(md_path)
+        self._md.write(REPORT_HEADER)
+        self._csv_file = _open(csv_path) if csv_path else None
+        self._csv = csv.writer(self._csv_file) if csv_path else None
+        if self._csv:
+            self._csv.writerow(CSV_HEADER)
+        self._records = _open(records_path) if records_path else None
+        self._pending: Dict[int, Dict] = {}
+        self._next = 0
+        self._prev = None  # last written output; render_chunk drops what it overlaps
+        self._lock = threading.Lock()
+
+    def add(self, output: Dict) -> None:
+        attach_critiques([output])  # parsed once here, shared by every file
+        with self._lock:
+            self._pending[output['id']] = output
+            while self._next in self._pending:
+                self._write(self._pending.pop(self._next))
+                self._next += 1
+
+    def _write(self, o: Dict) -> None:
+        self._md.write(render_chunk(o, self._prev))
+        self._prev = o
+        if self._csv:
+            self._csv.writerow(csv_row(o))
+        if self._records:
+            self._records.write(record_line(o))
+        for f in (self._md, self._csv_file, self._records):
+            if f:
+                f.flush()
+
+    def close(self) -> int:
+        """Close the files and return how many chunks were written"""
+        with self._lock:
+            for f in (self._md, self._csv_file, self._records):
+                if f:
+                    f.close()
+            if self._pending:
+                raise ValueError(f'Chunk {self._next} never arrived; {len(self._pending)} later chunks unwritten')
+            return self._next
@@ -0,0 +1,22 @@
+"""
+Small file helpers shared by the cache, fixtures, reports, profiles and SQLite stores
+"""
+import os, pathlib, sqlite3, threading
+
+
+def atomic_write(path, text: str) -> None:
+    """Write `text` to `path` through a temp file and a rename, so readers (and
+    concurrent writers from other threads or processes) never see a partial file"""
+    p = pathlib.Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f'{p.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, p)
+
+
+def connect_sqlite(path) -> sqlite3.Connection:
+    """A fresh connection with dict-like rows. Stores open one per call so worker
+    threads can share them, and wait up to 30 s on another writer's lock"""
+    db = sqlite3.connect(str(path), timeout=30)
+    db.row_factory = sqlite3.Row
+    return db
@@ -0,0 +1,62 @@
+"""
+Chunk fingerprints from the previous run, so edit-and-rerun only critiques what changed
+"""
+import hashlib, json, pathlib
+from typing import Dict, List, Tuple
+from .chunking import Chunk
+from .files import atomic_write
+
+
+def fingerprint(text) -> str:
+    # A Chunk carries (and caches) the same hash of its text
+    if isinstance(text, Chunk):
+        return text.hash
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def manifest_path(out_dir: str, input_path: str) -> pathlib.Path:
+    """One manifest per input document, shared by all runs: out/manifests/<stem>-<hash>.json"""
+    src = pathlib.Path(input_path)
+    tag = hashlib.sha1(str(src.resolve()).encode('utf-8')).hexdigest()[:8]
+    return pathlib.Path(out_dir) / 'manifests' / f'{src.stem}-{tag}.json'
+
+
+def load_manifest(path, settings: Dict) -> Dict[str, str]:
+    """Fingerprint -> kfa output from the previous run; empty if missing or made with other settings"""
+    p = pathlib.Path(path)
+    if not p.exists():
+        return {}
+    try:
+        data = json.loads(p.read_text(encoding='utf-8'))
+    except ValueError:
+        return {}
+    if data.get('settings') != settings:
+        return {}
+    return data.get('chunks', {})
+
+
+def save_manifest(path, outputs: List[Dict], settings: Dict) -> None:
+    # Failed chunks are left out so the next run retries them
+    chunks = {fingerprint(o['text']): o['kfa'] for o in outputs if 'error' not in o}
+    atomic_write(path, json.dumps({'settings': settings, 'chunks': chunks}, ensure_ascii=False))
+
+
+def plan(chunks: List[str], previous: Dict[str, str]) -> Tuple[Dict[int, Dict], List[int]]:
+    """Split chunks into reusable outputs (by index) and the indices that need a fresh critique"""
+    reused, todo = {}, []
+    for i, ch in enumerate(chunks):
+        prior = previous.get(fingerprint(ch))
+        if prior is None:
+            todo.append(i)
+        else:
+            reused[i] = {'id': i, 'text': ch, 'kfa': prior}
+    return reused, todo
+
+
+def assemble(chunks: List[str], reused: Dict[int, Dict], todo: List[int], fresh: List[Dict]) -> List[Dict]:
+    """Put reused and freshly critiqued outputs back in chunk order"""
+    outputs = dict(reused)
+    for i, out in zip(todo, fresh):
+        out['id'] = i
+        outputs[i] = out
+    return [outputs[i] for i in range(len(chunks))]
@@ -0,0 +1,127 @@
+"""
+Background analysis jobs backed by a local SQLite store
+"""
+import os, pathlib, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from .files import connect_sqlite
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    input_path TEXT,
+    strategy TEXT,
+    done INTEGER DEFAULT 0,
+    total INTEGER DEFAULT 0,
+    md_path TEXT,
+    csv_path TEXT,
+    error TEXT,
+    created REAL,
+    updated REAL,
+    owner INTEGER
+)
+"""
+
+_FIELDS = ('status', 'done', 'total', 'md_path', 'csv_path', 'error')
+
+
+class JobStore:
+    """Job rows in SQLite; each call opens its own connection so worker threads can share it"""
+
+    def __init__(self, path='out/jobs.sqlite3'):
+        self.path = str(path)
+        pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with connect_sqlite(self.path) as db:
+            db.execute(_SCHEMA)
+            if 'owner' not in {row['name'] for row in db.execute("PRAGMA table_info(jobs)")}:
+                db.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")  # stores made before owners
+
+    def create(self, input_path: str, strategy: str, owner: Optional[int] = None) -> str:
+        # `owner` is the pid of the process that runs the job (default: this one)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with connect_sqlite(self.path) as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, input_path, strategy, created, updated, owner) VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, input_path, strategy, now, now, owner or os.getpid()),
+            )
+        return job_id
+
+    def update(self, job_id: str, **fields) -> None:
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f'Unknown job fields: {sorted(unknown)}')
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with connect_sqlite(self.path) as db:
+            db.execute(f"UPDATE jobs SET {cols}, updated = ? WHERE id = ?", (*fields.values(), time.time(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with connect_sqlite(self.path) as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def fail_unfinished(self, reason='interrupted by restart') -> int:
+        """Mark jobs left queued/running by a process that has since exited as failed.
+
+        Jobs of live processes (sibling server workers sharing the store) are left alone.
+        """
+        with connect_sqlite(self.path) as db:
+            rows = db.execute("SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+            orphans = [r['id'] for r in rows if not _alive(r['owner'])]
+            for job_id in orphans:
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE id = ? AND status IN ('queued', 'running')",
+                    (reason, time.time(), job_id),
+                )
+            return len(orphans)
+
+
+def _alive(pid: Optional[int]) -> bool:
+    # The store is a local file, so owners are processes on this machine
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # e.g. PermissionError: alive, owned by another user
+    return True
+
+
+class JobQueue:
+    """Runs analyses on a worker pool and records status/progress in a JobStore"""
+
+    def __init__(self, store: JobStore, runner: Callable, workers: int = 2):
+        self.store = store
+        self.runner = runner
+        self.pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix='kfa-job')
+        store.fail_unfinished()
+
+    def submit(self, input_path: str, cfg: dict, cleanup: bool = True) -> str:
+        """Queue an analysis and return its job id immediately"""
+        job_id = self.store.create(input_path, cfg['chunking']['strategy'])
+        self.pool.submit(self._work, job_id, input_path, cfg, cleanup)
+        return job_id
+
+    def _work(self, job_id: str, input_path: str, cfg: dict, cleanup: bool):
+        self.store.update(job_id, status='running')
+
+        def progress(done, total):
+            self.store.update(job_id, done=done, total=total)
+
+        try:
+            result = self.runner(input_path, cfg, on_progress=progress, run_id=job_id)
+            self.store.update(job_id, status='done', md_path=result['md_path'], csv_path=result['csv_path'])
+        except Exception as e:
+            self.store.update(job_id, status='failed', error=str(e))
+        finally:
+            if cleanup:
+                try:
+                    os.unlink(input_path)
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
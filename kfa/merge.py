@@ -1,11 +1,68 @@
 import re
-from typing import List, Dict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, Iterator, List, Optional
+from .chunking import naive_sentence_split, overlap_of
+from .parse import critique_of
+from .timing import format_timestamp, time_span
 
-def merge_chunks(outputs: List[Dict]):
-    # Very simple merge: concatenate with section headers; a real version would dedupe tags and craft bridges
-    lines = ["# Keynote KFA Report\n"]
+REPORT_HEADER = "# Keynote KFA Report\n"
+_WORDS = re.compile(r"\w+")
+SAME_SENTENCE = 0.85  # similarity above which two rewrite sentences count as one
+
+def _norm(sentence: str) -> str:
+    return " ".join(_WORDS.findall(sentence.lower()))
+
+def _same(a: str, b: str) -> bool:
+    a, b = _norm(a), _norm(b)
+    return bool(a) and (a == b or SequenceMatcher(None, a, b, autojunk=False).ratio() >= SAME_SENTENCE)
+
+def reconcile_rewrite(rewrite: str, prev_rewrite: str, overlap_sentences: int) -> str:
+    # Overlapping chunks tend to rewrite their shared sentences twice: the end of the
+    # previous rewrite and the start of this one. Drops the leading sentences of `rewrite`
+    # that repeat one of the last few sentences of `prev_rewrite`.
+    if not rewrite or not prev_rewrite or overlap_sentences <= 0:
+        return rewrite
+    sents = [s for s in naive_sentence_split(rewrite.strip()) if s]
+    tail = [s for s in naive_sentence_split(prev_rewrite.strip()) if s][-(overlap_sentences + 2):]
+    k = 0
+    while k < min(len(sents), overlap_sentences + 1) and any(_same(sents[k], t) for t in tail):
+        k += 1
+    if not k:
+        return rewrite
+    rest = " ".join(sents[k:])
+    return "… " + rest if rest else "… (as in the previous scene)"
+
+def render_chunk(item: Dict, prev: Optional[Dict] = None) -> str:
+    # One scene section of the report, with its media time span when the chunk has one.
+    # When the chunk opens with text of the previous chunk (`prev`), that text is not
+    # quoted again and the rewrite drops sentences the previous rewrite already covered.
+    chunk = item['text']
+    text = str(chunk)
+    span = time_span(chunk)
+    when = f" [{format_timestamp(span[0])}–{format_timestamp(span[1])}]" if span else ""
+    overlap = overlap_of(chunk) if prev is not None else 0
+    quote = text[overlap:].lstrip() if overlap else text
+    if quote is not text:
+        quote = "… " + quote if quote else "…"
+    parts = [f"\n## Scene {item['id']}{when}\n", "> " + quote.replace("\n", "\n> ") + "\n\n"]
+    c = critique_of(item)
+    if c.tags:
+        parts.append("**Tags:** " + " ".join(f"`{t}`" for t in c.tags) + "\n\n")
+    kfa = item['kfa']
+    if overlap and c.rewrite and c.rewrite in kfa:
+        rewrite = reconcile_rewrite(c.rewrite, critique_of(prev).rewrite, len(naive_sentence_split(text[:overlap].strip())))
+        kfa = kfa.replace(c.rewrite, rewrite, 1)
+    parts.append(kfa + "\n")
+    return "".join(parts)
+
+def iter_merge(outputs: Iterable[Dict]) -> Iterator[str]:
+    # The report piece by piece, so it can be written out without holding it whole
+    yield REPORT_HEADER
+    prev = None
     for item in outputs:
-        lines.append(f"\n## Scene {item['id']}\n")
-        lines.append("> " + item['text'].replace("\n", "\n> ") + "\n\n")
-        lines.append(item['kfa'] + "\n")
-    return "".join(lines)
+        yield render_chunk(item, prev)
+        prev = item
+
+def merge_chunks(outputs: List[Dict]):
+    # Concatenated scene sections; overlapping text is quoted and rewritten once
+    return "".join(iter_merge(outputs))
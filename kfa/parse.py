@@ -0,0 +1,53 @@
+"""
+Critique text -> typed record, parsed once per chunk and shared by every exporter
+"""
+import re
+from typing import Dict, List, NamedTuple, Tuple
+from .tags import TAGS
+
+TAG_SET = frozenset(TAGS)
+
+# Section markers at line start, tolerating markdown decoration: "**[DIAGNOSIS]**:", "- [REWRITE]"
+_SECTION = re.compile(r'^[ \t>*#_-]*\[(DIAGNOSIS|REWRITE|RATIONALE)\][*_]*[ \t]*:?[ \t]*', re.M)
+_TAG_WORD = re.compile(r'\b[A-Z][A-Z_]{2,}\b')
+
+
+class Critique(NamedTuple):
+    tags: Tuple[str, ...]     # canonical tags named in the diagnosis, in order, deduplicated
+    diagnosis: str
+    rewrite: str
+    rationale: str
+    unknown_tags: Tuple[str, ...] = ()  # tag-like words that are not in TAGS
+
+    def summary(self) -> str:
+        """First line of the diagnosis"""
+        return self.diagnosis.split('\n', 1)[0].strip()
+
+
+def parse_critique(text: str) -> Critique:
+    # One regex pass finds the section markers; each body runs to the next marker.
+    # Text with no markers (e.g. an error record) parses to an empty critique.
+    sections = {}
+    marks = list(_SECTION.finditer(text))
+    for m, nxt in zip(marks, marks[1:] + [None]):
+        body = text[m.end():nxt.start() if nxt else len(text)].strip()
+        sections.setdefault(m.group(1), body)
+    diagnosis = sections.get('DIAGNOSIS', '')
+    tags, unknown = [], []
+    for word in _TAG_WORD.findall(diagnosis):
+        bucket = tags if word in TAG_SET else unknown
+        if word not in bucket:
+            bucket.append(word)
+    return Critique(tuple(tags), diagnosis, sections.get('REWRITE', ''), sections.get('RATIONALE', ''), tuple(unknown))
+
+
+def attach_critiques(outputs: List[Dict]) -> List[Dict]:
+    """Parse each output's kfa text into output['critique'] unless already done"""
+    for o in outputs:
+        if 'critique' not in o:
+            o['critique'] = parse_critique('' if 'error' in o else o['kfa'])
+    return outputs
+
+
+def critique_of(o: Dict) -> Critique:
+    return o['critique'] if 'critique' in o else parse_critique('' if 'error' in o else o['kfa'])
@@ -6,11 +6,16 @@ Use only the canonical TAGS. Output exactly:
 
 SCENEMAP_USER = """Create a scene map from the keynote text.
 Return markdown with these sections:
-- [SCENES]: ordered list; each scene 1–2 lines with stakes/surprises.
+- [SCENES]: ordered list; each scene starts with its first 6–10 words quoted verbatim from the text, then 1–2 lines with stakes/surprises.
 - [BRIDGES]: suggested transitions between scenes.
 - [HEAVY_BEATS]: lines requiring slower tone.
 - [SLIDE_CUES]: speak→reveal, blank between beats."""
 
+SCENEMAP_SEAM_USER = """Below are the closing scenes of one part of a keynote and the opening scenes of the next part.
+Return markdown with two sections:
+- [BRIDGES]: 1–2 suggested transitions across the boundary between the parts.
+- [SAME_SCENE]: yes if the first scene of the second part continues the last scene of the first part, otherwise no."""
+
 CRITIQUE_USER = """[OPERATION]: Diagnose & rewrite
 [SNIPPET]:
 {snippet}
@@ -1,7 +1,34 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 class BaseProvider(ABC):
     @abstractmethod
     def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
         ...
+
+    async def arespond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        # Default: run the blocking call on a worker thread so the event loop stays free.
+        # Providers with a native async client should override this.
+        return await asyncio.to_thread(self.respond, messages, model, **kwargs)
+
+    def stream(self, messages: List[Dict[str, str]], model: str, **kwargs) -> Iterator[str]:
+        # Default: a single delta holding the whole response.
+        # Providers that can stream tokens should override this.
+        yield self.respond(messages, model, **kwargs)
+
+class BaseBatchProvider(ABC):
+    # Offline batch interface. A batch file is JSONL, one request per line:
+    #   {"custom_id": str, "method": "POST", "url": "/v1/responses",
+    #    "body": {"model": str, "input": [messages], "temperature": float, "max_output_tokens": int}}
+    @abstractmethod
+    def submit(self, requests_path: str) -> str:
+        """Upload a batch file and return its batch id"""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """One of 'running', 'completed' or 'failed'"""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        """custom_id -> {'text': str} or {'error': str} for a completed batch"""
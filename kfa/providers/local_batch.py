@@ -0,0 +1,49 @@
+import json, threading, uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+from .base import BaseProvider, BaseBatchProvider
+
+class LocalBatchProvider(BaseBatchProvider):
+    # Executes batch files in-process against any BaseProvider. Used in tests and for
+    # dry runs of batch mode; results are held in memory for the life of the object.
+    def __init__(self, provider: BaseProvider, workers: int = 4):
+        self.provider = provider
+        self.workers = workers
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def submit(self, requests_path: str) -> str:
+        with open(requests_path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        batch_id = "local-" + uuid.uuid4().hex[:12]
+        with self._lock:
+            self._batches[batch_id] = {"status": "running", "results": {}}
+        threading.Thread(target=self._execute, args=(batch_id, rows), daemon=True).start()
+        return batch_id
+
+    def _one(self, row):
+        body = row["body"]
+        try:
+            text = self.provider.respond(
+                body["input"],
+                model=body["model"],
+                temperature=body.get("temperature", 0.2),
+                max_output_tokens=body.get("max_output_tokens", 1500),
+            )
+            return row["custom_id"], {"text": text}
+        except Exception as e:
+            return row["custom_id"], {"error": str(e)}
+
+    def _execute(self, batch_id, rows):
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            results = dict(pool.map(self._one, rows))
+        with self._lock:
+            self._batches[batch_id] = {"status": "completed", "results": results}
+
+    def status(self, batch_id: str) -> str:
+        with self._lock:
+            return self._batches[batch_id]["status"]
+
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._batches[batch_id]["results"])
@@ -0,0 +1,106 @@
+import asyncio, hashlib, random, re, threading, time
+from typing import Dict, Iterator, List
+from .base import BaseProvider
+from ..prompts import SCENEMAP_USER, SCENEMAP_SEAM_USER
+from ..tags import TAGS
+from ..telemetry import note_usage
+from ..tokens import estimate_tokens
+
+
+class MockError(Exception):
+    """Simulated provider failure; status_code makes kfa.ratelimit treat it like an API error"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class MockProvider(BaseProvider):
+    # Offline provider for tests and benchmarks. Responses are a pure function of the
+    # request (same messages -> same text), in the formats the pipeline parses: a
+    # tagged critique, or a scene map quoting the text it was given. Each call sleeps
+    #   latency + uniform(0, jitter) + per_token * (prompt tokens + response tokens)
+    # seconds, and fails with probability error_rate (HTTP 500) or throttle_rate (429).
+    # Failures and jitter come from one RNG seeded with `seed`.
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, per_token: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 0,
+                 scenes_per_call: int = 4):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_token = per_token
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.scenes_per_call = scenes_per_call
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _plan(self, messages, text):
+        # (delay, error) for one call
+        with self._lock:
+            self.calls += 1
+            roll = self._rng.random()
+            jitter = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            error = None
+            if roll < self.throttle_rate:
+                error = MockError('mock rate limit', 429)
+            elif roll < self.throttle_rate + self.error_rate:
+                error = MockError('mock server error', 500)
+            if error:
+                self.failures += 1
+        prompt = sum(estimate_tokens(m['content']) for m in messages)
+        note_usage(prompt, 0 if error else estimate_tokens(text))
+        return self.latency + jitter + self.per_token * (prompt + estimate_tokens(text)), error
+
+    def reply(self, messages: List[Dict[str, str]]) -> str:
+        """The deterministic response text for a request"""
+        body = messages[-1]['content']
+        if body.startswith(SCENEMAP_SEAM_USER):
+            return "[BRIDGES]\n- Carry the last beat forward\n[SAME_SCENE]: no"
+        if body.startswith(SCENEMAP_USER):
+            return self._scene_map(body[len(SCENEMAP_USER):])
+        digest = hashlib.sha256(body.encode('utf-8')).digest()
+        tags = [TAGS[b % len(TAGS)] for b in digest[:3]]
+        snippet = re.search(r'\[SNIPPET\]:\n(.*?)\n\n\[CONTEXT\]', body, re.S)
+        words = (snippet.group(1) if snippet else body).split()
+        return (f"[DIAGNOSIS]: {', '.join(dict.fromkeys(tags))} — {' '.join(words[-8:])}\n"
+                f"[REWRITE]: {' '.join(words[-30:])}\n"
+                f"[RATIONALE]: Mock critique {digest.hex()[:8]}.")
+
+    def _scene_map(self, text: str) -> str:
+        sents = [s for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s.split()]
+        step = max(1, len(sents) // max(1, self.scenes_per_call))
+        scenes = [f'- "{" ".join(sents[k].split()[:8])}" scene {k // step + 1}' for k in range(0, len(sents), step)]
+        return "[SCENES]\n" + "\n".join(scenes) + "\n[BRIDGES]\n- Pause between scenes\n[HEAVY_BEATS]\n[SLIDE_CUES]"
+
+    def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        text = self.reply(messages)
+        delay, error = self._plan(messages, text)
+        if delay:
+            time.sleep(delay)
+        if error:
+            raise error
+        return text
+
+    async def arespond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        text = self.reply(messages)
+        delay, error = self._plan(messages, text)
+        if delay:
+            await asyncio.sleep(delay)
+        if error:
+            raise error
+        return text
+
+    def stream(self, messages: List[Dict[str, str]], model: str, **kwargs) -> Iterator[str]:
+        # The same text in a few deltas, with the delay spread across them
+        text = self.reply(messages)
+        delay, error = self._plan(messages, text)
+        if error:
+            time.sleep(delay)
+            raise error
+        pieces = re.findall(r'\S+\s*', text) or [text]
+        step = max(1, len(pieces) // 8)
+        for k in range(0, len(pieces), step):
+            time.sleep(delay * step / len(pieces))
+            yield "".join(pieces[k:k + step])
@@ -1,21 +1,122 @@
-import os
-from typing import List, Dict
-from .base import BaseProvider
+import os, json
+from typing import Any, List, Dict, Iterator
+from .base import BaseProvider, BaseBatchProvider
+from ..telemetry import note_usage
 
 # OpenAI Python SDK v1.x
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 class OpenAIProvider(BaseProvider):
-    def __init__(self):
-        # API key is read from env via the SDK
-        self.client = OpenAI()
+    def __init__(self, max_retries=None):
+        # API key is read from env via the SDK. Pass max_retries=0 when an outer
+        # layer (kfa.ratelimit) owns retries, so attempts are not multiplied.
+        self._client_kwargs = {} if max_retries is None else {'max_retries': max_retries}
+        self.client = OpenAI(**self._client_kwargs)
+        self._aclient = None  # AsyncOpenAI, created on first async call
 
-    def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+    @property
+    def aclient(self):
+        if self._aclient is None:
+            self._aclient = AsyncOpenAI(**self._client_kwargs)
+        return self._aclient
+
+    def _request(self, messages: List[Dict[str, str]], model: str, **kwargs) -> dict:
         # Use Responses API for consistency
-        resp = self.client.responses.create(
+        return dict(
             model=model,
             input=[{"role": m["role"], "content": m["content"]} for m in messages],
             temperature=kwargs.get("temperature", 0.2),
             max_output_tokens=kwargs.get("max_output_tokens", 1500),
         )
+
+    @staticmethod
+    def _note(resp):
+        usage = getattr(resp, 'usage', None)
+        note_usage(getattr(usage, 'input_tokens', None), getattr(usage, 'output_tokens', None))
+
+    def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        resp = self.client.responses.create(**self._request(messages, model, **kwargs))
+        self._note(resp)
+        return resp.output_text
+
+    async def arespond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        resp = await self.aclient.responses.create(**self._request(messages, model, **kwargs))
+        self._note(resp)
         return resp.output_text
+
+    def stream(self, messages: List[Dict[str, str]], model: str, **kwargs) -> Iterator[str]:
+        # A stream that fails or stops short raises once its deltas are out, so the
+        # partial text is not cached, journaled or saved as a finished critique
+        events = self.client.responses.create(stream=True, **self._request(messages, model, **kwargs))
+        for event in events:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+            elif event.type == "response.completed":
+                self._note(event.response)
+            elif event.type == "response.failed":
+                self._note(event.response)
+                error = getattr(event.response, "error", None)
+                raise StreamError(f"Response failed: {getattr(error, 'message', None) or 'no details'}")
+            elif event.type == "response.incomplete":
+                self._note(event.response)
+                details = getattr(event.response, "incomplete_details", None)
+                raise StreamError(f"Response incomplete: {getattr(details, 'reason', None) or 'no details'}")
+            elif event.type == "error":
+                raise StreamError(f"Stream error: {getattr(event, 'message', None) or getattr(event, 'code', None)}")
+
+
+class StreamError(RuntimeError):
+    """A streamed response that failed or ended incomplete"""
+
+
+def _output_text(body: dict) -> str:
+    # Raw Responses API JSON (as returned in batch output) -> concatenated output text
+    parts = []
+    for item in body.get("output", []):
+        if item.get("type") == "message":
+            for c in item.get("content", []):
+                if c.get("type") == "output_text":
+                    parts.append(c.get("text", ""))
+    return "".join(parts)
+
+class OpenAIBatchProvider(BaseBatchProvider):
+    _STATUS = {
+        "validating": "running", "in_progress": "running", "finalizing": "running",
+        "completed": "completed",
+        "failed": "failed", "expired": "failed", "cancelling": "failed", "cancelled": "failed",
+    }
+
+    def __init__(self, completion_window="24h"):
+        self.client = OpenAI()
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: str) -> str:
+        with open(requests_path, "rb") as f:
+            upload = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/responses",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self._STATUS.get(self.client.batches.retrieve(batch_id).status, "running")
+
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        out = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                resp = row.get("response") or {}
+                if row.get("error") or resp.get("status_code", 200) >= 400:
+                    err = row.get("error") or resp.get("body", {}).get("error") or resp
+                    out[row["custom_id"]] = {"error": json.dumps(err) if not isinstance(err, str) else err}
+                else:
+                    out[row["custom_id"]] = {"text": _output_text(resp.get("body", {}))}
+        return out
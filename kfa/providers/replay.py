@@ -0,0 +1,51 @@
+import json, pathlib, threading
+from typing import Dict, List, Optional
+from .base import BaseProvider
+from ..cache import cache_key
+from ..files import atomic_write
+
+MODES = ('record', 'replay', 'auto')
+
+
+class FixtureMissing(KeyError):
+    """Replay mode met a request that was never recorded"""
+
+
+class ReplayProvider(BaseProvider):
+    # Record/replay of real responses as test fixtures. 'record' calls the wrapped
+    # provider and saves every request and response as <dir>/<key>.json; 'replay'
+    # answers only from the fixtures (no network, no key needed) and raises
+    # FixtureMissing otherwise; 'auto' replays when it can and records when it can't.
+    # Keys are kfa.cache.cache_key, so a fixture matches exactly one request.
+    def __init__(self, provider: Optional[BaseProvider] = None, fixtures: str = 'fixtures',
+                 mode: str = 'replay'):
+        if mode not in MODES:
+            raise ValueError(f'Unknown replay mode: {mode!r} (expected one of {MODES})')
+        if mode != 'replay' and provider is None:
+            raise ValueError(f'{mode!r} mode needs a provider to record from')
+        self.provider = provider
+        self.root = pathlib.Path(fixtures)
+        self.mode = mode
+        self.recorded = 0
+        self.replayed = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.root / f'{key}.json'
+
+    def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        params = {k: kwargs[k] for k in ('temperature', 'max_output_tokens') if k in kwargs}
+        key = cache_key(model, messages, **params)
+        p = self._path(key)
+        if self.mode != 'record' and p.exists():
+            with self._lock:
+                self.replayed += 1
+            return json.loads(p.read_text(encoding='utf-8'))['response']
+        if self.mode == 'replay':
+            raise FixtureMissing(f'No fixture {p.name} for a {model} request; record it first')
+        response = self.provider.respond(messages, model, **kwargs)
+        fixture = {'model': model, 'params': params, 'messages': messages, 'response': response}
+        atomic_write(p, json.dumps(fixture, ensure_ascii=False, indent=1))
+        with self._lock:
+            self.recorded += 1
+        return response
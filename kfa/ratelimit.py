@@ -0,0 +1,283 @@
+"""
+Request/token rate limiting, 429 backoff and adaptive concurrency for any provider
+"""
+import asyncio, collections, email.utils, random, threading, time
+from typing import Dict, Iterator, List, Optional
+from .providers.base import BaseProvider
+from .tokens import estimate_tokens
+
+
+class TokenBucket:
+    """Continuous-refill bucket holding up to `per_minute` units.
+
+    acquire() reserves units immediately (the balance may go negative) and
+    returns how long the caller must wait, so waiters are served in order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n: float = 1) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= min(n, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, n: float = 1) -> None:
+        wait = self.reserve(n)
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self, n: float = 1) -> None:
+        wait = self.reserve(n)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class AIMDController:
+    """Concurrency limit that grows by ~1 per window of successes and halves on throttling.
+
+    Latency above `target_latency` counts as congestion too. Decreases are applied
+    at most once per `cooldown` seconds so one burst of 429s cuts the limit once.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 16,
+                 decrease: float = 0.5, target_latency: Optional[float] = None, cooldown: float = 5.0):
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._waiters = collections.deque()  # (loop, future) of aacquire() callers
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def aacquire(self) -> None:
+        # Waits on a future that release()/on_success() resolve from whichever thread frees
+        # a slot, then re-checks like acquire() does after a notify
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                fut = loop.create_future()
+                self._waiters.append((loop, fut))
+            try:
+                await fut
+            except asyncio.CancelledError:
+                with self._cond:
+                    if (loop, fut) in self._waiters:
+                        self._waiters.remove((loop, fut))
+                    else:
+                        self._notify()  # pass on a wake-up this waiter will not use
+                raise
+
+    def _notify(self) -> None:
+        # Caller holds self._cond
+        self._cond.notify_all()
+        while self._waiters:
+            loop, fut = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_wake, fut)
+            except RuntimeError:
+                pass  # its event loop is closed
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._notify()
+
+    def on_success(self, latency: float) -> None:
+        if self.target_latency and latency > self.target_latency:
+            self._backoff()
+            return
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._notify()
+
+    def on_throttle(self) -> None:
+        self._backoff()
+
+    def _backoff(self) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self._last_decrease = now
+
+
+def _wake(fut) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+def is_rate_limited(e: Exception) -> bool:
+    return getattr(e, 'status_code', None) == 429 or type(e).__name__ == 'RateLimitError'
+
+
+def is_retryable(e: Exception) -> bool:
+    status = getattr(e, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(e).__name__ in ('APIConnectionError', 'APITimeoutError', 'RateLimitError')
+
+
+def retry_after(e: Exception) -> Optional[float]:
+    """Seconds to wait from Retry-After / retry-after-ms headers, if the error carries them"""
+    headers = getattr(getattr(e, 'response', None), 'headers', None) or {}
+    ms = headers.get('retry-after-ms')
+    if ms:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None  # malformed header: fall back to backoff, keep the original error
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+class RateLimitedProvider(BaseProvider):
+    """Wraps a provider with RPM/TPM buckets, retry with jittered backoff and an AIMD limit"""
+
+    def __init__(self, provider: BaseProvider, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 controller: Optional[AIMDController] = None, max_retries: int = 6,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.controller = controller or AIMDController()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttled = 0
+        self.retries = 0
+
+    def _cost(self, messages, kwargs) -> int:
+        # Quota is charged on prompt plus the output budget
+        return sum(estimate_tokens(m['content']) for m in messages) + kwargs.get('max_output_tokens', 1500)
+
+    def _delay(self, e: Exception, attempt: int) -> float:
+        hinted = retry_after(e)
+        if hinted is not None:
+            return min(self.max_delay, hinted) + random.uniform(0, self.base_delay)
+        # Full jitter: uniform over the exponential window
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _failed(self, e: Exception, attempt: int) -> Optional[float]:
+        # Returns the backoff delay, or None if the error should propagate
+        if attempt >= self.max_retries or not is_retryable(e):
+            return None
+        throttled = is_rate_limited(e)
+        with self.controller._cond:  # the counters are shared by worker threads, like the limit
+            self.throttled += 1 if throttled else 0
+            self.retries += 1
+        if throttled:
+            self.controller.on_throttle()
+        return self._delay(e, attempt)
+
+    def _wait_quota(self, cost: int) -> None:
+        if self.requests:
+            self.requests.acquire(1)
+        if self.tokens:
+            self.tokens.acquire(cost)
+
+    async def _await_quota(self, cost: int) -> None:
+        if self.requests:
+            await self.requests.aacquire(1)
+        if self.tokens:
+            await self.tokens.aacquire(cost)
+
+    def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        cost = self._cost(messages, kwargs)
+        attempt = 0
+        while True:
+            self.controller.acquire()
+            try:
+                self._wait_quota(cost)
+                start = time.monotonic()
+                out = self.provider.respond(messages, model, **kwargs)
+                self.controller.on_success(time.monotonic() - start)
+                return out
+            except Exception as e:
+                delay = self._failed(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self.controller.release()
+            time.sleep(delay)
+            attempt += 1
+
+    async def arespond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        cost = self._cost(messages, kwargs)
+        attempt = 0
+        while True:
+            await self.controller.aacquire()
+            try:
+                await self._await_quota(cost)
+                start = time.monotonic()
+                out = await self.provider.arespond(messages, model, **kwargs)
+                self.controller.on_success(time.monotonic() - start)
+                return out
+            except Exception as e:
+                delay = self._failed(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self.controller.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stream(self, messages: List[Dict[str, str]], model: str, **kwargs) -> Iterator[str]:
+        # Retries only until the first delta; a stream that fails midway is not replayed
+        cost = self._cost(messages, kwargs)
+        attempt = 0
+        while True:
+            self.controller.acquire()
+            started = False
+            try:
+                self._wait_quota(cost)
+                start = time.monotonic()
+                for delta in self.provider.stream(messages, model, **kwargs):
+                    started = True
+                    yield delta
+                self.controller.on_success(time.monotonic() - start)
+                return
+            except Exception as e:
+                delay = None if started else self._failed(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self.controller.release()
+            time.sleep(delay)
+            attempt += 1
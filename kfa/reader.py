@@ -1,51 +1,143 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Literal
+from typing import Iterator, List, Literal, Optional, Tuple
+from .timing import Cues, parse_cue_timing
 
-def read_input(path: str, input_format: Literal['auto','txt','md','docx','srt']='auto') -> str:
+Format = Literal['auto','txt','md','docx','srt']
+
+def detect_format(path: str, input_format: Format = 'auto') -> str:
+    if input_format != 'auto':
+        return input_format
+    ext = (Path(path).suffix or '').lower().lstrip('.')
+    if ext in ('md','markdown'):
+        return 'md'
+    if ext in ('txt','text','log'):
+        return 'txt'
+    if ext in ('docx',):
+        return 'docx'
+    if ext in ('srt',):
+        return 'srt'
+    return 'txt'  # safe fallback
+
+def _blocks(lines) -> Iterator[str]:
+    # Groups stripped non-blank lines into blank-line separated paragraphs, in one pass
+    para = []
+    for line in lines:
+        if line:
+            para.append(line)
+        elif para:
+            yield "\n".join(para)
+            para = []
+    if para:
+        yield "\n".join(para)
+
+def _srt_blocks(f) -> Iterator[Tuple[str, Optional[float], Optional[float]]]:
+    # very simple SRT to text: numeric indices are skipped and timing lines are kept
+    # aside, so each blank-line separated block of caption text comes with the span of
+    # the timings seen since the previous block (None if there were none)
+    para, start, end = [], None, None
+    for line in f:
+        s = line.strip()
+        if '-->' in s:
+            t = parse_cue_timing(s)
+            if t:
+                start = t[0] if start is None else start
+                end = t[1]
+            continue
+        if s.isdigit():
+            continue
+        if s:
+            para.append(s)
+        elif para:
+            yield "\n".join(para), start, end
+            para, start, end = [], None, None
+    if para:
+        yield "\n".join(para), start, end
+
+def iter_paragraphs(path: str, input_format: Format = 'auto') -> Iterator[str]:
+    """Paragraphs of a txt/md/docx/srt file, read incrementally in linear time"""
     p = Path(path)
-    if input_format == 'auto':
-        ext = (p.suffix or '').lower().lstrip('.')
-        if ext in ('md','markdown'):
-            input_format = 'md'
-        elif ext in ('txt','text','log'):
-            input_format = 'txt'
-        elif ext in ('docx',):
-            input_format = 'docx'
-        elif ext in ('srt',):
-            input_format = 'srt'
-        else:
-            input_format = 'txt'  # safe fallback
-    if input_format in ('txt','md'):
-        return p.read_text(encoding='utf-8', errors='ignore')
-    if input_format == 'docx':
+    fmt = detect_format(path, input_format)
+    if fmt in ('txt','md'):
+        with p.open(encoding='utf-8', errors='ignore') as f:
+            yield from _blocks(line.strip() for line in f)
+    elif fmt == 'docx':
         try:
             from docx import Document
         except Exception as e:
             raise RuntimeError('python-docx is required for .docx ingestion') from e
-        doc = Document(str(p))
-        paras = []
-        for para in doc.paragraphs:
+        for para in Document(str(p)).paragraphs:
             text = para.text.strip('\n')
             if text:
-                paras.append(text)
-        return "\n\n".join(paras).strip()
-    if input_format == 'srt':
-        # very simple SRT to text: skip numeric indices and timestamps
-        lines = p.read_text(encoding='utf-8', errors='ignore').splitlines()
-        out = []
-        for line in lines:
-            s = line.strip()
-            if not s: 
-                out.append('')  # keep paragraph breaks
-                continue
-            if s.isdigit():
-                continue
-            if '-->' in s:
-                continue
-            out.append(s)
-        # collapse multiple blank lines
-        text = "\n".join(out)
-        while '\n\n\n' in text:
-            text = text.replace('\n\n\n','\n\n')
-        return text.strip()
-    raise ValueError(f'Unsupported input_format: {input_format}')
+                yield text
+    elif fmt == 'srt':
+        with p.open(encoding='utf-8', errors='ignore') as f:
+            for para, _, _ in _srt_blocks(f):
+                yield para
+    else:
+        raise ValueError(f'Unsupported input_format: {input_format}')
+
+def iter_text(path: str, input_format: Format = 'auto', block_size=1 << 16) -> Iterator[str]:
+    # The text of read_input() as a stream of pieces, for kfa.chunking.iter_chunks
+    fmt = detect_format(path, input_format)
+    if fmt in ('txt','md'):
+        with Path(path).open(encoding='utf-8', errors='ignore') as f:
+            yield from iter(lambda: f.read(block_size), '')
+        return
+    for k, para in enumerate(iter_paragraphs(path, fmt)):
+        yield ("\n\n" + para) if k else para.lstrip()
+
+def read_input(path: str, input_format: Format = 'auto') -> str:
+    fmt = detect_format(path, input_format)
+    if fmt in ('txt','md'):
+        return Path(path).read_text(encoding='utf-8', errors='ignore')
+    return "\n\n".join(iter_paragraphs(path, fmt)).strip()
+
+def read_srt(path: str) -> Tuple[str, Cues]:
+    """read_input's text for an SRT file plus the timing and text span of every cue"""
+    parts, cues, offset, last_end = [], Cues(), 0, 0.0
+    with Path(path).open(encoding='utf-8', errors='ignore') as f:
+        for para, start, end in _srt_blocks(f):
+            if parts:
+                offset += 2  # the "\n\n" between paragraphs
+            start = last_end if start is None else start
+            end = start if end is None else end
+            cues.append(start, end, offset, len(para))
+            parts.append(para)
+            offset += len(para)
+            last_end = end
+    return "\n\n".join(parts), cues
+
+def _read_or_error(path, input_format):
+    try:
+        return read_input(path, input_format)
+    except Exception as e:
+        return e
+
+def read_many(paths: List[str], input_format: Format = 'auto', workers: Optional[int] = None,
+              return_exceptions=False) -> List:
+    """read_input for many files, in order. DOCX parsing is CPU-bound, so .docx files are
+    parsed in a process pool; text and SRT files are cheap and read in this process.
+    With return_exceptions, a file that fails yields its exception instead of raising."""
+    fmts = [detect_format(p, input_format) for p in paths]
+    heavy = [k for k, f in enumerate(fmts) if f == 'docx']
+    results = [None] * len(paths)
+    pool = None
+    if len(heavy) > 1:
+        pool = ProcessPoolExecutor(max_workers=min(len(heavy), workers or os.cpu_count() or 1))
+    try:
+        futures = {k: pool.submit(_read_or_error, paths[k], fmts[k]) for k in heavy} if pool else {}
+        for k, path in enumerate(paths):
+            if k not in futures:
+                results[k] = _read_or_error(path, fmts[k])
+        for k, fut in futures.items():
+            results[k] = fut.result()
+    finally:
+        if pool:
+            pool.shutdown()
+    if not return_exceptions:
+        for r in results:
+            if isinstance(r, Exception):
+                raise r
+    return results
@@ -0,0 +1,61 @@
+"""
+Per-run output namespaces under out/runs/<run_id>/ and their retention
+"""
+import pathlib, shutil, time, uuid
+from typing import Dict, List, Optional
+
+MD_NAME = 'keynote_kfa.md'
+CSV_NAME = 'keynote_kfa_notes.csv'
+RECORDS_NAME = 'keynote_kfa_records.jsonl'
+REPORT_NAME = 'run_report.json'
+
+
+def new_run_id() -> str:
+    """Sortable, collision-safe id, e.g. 20261018-153012-1a2b3c"""
+    return time.strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:6]
+
+
+def runs_root(out_dir='out') -> pathlib.Path:
+    return pathlib.Path(out_dir) / 'runs'
+
+
+def run_paths(out_dir='out', run_id: Optional[str] = None) -> Dict[str, str]:
+    """Create the run directory and return its id and artifact paths"""
+    run_id = run_id or new_run_id()
+    d = runs_root(out_dir) / run_id
+    d.mkdir(parents=True, exist_ok=True)
+    return {
+        'run_id': run_id,
+        'out_dir': str(d),
+        'md_path': str(d / MD_NAME),
+        'csv_path': str(d / CSV_NAME),
+        'records_path': str(d / RECORDS_NAME),
+        'report_path': str(d / REPORT_NAME),
+    }
+
+
+def cleanup_runs(out_dir='out', keep: int = 20, max_age_days: Optional[float] = 7, protect=()) -> List[str]:
+    """Delete finished run directories beyond the newest `keep`, and any older than `max_age_days`.
+
+    A run whose checkpoint journal has no completion marker is still running (in another
+    process, job or request) or waiting for --resume; it is only deleted once too old.
+    """
+    from .checkpoint import is_complete
+    root = runs_root(out_dir)
+    if not root.exists():
+        return []
+    dirs = sorted((p for p in root.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime, reverse=True)
+    now = time.time()
+    removed, kept = [], 0
+    for d in dirs:
+        if d.name in protect:
+            continue
+        too_old = max_age_days is not None and now - d.stat().st_mtime > max_age_days * 86400
+        if not too_old and not is_complete(d):
+            continue
+        if too_old or (keep is not None and kept >= keep):
+            shutil.rmtree(d, ignore_errors=True)
+            removed.append(d.name)
+        else:
+            kept += 1
+    return removed
@@ -1,20 +1,164 @@
-from .prompts import SYSTEM, SCENEMAP_USER
+import asyncio, bisect, difflib, re
+from concurrent.futures import ThreadPoolExecutor
+from .chunking import chunk_text_stable, simple_token_estimate, strip_span
+from .prompts import SYSTEM, SCENEMAP_USER, SCENEMAP_SEAM_USER
+from .timing import timed
 
-def build_scene_map(provider, model, text: str):
-    messages = [
+def scene_map_messages(text: str):
+    return [
         {"role":"system","content": SYSTEM},
         {"role":"user","content": SCENEMAP_USER + "\n\n" + text},
     ]
-    return provider.respond(messages, model=model, temperature=0.2, max_output_tokens=2000)
 
-def parse_scene_map(markdown: str):
-    # Minimal parser: returns a list of scene labels (not spans)
-    scenes = []
+def seam_messages(before: list[str], after: list[str]):
+    return [
+        {"role":"system","content": SYSTEM},
+        {"role":"user","content": SCENEMAP_SEAM_USER + "\n\n[PART 1]\n" + "".join(f"- {s}\n" for s in before)
+                                  + "\n[PART 2]\n" + "".join(f"- {s}\n" for s in after)},
+    ]
+
+def scene_windows(text: str, window_tokens=6000):
+    # Content-defined windows, so an edit only changes the window it lands in and the
+    # other windows' scene maps come straight from the response cache on the next run.
+    # Window prompts carry no position, for the same reason.
+    if not window_tokens or simple_token_estimate(text) <= window_tokens:
+        return [text]
+    return [w.text for w in chunk_text_stable(text, window_tokens, 0)]
+
+def _seams(parts):
+    # (closing scenes, opening scenes) around each window boundary; None when a side has none
+    scenes = [parse_scene_map(p) for p in parts]
+    return [(a[-SEAM_SCENES:], b[:SEAM_SCENES]) if a and b else None for a, b in zip(scenes, scenes[1:])]
+
+def build_scene_map(provider, model, text: str, window_tokens=6000, concurrency=4):
+    # Map-reduce: scene-map windows in parallel, then one small call per window boundary
+    # (also in parallel) for the bridges across it; the window maps are joined locally
+    # (merge_scene_maps). Two rounds of calls at any length, and no call rewrites the
+    # whole map, so a long talk's scenes are never cut off by an output budget.
+    # A short text is one call.
+    def call(messages, max_output_tokens=2000):
+        return provider.respond(messages, model=model, temperature=0.2, max_output_tokens=max_output_tokens)
+
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency))) as pool:
+        parts = list(pool.map(call, map(scene_map_messages, scene_windows(text, window_tokens))))
+        if len(parts) == 1:
+            return parts[0]
+        seams = list(pool.map(lambda s: call(seam_messages(*s), SEAM_OUTPUT_TOKENS) if s else '', _seams(parts)))
+    return merge_scene_maps(parts, seams)
+
+async def abuild_scene_map(provider, model, text: str, window_tokens=6000, concurrency=4):
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def call(messages, max_output_tokens=2000):
+        async with sem:
+            return await provider.arespond(messages, model=model, temperature=0.2, max_output_tokens=max_output_tokens)
+
+    async def seam(s):
+        return await call(seam_messages(*s), SEAM_OUTPUT_TOKENS) if s else ''
+
+    parts = await asyncio.gather(*(call(scene_map_messages(w)) for w in scene_windows(text, window_tokens)))
+    if len(parts) == 1:
+        return parts[0]
+    seams = await asyncio.gather(*(seam(s) for s in _seams(parts)))
+    return merge_scene_maps(parts, seams)
+
+_SECTION = re.compile(r'^\W*\[([A-Z_]+)\]')
+_ITEM = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+(.*\S)')
+_SAME_SCENE = re.compile(r'\[SAME_SCENE\]\W*(\w+)', re.I)
+SECTIONS = ('SCENES', 'BRIDGES', 'HEAVY_BEATS', 'SLIDE_CUES')
+SEAM_SCENES = 2           # scenes on each side of a window boundary shown to its seam call
+SEAM_OUTPUT_TOKENS = 300
+
+def _sections(markdown: str):
+    # List items of every [SECTION], in order
+    sections, name = {}, None
     for line in markdown.splitlines():
-        if line.strip().startswith("-") and "[SCENES]" not in line:
-            scenes.append(line.strip("- "))
-    return scenes
+        m = _SECTION.match(line)
+        if m:
+            name = m.group(1)
+            continue
+        m = _ITEM.match(line)
+        if name and m:
+            sections.setdefault(name, []).append(m.group(1))
+    return sections
+
+def parse_scene_map(markdown: str):
+    # Scene labels from the [SCENES] section only, in order; other sections are ignored
+    return _sections(markdown).get('SCENES', [])
+
+def merge_scene_maps(parts: list[str], seams: list[str]) -> str:
+    # Window scene maps joined in order. seams[k] is the answer for the boundary after
+    # parts[k]: its bridges are added, and when it says a scene runs across the boundary
+    # the next window's first scene is dropped, so the scene isn't cut in two.
+    merged = {name: [] for name in SECTIONS}
+    for k, part in enumerate(parts):
+        sections = _sections(part)
+        scenes = sections.get('SCENES', [])
+        if k and seams[k - 1]:
+            same = _SAME_SCENE.search(seams[k - 1])
+            if same and same.group(1).lower().startswith('y') and merged['SCENES']:
+                scenes = scenes[1:]
+            merged['BRIDGES'] += _sections(seams[k - 1]).get('BRIDGES', [])
+        merged['SCENES'] += scenes
+        for name in SECTIONS[1:]:
+            merged[name] += sections.get(name, [])
+    return "\n".join(f"[{name}]\n" + "".join(f"- {item}\n" for item in items) for name, items in merged.items())
+
+_QUOTE = re.compile(r'["“„]([^"“”„]{3,})["”]')
+_WORD = re.compile(r"\w+(?:'\w+)?")
+_SENT_START = re.compile(r'(?:^|[.!?]\s+|\n)\s*(?=\S)')
+ANCHOR_WORDS = 12
+SEARCH_SCENES = 3        # anchors are searched this many expected scene lengths past the last cut
+SEARCH_MIN_WORDS = 400   # ...but at least this many words
+
+def _anchor(label: str):
+    # The quoted opening words if the scene map gave them, else the label itself
+    m = _QUOTE.search(label)
+    return m.group(1) if m else label
+
+def _snap(starts, offset, slack=200):
+    # Move a cut back to the sentence start at or before it, if one is close
+    k = bisect.bisect_right(starts, offset) - 1
+    return starts[k] if k >= 0 and offset - starts[k] <= slack else offset
 
-def cut_by_scenes(text: str, scenes: list[str]):
-    # Placeholder: fallback to a single chunk; your team can parse timestamps/markers later
-    return [text]
+def cut_by_scenes(text: str, scenes: list[str], min_match=3, cues=None, count_tokens=None):
+    # Align each scene's anchor to the source with a longest-common-word-run search
+    # that only looks past the previous scene, so scenes stay ordered. The search covers
+    # a window of a few expected scene lengths after the last cut (a refrain is not
+    # matched far ahead); only an anchor the window misses is searched to the end. The
+    # matcher indexes the short anchor and walks the window, so each search costs the
+    # window's length, not the occurrences of the anchor's words in the whole transcript,
+    # and the windows cover the transcript about SEARCH_SCENES times overall. Scenes that
+    # can't be placed (fewer than `min_match` words in common) merge into their
+    # predecessor. Scenes are Chunks of `text` with their token counts (count_tokens, as
+    # in kfa.chunking) and, with SRT `cues`, their media time spans.
+    words = [(m.group().lower(), m.start()) for m in _WORD.finditer(text)]
+    tokens = [w for w, _ in words]
+    starts = [m.end() for m in _SENT_START.finditer(text)]
+    matcher = difflib.SequenceMatcher(None, autojunk=False)
+    matcher.set_seq1(tokens)
+    cuts, lo = [0], 0
+    labels = scenes[1:] if scenes else []
+    for k, label in enumerate(labels):
+        anchor = [w.lower() for w in _WORD.findall(_anchor(label))][:ANCHOR_WORDS]
+        if not anchor or lo >= len(tokens):
+            continue
+        matcher.set_seq2(anchor)
+        need = min(min_match, len(anchor))
+        expected = (len(tokens) - lo) / (len(labels) - k + 1)
+        hi = min(len(tokens), lo + 1 + max(SEARCH_MIN_WORDS, int(SEARCH_SCENES * expected)))
+        b, a, size = matcher.find_longest_match(lo + 1, hi, 0, len(anchor))
+        if size < need and hi < len(tokens):
+            b, a, size = matcher.find_longest_match(lo + 1, len(tokens), 0, len(anchor))
+        if size < need:
+            continue
+        w = max(lo + 1, b - a)  # back up to where the anchor would start
+        cut = _snap(starts, words[w][1])
+        if cut <= cuts[-1]:
+            cut = words[w][1]
+        if cut > cuts[-1]:
+            cuts.append(cut)
+            lo = w
+    cuts.append(len(text))
+    spans = [(s, e) for s, e in zip(cuts, cuts[1:]) if strip_span(text, s, e)[0] < e]
+    return [timed(text, cues, s, e, count_tokens, id=i) for i, (s, e) in enumerate(spans)]
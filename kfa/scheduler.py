@@ -0,0 +1,195 @@
+"""
+Multi-document runs: expand directories/globs/manifests and schedule every document's
+chunks on one shared provider and one global concurrency budget
+"""
+import glob, json, pathlib, threading, time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from .cli import make_provider, _finish_provider, _split, _plan, _export, _out_dir, _style_settings, _scene_map_opts, _writer, _metrics, _learn
+from .critique import critique_output
+from .scenemap import build_scene_map
+from .telemetry import labelled
+from . import checkpoint, incremental, runs
+
+INPUT_EXTS = {'.txt', '.text', '.md', '.markdown', '.docx', '.srt'}
+
+
+def _expand(spec: str, base: pathlib.Path) -> List[pathlib.Path]:
+    p = pathlib.Path(spec)
+    if not p.is_absolute():
+        p = base / p
+    if any(ch in spec for ch in '*?['):
+        return [pathlib.Path(m) for m in sorted(glob.glob(str(p), recursive=True)) if pathlib.Path(m).is_file()]
+    if p.is_dir():
+        return sorted(f for f in p.rglob('*') if f.is_file() and f.suffix.lower() in INPUT_EXTS)
+    if p.is_file():
+        return [p]
+    raise FileNotFoundError(f'No such input: {spec}')
+
+
+def expand_inputs(specs: List[str], manifest: Optional[str] = None) -> List[str]:
+    """Files from paths, directories (recursive), globs and a manifest (one spec per line, # comments)"""
+    found = [f for spec in specs or [] for f in _expand(spec, pathlib.Path.cwd())]
+    if manifest:
+        mp = pathlib.Path(manifest)
+        for line in mp.read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                found.extend(_expand(line, mp.parent))
+    seen, out = set(), []
+    for f in found:
+        key = str(f.resolve())
+        if key not in seen:
+            seen.add(key)
+            out.append(str(f))
+    return out
+
+
+def _doc_names(inputs: List[str]) -> List[str]:
+    # Output directory per document: file stem, de-duplicated with a numeric suffix
+    names, used = [], {}
+    for path in inputs:
+        stem = pathlib.Path(path).stem or 'doc'
+        n = used.get(stem, 0)
+        used[stem] = n + 1
+        names.append(stem if n == 0 else f'{stem}-{n}')
+    return names
+
+
+def run_many(inputs: List[str], cfg: dict, provider=None, run_id=None, resume=False) -> Dict:
+    # All documents share one provider (connection pool, cache, rate limiter) and one
+    # thread pool sized by params.concurrency. Chunk tasks are queued largest document
+    # first so long documents start early and the pool stays full until the end; each
+    # document is exported as soon as its last chunk lands, to out/runs/<run_id>/<doc>/.
+    # Each document keeps its own checkpoint journal there; resume=True reuses them.
+    # One run_report.json in the run directory covers every document.
+    from .reader import read_many, read_srt, detect_format
+    batch = runs.run_paths(_out_dir(cfg), run_id)
+    metrics = _metrics(cfg, batch, documents=len(inputs))
+    base = provider or make_provider(cfg)
+    provider = metrics.instrument(base)
+    model = cfg['models']['style_model']
+    params = cfg['params']
+    concurrency = max(1, int(params.get('concurrency', 4)))
+    names = _doc_names(inputs)
+    # DOCX parsing fans out to a process pool; text and SRT files are read inline
+    fmt = cfg['io'].get('input_format','auto')
+    with metrics.span('read'):
+        texts = read_many(inputs, fmt, return_exceptions=True)
+    docs = [{'input': path, 'name': name, 'text': text} for path, name, text in zip(inputs, names, texts)]
+    lock = threading.Lock()
+
+    def prepare(doc):
+        doc['start'] = time.time()
+        try:
+            text, cues = doc.pop('text'), None
+            if isinstance(text, Exception):
+                raise text
+            if cfg['chunking']['strategy'] in ('time', 'scene_map') and detect_format(doc['input'], fmt) == 'srt':
+                text, cues = read_srt(doc['input'])
+            sm_md = None
+            if cfg['chunking']['strategy'] == 'scene_map':
+                # Already on a pool worker: one call at a time, so the run stays within budget
+                opts = dict(_scene_map_opts(cfg), concurrency=1)
+                sm_md = build_scene_map(provider, cfg['models']['global_model'], text, **opts)
+            doc['chunks'] = _split(text, cfg, sm_md, cues)
+        except Exception as e:
+            doc['error'] = str(e)
+            doc['chunks'] = []
+
+    def finalize(doc):
+        if 'error' in doc:
+            doc['seconds'] = round(time.time() - doc['start'], 2)
+            return
+        try:
+            outputs = incremental.assemble(doc['chunks'], doc['reused'], doc['todo'], doc['fresh'])
+            doc['failed'] = sum(1 for o in outputs if 'error' in o)
+            result = _export(outputs, cfg, doc['input'], doc['paths'], doc['writer'])
+            doc['journal'].complete()
+            doc['md_path'], doc['csv_path'] = result['md_path'], result['csv_path']
+        except Exception as e:
+            doc['error'] = str(e)
+        doc['seconds'] = round(time.time() - doc['start'], 2)
+
+    def critique(doc, j):
+        # Whatever fails, the chunk is counted so the document still finalizes, and the
+        # error is kept on the document (journal/report failures are not chunk errors)
+        i = doc['todo'][j]
+        try:
+            with labelled(document=doc['name'], stage='critique'):
+                out = critique_output(provider, model, i, doc['chunks'][i],
+                                      temperature=params['temperature'], max_output_tokens=params['max_output_tokens'])
+            doc['journal'].record(out)
+            doc['writer'].add(out)
+            with lock:
+                doc['fresh'][j] = out
+        except Exception as e:
+            with lock:
+                doc.setdefault('error', f'chunk {i}: {e}')
+        finally:
+            with lock:
+                doc['remaining'] -= 1
+                last = doc['remaining'] == 0
+            if last:
+                finalize(doc)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Chunking and scene maps use the same pool and budget
+        with metrics.span('prepare'):
+            list(pool.map(prepare, docs))
+        futures = []
+        with metrics.span('plan'):
+            for doc in sorted(docs, key=lambda d: len(d['chunks']), reverse=True):
+                if 'error' in doc:
+                    continue
+                doc['paths'] = runs.run_paths(_out_dir(cfg), f"{batch['run_id']}/{doc['name']}")
+                doc['journal'] = checkpoint.Journal(doc['paths']['out_dir'], doc['input'], _style_settings(cfg))
+                doc['reused'], doc['todo'] = _plan(doc['chunks'], cfg, doc['input'], doc['journal'], resume)
+                doc['writer'] = _writer(cfg, doc['paths'], doc['reused'])
+                doc['fresh'] = [None] * len(doc['todo'])
+                doc['remaining'] = len(doc['todo'])
+                if not doc['todo']:
+                    futures.append(pool.submit(finalize, doc))
+                for j in range(len(doc['todo'])):
+                    futures.append(pool.submit(critique, doc, j))
+        # Documents are exported inside this span, each as its last chunk lands
+        with metrics.span('critique'):
+            wait(futures)
+    _finish_provider(base)
+    report_path = batch['report_path'] if cfg.get('metrics', {}).get('report', True) else None
+    metrics.info['chunks_total'] = sum(len(d['chunks']) for d in docs)
+    _learn(cfg, metrics.finish(report_path))
+
+    summary = {
+        'run_id': batch['run_id'],
+        'out_dir': batch['out_dir'],
+        'report_path': report_path,
+        'documents': [
+            {
+                'input': d['input'],
+                'name': d['name'],
+                'chunks': len(d['chunks']),
+                'failed_chunks': d.get('failed', 0),
+                'seconds': d.get('seconds'),
+                'md_path': d.get('md_path'),
+                'csv_path': d.get('csv_path'),
+                'error': d.get('error'),
+            }
+            for d in docs
+        ],
+    }
+    write_index(summary)
+    return summary
+
+
+def write_index(summary: Dict) -> None:
+    """index.json plus a markdown table linking every document's report"""
+    out = pathlib.Path(summary['out_dir'])
+    (out / 'index.json').write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding='utf-8')
+    lines = [f"# Keynote KFA Batch {summary['run_id']}\n\n",
+             "| Document | Chunks | Failed | Seconds | Report |\n",
+             "|---|---|---|---|---|\n"]
+    for d in summary['documents']:
+        report = f"[{d['name']}]({d['name']}/{runs.MD_NAME})" if d['md_path'] else f"error: {d['error']}"
+        lines.append(f"| {d['input']} | {d['chunks']} | {d['failed_chunks']} | {d['seconds']} | {report} |\n")
+    (out / 'index.md').write_text("".join(lines), encoding='utf-8')
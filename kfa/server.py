@@ -1,16 +1,24 @@
 from fastapi import FastAPI, UploadFile, Form
-from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse, StreamingResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from typing import Optional
-from .cli import run as run_cli
+from .cli import arun as arun_cli, stream_run, run as run_cli
 from .config import load_config
-import tempfile, os, pathlib, urllib.parse
+from .jobs import JobStore, JobQueue
+from .telemetry import TOTALS
+import html, tempfile, os, pathlib, urllib.parse, json
 
 app = FastAPI()
 
 OUT_DIR = pathlib.Path('out')
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
+JOBS = JobQueue(
+    JobStore(OUT_DIR / 'jobs.sqlite3'),
+    run_cli,
+    workers=load_config('config.yaml').get('jobs', {}).get('workers', 2),
+)
+
 @app.get('/', response_class=HTMLResponse)
 def index():
     return """
@@ -152,7 +160,7 @@ input[type="file"]:focus {
   box-shadow: 0 0 0 3px rgb(37 99 235 / 0.1);
 }
 
-select {
+select, input[type="text"] {
   width: 100%;
   padding: 0.75rem;
   border: 1px solid var(--border);
@@ -162,7 +170,11 @@ select {
   transition: all 0.2s ease;
 }
 
-select:focus {
+input[type="text"] + input[type="text"] {
+  margin-top: 0.5rem;
+}
+
+select:focus, input[type="text"]:focus {
   outline: none;
   border-color: var(--primary);
   box-shadow: 0 0 0 3px rgb(37 99 235 / 0.1);
@@ -253,6 +265,37 @@ select:focus {
   to { transform: rotate(360deg); }
 }
 
+.live {
+  display: none;
+  margin-top: 1.5rem;
+}
+
+.live-chunk {
+  margin-bottom: 1rem;
+  padding: 1rem;
+  background: var(--background);
+  border: 1px solid var(--border);
+  border-radius: var(--radius);
+}
+
+.live-chunk h4 {
+  margin: 0 0 0.5rem 0;
+  font-size: 0.875rem;
+  color: var(--text-muted);
+}
+
+.live-chunk pre {
+  margin: 0;
+  white-space: pre-wrap;
+  font-size: 0.875rem;
+}
+
+.live-links {
+  display: none;
+  gap: 1rem;
+  margin-top: 1rem;
+}
+
 @media (max-width: 640px) {
   .container {
     padding: 1rem;
@@ -293,9 +336,17 @@ select:focus {
         <label for="strategy">Processing Strategy</label>
         <select id="strategy" name="strategy">
           <option value="tokens" selected>Token-based Chunking (Recommended)</option>
+          <option value="auto">Auto-sized Chunks (from measured latency)</option>
           <option value="scene_map">Scene Map Analysis (Advanced)</option>
+          <option value="time">Time Windows (SRT subtitles)</option>
         </select>
       </div>
+
+      <div class="form-group">
+        <label for="speaker">Speaker and Event (optional, for tag analytics)</label>
+        <input id="speaker" name="speaker" type="text" placeholder="Speaker" />
+        <input id="event" name="event" type="text" placeholder="Event" />
+      </div>
       
       <button type="submit" class="btn btn-primary">
         <span class="btn-text">Analyze Keynote</span>
@@ -303,9 +354,15 @@ select:focus {
       
       <div class="loading" id="loading">
         <div class="spinner"></div>
-        <p>Processing your keynote... This may take a few minutes.</p>
+        <p id="loading-text">Processing your keynote... This may take a few minutes.</p>
       </div>
     </form>
+
+    <div class="live" id="live"></div>
+    <div class="live-links" id="live-links">
+      <a class="btn btn-primary" id="dl-md" href="#">📄 Download Markdown</a>
+      <a class="btn btn-primary" id="dl-csv" href="#">📊 Download CSV Notes</a>
+    </div>
     
     <div class="supported-formats">
       <h4>Supported Formats</h4>
@@ -320,12 +377,69 @@ select:focus {
 </div>
 
 <script>
-document.getElementById('uploadForm').addEventListener('submit', function() {
+// Stream results over Server-Sent Events; fall back to the plain form post without fetch streams
+document.getElementById('uploadForm').addEventListener('submit', function(e) {
   document.querySelector('.btn-text').textContent = 'Processing...';
   document.querySelector('.btn-primary').disabled = true;
   document.getElementById('loading').style.display = 'block';
+  if (!window.fetch || !window.ReadableStream) return;
+  e.preventDefault();
+  streamAnalysis(new FormData(this));
 });
 
+function handleEvent(name, data) {
+  const live = document.getElementById('live');
+  if (name === 'chunks') {
+    live.style.display = 'block';
+    document.getElementById('loading-text').textContent = `Critiquing ${data.total} chunks...`;
+  } else if (name === 'chunk_start') {
+    const div = document.createElement('div');
+    div.className = 'live-chunk';
+    div.innerHTML = `<h4>Scene ${data.id}</h4><pre id="chunk-${data.id}"></pre>`;
+    live.appendChild(div);
+  } else if (name === 'delta') {
+    document.getElementById(`chunk-${data.id}`).textContent += data.text;
+  } else if (name === 'chunk_end') {
+    document.getElementById(`chunk-${data.id}`).textContent = data.kfa;
+  } else if (name === 'done') {
+    document.getElementById('loading').style.display = 'none';
+    document.querySelector('.btn-text').textContent = 'Analyze Keynote';
+    document.querySelector('.btn-primary').disabled = false;
+    document.getElementById('dl-md').href = '/download?path=' + encodeURIComponent(data.md_path);
+    if (data.csv_path) {
+      document.getElementById('dl-csv').href = '/download?path=' + encodeURIComponent(data.csv_path);
+    } else {
+      document.getElementById('dl-csv').style.display = 'none';
+    }
+    document.getElementById('live-links').style.display = 'flex';
+  } else if (name === 'error') {
+    document.getElementById('loading-text').textContent = 'Error: ' + data.message;
+  }
+}
+
+async function streamAnalysis(formData) {
+  const resp = await fetch('/analyze/stream', {method: 'POST', body: formData});
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = '';
+  while (true) {
+    const {value, done} = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, {stream: true});
+    let idx;
+    while ((idx = buf.indexOf('\\n\\n')) >= 0) {
+      const block = buf.slice(0, idx);
+      buf = buf.slice(idx + 2);
+      let name = 'message', data = '';
+      for (const line of block.split('\\n')) {
+        if (line.startsWith('event: ')) name = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      handleEvent(name, JSON.parse(data));
+    }
+  }
+}
+
 // File input enhancement
 document.getElementById('file').addEventListener('change', function(e) {
   const file = e.target.files[0];
@@ -339,24 +453,35 @@ document.getElementById('file').addEventListener('change', function(e) {
 </html>
 """
 
+def _label_run(cfg: dict, filename: str, speaker: Optional[str] = None, event: Optional[str] = None):
+    # Index the upload under its own name (not the temp file it runs from), with the form's speaker/event
+    analytics = cfg.setdefault('analytics', {})
+    analytics['document'] = filename
+    analytics['speaker'] = speaker or analytics.get('speaker')
+    analytics['event'] = event or analytics.get('event')
+
 @app.post('/analyze', response_class=HTMLResponse)
-async def analyze(file: UploadFile, strategy: Optional[str] = Form('tokens')):
+async def analyze(file: UploadFile, strategy: Optional[str] = Form('tokens'),
+                  speaker: Optional[str] = Form(None), event: Optional[str] = Form(None)):
     suffix = os.path.splitext(file.filename)[-1] or '.txt'
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         tmp.write(await file.read())
         tmp_path = tmp.name
     cfg = load_config('config.yaml')
     cfg['chunking']['strategy'] = strategy or 'tokens'
-    run_cli(tmp_path, cfg)
+    _label_run(cfg, file.filename, speaker, event)
+    try:
+        result = await arun_cli(tmp_path, cfg)
+    finally:
+        os.unlink(tmp_path)
 
-    md_path = OUT_DIR / 'keynote_kfa.md'
-    csv_path = OUT_DIR / 'keynote_kfa_notes.csv'
-    md_preview = md_path.read_text(encoding='utf-8', errors='ignore')[:50000]
+    md_path = pathlib.Path(result['md_path'])
+    csv_path = pathlib.Path(result['out_dir']) / 'keynote_kfa_notes.csv'
 
     def dl_link(p):
         return f"/download?path={urllib.parse.quote(str(p))}"
 
-    return f"""
+    head = f"""
 <!doctype html>
 <html lang="en">
 <head>
@@ -686,33 +811,32 @@ h1 {{
     </div>
     
     <div class="preview-content">
-      <div id="rendered-content" class="markdown-content">
-        {md_preview.replace('<', '&lt;').replace('>', '&gt;')}
-      </div>
+      <div id="rendered-content" class="markdown-content"></div>
       <div id="raw-content" class="raw-content">
-        <pre>{md_preview}</pre>
+        <pre id="raw-text">"""
+    tail = """</pre>
       </div>
     </div>
   </div>
 </div>
 
 <script>
-function showRendered() {{
+function showRendered() {
   document.getElementById('rendered-content').style.display = 'block';
   document.getElementById('raw-content').style.display = 'none';
   document.querySelectorAll('.toggle-btn')[0].classList.add('active');
   document.querySelectorAll('.toggle-btn')[1].classList.remove('active');
-}}
+}
 
-function showRaw() {{
+function showRaw() {
   document.getElementById('rendered-content').style.display = 'none';
   document.getElementById('raw-content').style.display = 'block';
   document.querySelectorAll('.toggle-btn')[0].classList.remove('active');
   document.querySelectorAll('.toggle-btn')[1].classList.add('active');
-}}
+}
 
 // Simple markdown-to-HTML conversion for basic formatting
-function renderMarkdown(text) {{
+function renderMarkdown(text) {
   return text
     .replace(/^### (.*$)/gim, '<h3>$1</h3>')
     .replace(/^## (.*$)/gim, '<h2>$1</h2>')
@@ -723,18 +847,100 @@ function renderMarkdown(text) {{
     .replace(/!\[([^\]]*)\]\(([^\)]*)\)/gim, '<img alt="$1" src="$2" />')
     .replace(/\[([^\]]*)\]\(([^\)]*)\)/gim, '<a href="$2">$1</a>')
     .replace(/\n$/gim, '<br />');
-}}
+}
 
 // Apply basic markdown rendering
-document.addEventListener('DOMContentLoaded', function() {{
+document.addEventListener('DOMContentLoaded', function() {
   const renderedContent = document.getElementById('rendered-content');
-  const rawText = `{md_preview}`;
-  renderedContent.innerHTML = renderMarkdown(rawText);
-}});
+  const rawText = document.getElementById('raw-text').textContent;
+  renderedContent.innerHTML = renderMarkdown(rawText.replace(/&/g, '&amp;').replace(/</g, '&lt;'));
+});
 </script>
 </body>
 </html>"""
 
+    def page():
+        # The report is streamed from disk into the <pre>, escaped piece by piece
+        yield head
+        with open(md_path, encoding='utf-8') as f:
+            for piece in iter(lambda: f.read(64 * 1024), ''):
+                yield html.escape(piece, quote=False)
+        yield tail
+
+    return StreamingResponse(page(), media_type='text/html; charset=utf-8')
+
+@app.post('/jobs', status_code=202)
+async def create_job(file: UploadFile, strategy: Optional[str] = Form('tokens'),
+                     speaker: Optional[str] = Form(None), event: Optional[str] = Form(None)):
+    # Queue the analysis and return at once; poll /jobs/{id} for progress
+    suffix = os.path.splitext(file.filename)[-1] or '.txt'
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(await file.read())
+        tmp_path = tmp.name
+    cfg = load_config('config.yaml')
+    cfg['chunking']['strategy'] = strategy or 'tokens'
+    _label_run(cfg, file.filename, speaker, event)
+    job_id = JOBS.submit(tmp_path, cfg)
+    return {'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'}
+
+@app.get('/jobs/{job_id}')
+def job_status(job_id: str):
+    job = JOBS.store.get(job_id)
+    if job is None:
+        return JSONResponse({'error': 'Not found'}, status_code=404)
+    job.pop('input_path', None)
+    if job['status'] == 'done':
+        job['result_url'] = f'/jobs/{job_id}/result'
+    return job
+
+@app.get('/jobs/{job_id}/result')
+def job_result(job_id: str, format: str = 'md'):
+    job = JOBS.store.get(job_id)
+    if job is None:
+        return PlainTextResponse("Not found", status_code=404)
+    if job['status'] != 'done':
+        return PlainTextResponse(f"Job is {job['status']}", status_code=409)
+    path = job['csv_path'] if format == 'csv' else job['md_path']
+    if not path or not pathlib.Path(path).exists():
+        return PlainTextResponse("Not found", status_code=404)
+    return FileResponse(path, filename=pathlib.Path(path).name)
+
+def _sse(event: dict) -> str:
+    name = event.pop('event')
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+@app.post('/analyze/stream')
+async def analyze_stream(file: UploadFile, strategy: Optional[str] = Form('tokens'),
+                         speaker: Optional[str] = Form(None), event: Optional[str] = Form(None)):
+    # Server-Sent Events: per-chunk DIAGNOSIS/REWRITE deltas as they are generated
+    suffix = os.path.splitext(file.filename)[-1] or '.txt'
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(await file.read())
+        tmp_path = tmp.name
+    cfg = load_config('config.yaml')
+    cfg['chunking']['strategy'] = strategy or 'tokens'
+    _label_run(cfg, file.filename, speaker, event)
+
+    def events():
+        # Sync generator: Starlette iterates it on a worker thread, off the event loop
+        try:
+            for event in stream_run(tmp_path, cfg):
+                yield _sse(event)
+        except Exception as e:
+            yield _sse({'event': 'error', 'message': str(e)})
+        finally:
+            os.unlink(tmp_path)
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.get('/metrics')
+def metrics():
+    # Prometheus scrape endpoint: totals of the runs finished in this process.
+    # Off unless metrics.prometheus is set.
+    if not load_config('config.yaml').get('metrics', {}).get('prometheus'):
+        return PlainTextResponse("Not found", status_code=404)
+    return PlainTextResponse(TOTALS.prometheus(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.get('/download')
 def download(path: str):
     # Allow only files under ./out
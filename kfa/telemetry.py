@@ -0,0 +1,273 @@
+"""
+Run instrumentation: timed spans per stage, latency and token usage per provider call,
+a JSON run report, and process-wide totals in the Prometheus text format
+"""
+import contextvars, json, math, threading, time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from .files import atomic_write
+from .providers.base import BaseProvider
+
+# Usage reported by the innermost provider (note_usage) lands in the dict the
+# InstrumentedProvider put here for the call in flight; labels name the chunk.
+# Both are set and read on the thread or task that makes the call.
+_usage = contextvars.ContextVar('kfa_usage', default=None)
+_labels = contextvars.ContextVar('kfa_labels', default={})
+
+
+def note_usage(input_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+    """Called by providers with the token counts of one API call (a no-op outside a run)"""
+    u = _usage.get()
+    if u is not None:
+        u['attempts'] += 1
+        u['input_tokens'] += input_tokens or 0
+        u['output_tokens'] += output_tokens or 0
+
+
+def note_cache_hit() -> None:
+    """Called by kfa.cache when a call is answered from the cache"""
+    u = _usage.get()
+    if u is not None:
+        u['cached'] = True
+
+
+@contextmanager
+def labelled(**labels):
+    """Attach labels (e.g. chunk=3) to the provider calls made inside the block"""
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not values:
+        return None
+    s = sorted(values)
+    return s[max(0, math.ceil(q / 100 * len(s)) - 1)]
+
+
+class RunMetrics:
+    """Spans and provider calls of one run. Thread-safe; spans may overlap."""
+
+    def __init__(self, run_id: str = '', **info):
+        self.run_id = run_id
+        self.info = info
+        self.started = time.time()
+        self.spans: List[Dict] = []
+        self.calls: List[Dict] = []
+        self.stage: Optional[str] = None  # innermost open stage, tagged onto calls
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._t0
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start, outer = self._now(), self.stage
+        self.stage = name
+        try:
+            yield
+        finally:
+            self.stage = outer
+            rec = {'name': name, 'start_s': round(start, 6), 'duration_s': round(self._now() - start, 6), **attrs}
+            with self._lock:
+                self.spans.append(rec)
+
+    def instrument(self, provider: BaseProvider) -> 'InstrumentedProvider':
+        return InstrumentedProvider(provider, self)
+
+    def _call(self, model: str, start: float, usage: Dict, error: Optional[Exception]) -> None:
+        rec = {'model': model, 'stage': self.stage, **_labels.get(), 'start_s': round(start, 6),
+               'latency_s': round(self._now() - start, 6), **usage, 'error': str(error) if error else None}
+        with self._lock:
+            self.calls.append(rec)
+
+    def report(self, chunk_ids: Optional[List[int]] = None) -> Dict:
+        """The run report. chunk_ids maps the `chunk` label of calls (an index into the
+        critiqued chunks) back to chunk numbers, when only some chunks were critiqued."""
+        with self._lock:
+            spans, calls = list(self.spans), list(self.calls)
+        stages: Dict[str, float] = {}
+        for s in spans:
+            stages[s['name']] = round(stages.get(s['name'], 0.0) + s['duration_s'], 6)
+        chunks: Dict[tuple, Dict] = {}
+        for c in calls:
+            if 'chunk' not in c:
+                continue
+            i = chunk_ids[c['chunk']] if chunk_ids else c['chunk']
+            key = (c.get('document'), i)
+            ch = chunks.setdefault(key, {**({'document': key[0]} if key[0] else {}), 'id': i, 'start_s': c['start_s'],
+                                         'latency_s': 0.0, 'calls': 0, 'attempts': 0,
+                                         'input_tokens': 0, 'output_tokens': 0, 'cached': True, 'error': None})
+            ch['latency_s'] = round(ch['latency_s'] + c['latency_s'], 6)
+            ch['calls'] += 1
+            for k in ('attempts', 'input_tokens', 'output_tokens'):
+                ch[k] += c[k]
+            ch['cached'] = ch['cached'] and c['cached']
+            ch['error'] = c['error'] or ch['error']
+        return {
+            'run_id': self.run_id,
+            **self.info,
+            'started': self.started,
+            'wall_s': round(self._now(), 6),
+            'stages': stages,
+            'calls': call_summary(calls),
+            'chunks': sorted(chunks.values(), key=lambda ch: (ch.get('document') or '', ch['id'])),
+            'spans': spans,
+        }
+
+    def finish(self, path: Optional[str] = None, chunk_ids: Optional[List[int]] = None) -> Dict:
+        """Build the report, add it to the process totals and write it to `path` if given"""
+        report = self.report(chunk_ids)
+        TOTALS.add(report, self.calls)
+        if path:
+            atomic_write(path, json.dumps(report, indent=1, ensure_ascii=False))
+        return report
+
+
+def call_summary(calls: List[Dict]) -> Dict:
+    """Counts, tokens and latency percentiles of provider calls, overall and per stage"""
+    def summary(cs):
+        live = [c['latency_s'] for c in cs if not c['cached']]
+        return {
+            'count': len(cs),
+            'cached': sum(c['cached'] for c in cs),
+            'errors': sum(1 for c in cs if c['error']),
+            'attempts': sum(c['attempts'] for c in cs),
+            'input_tokens': sum(c['input_tokens'] for c in cs),
+            'output_tokens': sum(c['output_tokens'] for c in cs),
+            'latency_p50_s': percentile(live, 50),
+            'latency_p95_s': percentile(live, 95),
+            'latency_max_s': max(live, default=None),
+        }
+    stages = sorted({c['stage'] or '' for c in calls})
+    return {**summary(calls), 'by_stage': {s: summary([c for c in calls if (c['stage'] or '') == s]) for s in stages}}
+
+
+def _new_usage() -> Dict:
+    return {'attempts': 0, 'input_tokens': 0, 'output_tokens': 0, 'cached': False}
+
+
+class InstrumentedProvider(BaseProvider):
+    # Outermost wrapper: times every call as the pipeline sees it (cache hits, rate
+    # limiting and retries included) and collects the usage the inner provider notes
+    def __init__(self, provider: BaseProvider, metrics: RunMetrics):
+        self.provider = provider
+        self.metrics = metrics
+
+    def _begin(self):
+        usage = _new_usage()
+        return usage, _usage.set(usage), self.metrics._now()
+
+    def respond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        usage, token, start = self._begin()
+        error = None
+        try:
+            return self.provider.respond(messages, model, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _usage.reset(token)
+            self.metrics._call(model, start, usage, error)
+
+    async def arespond(self, messages: List[Dict[str, str]], model: str, **kwargs) -> str:
+        usage, token, start = self._begin()
+        error = None
+        try:
+            return await self.provider.arespond(messages, model, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _usage.reset(token)
+            self.metrics._call(model, start, usage, error)
+
+    def stream(self, messages: List[Dict[str, str]], model: str, **kwargs) -> Iterator[str]:
+        # The context var is set around each step only: a generator may resume on another context
+        usage, start, error = _new_usage(), self.metrics._now(), None
+        it = iter(self.provider.stream(messages, model, **kwargs))
+        try:
+            while True:
+                token = _usage.set(usage)
+                try:
+                    delta = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    _usage.reset(token)
+                yield delta
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.metrics._call(model, start, usage, error)
+
+
+class _Totals:
+    # Process-wide counters across finished runs, for the /metrics endpoint
+    BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.stage_seconds: Dict[str, float] = {}
+        self.calls: Dict[tuple, int] = {}
+        self.tokens: Dict[tuple, int] = {}
+        self.latency: Dict[str, List] = {}  # model -> [bucket counts..., +Inf count, sum]
+
+    def add(self, report: Dict, calls: List[Dict]) -> None:
+        with self._lock:
+            self.runs += 1
+            for stage, s in report['stages'].items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + s
+            for c in calls:
+                status = 'error' if c['error'] else 'cached' if c['cached'] else 'ok'
+                key = (c['model'], c['stage'] or '', status)
+                self.calls[key] = self.calls.get(key, 0) + 1
+                for kind in ('input', 'output'):
+                    self.tokens[(c['model'], kind)] = self.tokens.get((c['model'], kind), 0) + c[f'{kind}_tokens']
+                if status == 'ok':
+                    h = self.latency.setdefault(c['model'], [0] * (len(self.BUCKETS) + 1) + [0.0])
+                    for k, b in enumerate(self.BUCKETS):
+                        if c['latency_s'] <= b:
+                            h[k] += 1
+                    h[len(self.BUCKETS)] += 1
+                    h[-1] += c['latency_s']
+
+    def prometheus(self) -> str:
+        """Text exposition format (version 0.0.4)"""
+        def esc(v):
+            return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        lines = ['# HELP kfa_runs_total Finished pipeline runs.', '# TYPE kfa_runs_total counter']
+        with self._lock:
+            lines.append(f'kfa_runs_total {self.runs}')
+            lines += ['# HELP kfa_stage_seconds_total Time spent in each pipeline stage.',
+                      '# TYPE kfa_stage_seconds_total counter']
+            lines += [f'kfa_stage_seconds_total{{stage="{esc(s)}"}} {v:.6f}' for s, v in sorted(self.stage_seconds.items())]
+            lines += ['# HELP kfa_provider_calls_total Provider calls by model, stage and status (ok, cached, error).',
+                      '# TYPE kfa_provider_calls_total counter']
+            lines += [f'kfa_provider_calls_total{{model="{esc(m)}",stage="{esc(s)}",status="{st}"}} {n}'
+                      for (m, s, st), n in sorted(self.calls.items())]
+            lines += ['# HELP kfa_provider_tokens_total Tokens billed by model and direction.',
+                      '# TYPE kfa_provider_tokens_total counter']
+            lines += [f'kfa_provider_tokens_total{{model="{esc(m)}",direction="{kind}"}} {n}'
+                      for (m, kind), n in sorted(self.tokens.items())]
+            lines += ['# HELP kfa_provider_call_seconds Latency of uncached provider calls, retries included.',
+                      '# TYPE kfa_provider_call_seconds histogram']
+            for m, h in sorted(self.latency.items()):
+                for k, b in enumerate(self.BUCKETS):
+                    lines.append(f'kfa_provider_call_seconds_bucket{{model="{esc(m)}",le="{b}"}} {h[k]}')
+                n = h[len(self.BUCKETS)]
+                lines.append(f'kfa_provider_call_seconds_bucket{{model="{esc(m)}",le="+Inf"}} {n}')
+                lines.append(f'kfa_provider_call_seconds_sum{{model="{esc(m)}"}} {h[-1]:.6f}')
+                lines.append(f'kfa_provider_call_seconds_count{{model="{esc(m)}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+TOTALS = _Totals()
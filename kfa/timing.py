@@ -0,0 +1,92 @@
+"""
+SRT cue timings kept alongside the transcript text, and time-window chunking
+"""
+import bisect, re
+from array import array
+from typing import List, Optional, Tuple
+from .chunking import Chunk, simple_token_estimate, strip_span
+
+_TIMESTAMP = re.compile(r'(\d+):(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?')
+
+
+def parse_timestamp(s: str) -> Optional[float]:
+    """'00:01:02,500' -> 62.5 seconds"""
+    m = _TIMESTAMP.search(s)
+    if not m:
+        return None
+    h, mi, sec, ms = m.groups()
+    return int(h) * 3600 + int(mi) * 60 + int(sec) + int((ms or '0').ljust(3, '0')) / 1000
+
+
+def parse_cue_timing(line: str) -> Optional[Tuple[float, float]]:
+    """'00:00:01,000 --> 00:00:04,000' -> (1.0, 4.0)"""
+    left, _, right = line.partition('-->')
+    start, end = parse_timestamp(left), parse_timestamp(right)
+    return (start, end) if start is not None and end is not None else None
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class Cues:
+    """Cue timings as parallel arrays: start/end seconds and the character span of each
+    cue's text in the transcript. About 32 bytes per cue, searchable by offset or time."""
+
+    def __init__(self):
+        self.start = array('d')
+        self.end = array('d')
+        self.offset = array('q')
+        self.length = array('q')
+
+    def append(self, start: float, end: float, offset: int, length: int) -> None:
+        self.start.append(start)
+        self.end.append(end)
+        self.offset.append(offset)
+        self.length.append(length)
+
+    def __len__(self):
+        return len(self.start)
+
+    def at_offset(self, offset: int) -> int:
+        """Index of the cue whose text starts at or before `offset`"""
+        return max(0, bisect.bisect_right(self.offset, offset) - 1)
+
+    def span(self, first: int, last: int) -> Tuple[float, float]:
+        """(start, end) seconds covered by the text between two character offsets"""
+        return self.start[self.at_offset(first)], self.end[self.at_offset(max(first, last - 1))]
+
+
+def time_span(chunk) -> Optional[Tuple[float, float]]:
+    """(start, end) seconds of a chunk, or None if it carries no timing"""
+    start_s = getattr(chunk, 'start_s', None)
+    return (start_s, chunk.end_s) if start_s is not None else None
+
+
+def timed(text: str, cues: Optional[Cues], first: int, last: int, count_tokens=None, id: int = 0) -> Chunk:
+    # text[first:last], stripped, as a Chunk with its media time span when cues are known
+    start, end = strip_span(text, first, last)
+    count = count_tokens or simple_token_estimate
+    times = cues.span(first, last) if cues and len(cues) else (None, None)
+    return Chunk(text, start, end, count(text[start:end]), id=id, start_s=times[0], end_s=times[1])
+
+
+def chunk_by_time(text: str, cues: Cues, window_s: float = 300, count_tokens=None) -> List[Chunk]:
+    """Consecutive cues grouped into windows of `window_s` seconds of media time.
+
+    Each cue belongs to the window its start falls in; a chunk runs from the first to
+    the last cue of its window, so chunks are whole cues and never overlap.
+    """
+    count = count_tokens or simple_token_estimate
+    chunks, k, n = [], 0, len(cues)
+    while k < n:
+        bucket = int(cues.start[k] // window_s)
+        j = k
+        while j + 1 < n and int(cues.start[j + 1] // window_s) == bucket:
+            j += 1
+        first, last = cues.offset[k], cues.offset[j] + cues.length[j]
+        chunks.append(Chunk(text, first, last, count(text[first:last]), id=len(chunks),
+                            start_s=cues.start[k], end_s=cues.end[j]))
+        k = j + 1
+    return chunks
@@ -0,0 +1,56 @@
+"""
+Pluggable token counting for chunk budgets
+"""
+from functools import lru_cache
+from typing import Callable, Optional
+
+TokenCounter = Callable[[str], int]
+
+# Rules of thumb for OpenAI BPE vocabularies on English prose
+CHARS_PER_TOKEN = 4.0
+TOKENS_PER_WORD = 4 / 3
+
+
+def estimate_tokens(s: str) -> int:
+    """Dependency-free estimate: mean of the char-based and word-based rules.
+
+    The two rules err in opposite directions (long words vs. short, punctuated
+    words), so averaging them lands closer to real BPE counts than either alone.
+    """
+    return max(1, round((len(s) / CHARS_PER_TOKEN + len(s.split()) * TOKENS_PER_WORD) / 2))
+
+
+def tiktoken_counter(model: Optional[str] = None) -> TokenCounter:
+    """Exact BPE counter; raises if tiktoken or its encoding files are unavailable"""
+    import tiktoken
+    try:
+        enc = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding('o200k_base')
+    except KeyError:
+        # Unknown or fine-tuned model names fall back to the current default vocabulary
+        enc = tiktoken.get_encoding('o200k_base')
+
+    def count(s: str) -> int:
+        return max(1, len(enc.encode(s, disallowed_special=())))
+
+    return count
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(kind: str = 'auto', model: Optional[str] = None, memo_size: int = 65536) -> TokenCounter:
+    """Return a memoized counter.
+
+    kind: 'tiktoken' (exact, required), 'estimate' (offline heuristic), or 'auto'
+    (tiktoken when it loads, otherwise the estimate).
+    """
+    if kind == 'estimate':
+        counter = estimate_tokens
+    elif kind in ('tiktoken', 'auto'):
+        try:
+            counter = tiktoken_counter(model)
+        except Exception:
+            if kind == 'tiktoken':
+                raise
+            counter = estimate_tokens
+    else:
+        raise ValueError(f'Unsupported tokenizer: {kind}')
+    return lru_cache(maxsize=memo_size)(counter)
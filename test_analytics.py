@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the tag analytics index
+"""
+import pytest
+from kfa.analytics import TagIndex
+from kfa.cli import stream_run
+from kfa.config import load_config
+from kfa.providers.mock import MockProvider
+
+
+def outputs(*tag_lists):
+    return [{'id': i, 'text': f'chunk {i}', 'kfa': f"[DIAGNOSIS]: {' '.join(tags)}\n[REWRITE]: x"}
+            for i, tags in enumerate(tag_lists)]
+
+
+def test_frequency_by_speaker_event_and_time(tmp_path):
+    """Counts group by any dimension and filter by speaker, event, tag and time"""
+    idx = TagIndex(tmp_path / 'tags.sqlite3')
+    day = 86400
+    idx.add_run('r1', 'a.md', outputs(['PACE_CONTROL', 'HOOK'], ['PACE_CONTROL']), speaker='ann', event='conf', created=10 * day)
+    idx.add_run('r2', 'b.md', outputs(['HOOK'], ['NOT_A_TAG']), speaker='bo', event='conf', created=40 * day)
+    idx.add_run('r3', 'a.md', outputs(['PACE_CONTROL']), speaker='ann', event='meetup', created=41 * day)
+
+    top = idx.frequency()
+    assert [(r['tag'], r['hits']) for r in top] == [('PACE_CONTROL', 3), ('HOOK', 2)]
+    ann = idx.frequency(by=['speaker'], tag='PACE_CONTROL')
+    assert ann == [{'speaker': 'ann', 'hits': 3, 'documents': 2}]
+    assert idx.frequency(by=['event', 'tag'], event='conf', tag='HOOK')[0]['hits'] == 2
+    assert [r['month'] for r in idx.frequency(by=['month'])] == ['1970-01', '1970-02']
+    assert idx.frequency(since=40 * day, tag='PACE_CONTROL')[0]['hits'] == 1
+    assert idx.frequency(latest_only=True, speaker='ann')[0]['hits'] == 1
+
+    # Re-indexing a run replaces it rather than double counting
+    idx.add_run('r3', 'a.md', outputs(['HOOK']), speaker='ann', event='meetup', created=41 * day)
+    assert idx.frequency(by=['run'], tag='HOOK')[-1] == {'run': 'r3', 'hits': 1, 'documents': 1}
+    assert len(idx.documents(speaker='ann')) == 2
+
+    with pytest.raises(ValueError):
+        idx.frequency(by=['colour'])
+
+
+def test_upload_is_indexed_under_its_own_name(tmp_path):
+    """A run from a temp file is indexed under analytics.document with the given speaker/event"""
+    tmp = tmp_path / 'tmpx8f3k2.txt'
+    tmp.write_text("We shipped it. Then we learned what it was for. " * 40)
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['cache']['enabled'] = False
+    cfg['analytics'].update(document='keynote.txt', speaker='ann', event='conf')
+    list(stream_run(str(tmp), cfg, provider=MockProvider()))
+    docs = TagIndex(tmp_path / 'out' / 'tags.sqlite3').documents()
+    assert [(d['document'], d['speaker'], d['event']) for d in docs] == [('keynote.txt', 'ann', 'conf')]
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_frequency_by_speaker_event_and_time(pathlib.Path(tempfile.mkdtemp()))
+    test_upload_is_indexed_under_its_own_name(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Analytics tests passed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for auto chunk sizing from the latency profile
+"""
+from kfa.autochunk import PRIOR, Fit, LatencyProfile, choose, estimate
+from kfa.bench import synthetic_keynote
+from kfa.cli import run
+from kfa.config import load_config
+from kfa.providers.mock import MockProvider
+
+
+def test_choose_minimizes_time_or_cost():
+    """'time' fills the concurrency budget; 'cost' avoids paying prompts and overlap many times"""
+    fit = Fit(base_s=2.0, per_token_s=0.002, out_base=300, out_per_token=0.4)
+    fast = choose(20000, fit, concurrency=8, objective='time', prompt_tokens=200)
+    cheap = choose(20000, fit, concurrency=8, objective='cost', prompt_tokens=200)
+    every = [estimate(20000, s, max(50, round(s * 0.1)), fit, 8, prompt_tokens=200) for s in range(800, 4001, 100)]
+    assert fast.est_wall_s <= min(o.est_wall_s for o in every) * 1.05
+    assert cheap.est_cost <= min(o.est_cost for o in every) * 1.05
+    assert fast.calls > cheap.calls and fast.chunk_tokens < cheap.chunk_tokens
+
+    # Nothing below the quality floor, and a short talk is one chunk
+    floor = choose(20000, Fit(0.0, 0.01, 0, 0), concurrency=64, min_chunk_tokens=1200, min_overlap_tokens=150)
+    assert floor.chunk_tokens >= 1200 and floor.overlap_tokens >= 150
+    assert choose(500, fit, concurrency=4).calls == 1
+
+
+def test_profile_fits_clean_calls(tmp_path):
+    """Only single-attempt, uncached, successful chunk calls are learned from"""
+    prof = LatencyProfile(tmp_path / 'p.json')
+    assert prof.fit('m') == PRIOR
+    chunks = [{'input_tokens': x, 'output_tokens': 100 + x // 2, 'latency_s': 1.0 + 0.001 * x,
+               'attempts': 1, 'calls': 1, 'cached': False, 'error': None} for x in range(500, 3000, 250)]
+    noise = [dict(chunks[0], latency_s=99.0, attempts=3), dict(chunks[1], cached=True, attempts=0)]
+    assert prof.add_report({'settings': {'style_model': 'm'}, 'chunks': chunks + noise}) == len(chunks)
+    fit = prof.fit('m')
+    assert fit.samples == len(chunks)
+    assert abs(fit.base_s - 1.0) < 1e-6 and abs(fit.per_token_s - 0.001) < 1e-9
+    assert abs(fit.out_per_token - 0.5) < 0.01
+    assert prof.fit('other') == PRIOR
+
+
+def test_auto_strategy_learns_between_runs(tmp_path):
+    """An auto run records its calls; the next auto run sizes chunks from them"""
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['analytics']['enabled'] = False
+    cfg['cache']['enabled'] = False
+    cfg['chunking']['strategy'] = 'auto'
+    cfg['chunking']['auto'].update(min_chunk_tokens=300, max_chunk_tokens=2000)
+    p = tmp_path / 'talk.txt'
+    p.write_text(synthetic_keynote(6000))
+    mock = MockProvider(per_token=0.00002)
+    first = run(str(p), cfg, provider=mock)
+    choice = first['report']['auto_chunking']
+    assert len(first['outputs']) == choice['calls'] > 1
+    assert all(o['text'].tokens <= choice['chunk_tokens'] for o in first['outputs'])
+    cfg['chunking']['chunk_tokens'] = 0  # ignored by auto
+    second = run(str(p), cfg, provider=mock)
+    assert LatencyProfile(tmp_path / 'out' / 'latency_profile.json').fit(cfg['models']['style_model']).samples >= 8
+    assert second['report']['auto_chunking']['chunk_tokens'] >= 300
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_choose_minimizes_time_or_cost()
+    test_profile_fits_clean_calls(pathlib.Path(tempfile.mkdtemp()))
+    test_auto_strategy_learns_between_runs(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Auto chunking tests passed!")
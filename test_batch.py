@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for batch mode with the local batch provider
+"""
+import json
+from kfa.providers.base import BaseProvider
+from kfa.providers.local_batch import LocalBatchProvider
+from kfa.batch import write_batch_file, critique_chunks_batch
+from kfa.bench import synthetic_keynote
+from kfa.cli import run_batch
+from kfa.config import load_config
+
+
+class EchoProvider(BaseProvider):
+    def respond(self, messages, model, **kwargs):
+        snippet = messages[-1]['content']
+        if 'bad' in snippet:
+            raise RuntimeError('refused')
+        return f"[DIAGNOSIS]: HOOK {model}"
+
+
+def test_batch_file_format(tmp_path):
+    """One Responses API request per chunk, keyed by chunk index"""
+    path = write_batch_file(['one', 'two'], 'm', tmp_path / 'b.jsonl', temperature=0.3)
+    rows = [json.loads(l) for l in open(path, encoding='utf-8')]
+    assert [r['custom_id'] for r in rows] == ['chunk-0', 'chunk-1']
+    assert rows[0]['url'] == '/v1/responses'
+    assert rows[0]['body']['temperature'] == 0.3 and rows[0]['body']['model'] == 'm'
+
+
+def test_critique_chunks_batch(tmp_path):
+    """Results come back in order with per-chunk errors"""
+    outputs = critique_chunks_batch(
+        LocalBatchProvider(EchoProvider()), 'm', ['good one', 'bad one', 'good two'],
+        tmp_path / 'b.jsonl', poll_interval=0.01, timeout=5,
+    )
+    assert [o['id'] for o in outputs] == [0, 1, 2]
+    assert outputs[0]['kfa'] == '[DIAGNOSIS]: HOOK m'
+    assert outputs[1]['error'] == 'refused'
+    assert (tmp_path / 'b.id').read_text().startswith('local-')
+
+
+
+class CountingBatchProvider(LocalBatchProvider):
+    def __init__(self, provider):
+        super().__init__(provider)
+        self.submitted = 0
+
+    def submit(self, requests_path):
+        self.submitted += 1
+        return super().submit(requests_path)
+
+
+def test_resume_reattaches_to_saved_batch(tmp_path):
+    """--resume polls the batch an interrupted run submitted instead of paying again"""
+    batch = CountingBatchProvider(EchoProvider())
+    kw = dict(poll_interval=0.01, timeout=5)
+    first = critique_chunks_batch(batch, 'm', ['good one', 'good two'], tmp_path / 'b.jsonl', **kw)
+    again = critique_chunks_batch(batch, 'm', ['good one', 'good two'], tmp_path / 'b.jsonl', resume=True, **kw)
+    assert batch.submitted == 1 and again == first
+    critique_chunks_batch(batch, 'm', ['good one', 'changed'], tmp_path / 'b.jsonl', resume=True, **kw)
+    assert batch.submitted == 2  # different requests: a new batch
+    fresh = CountingBatchProvider(EchoProvider())  # a new process does not know local batches
+    critique_chunks_batch(fresh, 'm', ['good one', 'changed'], tmp_path / 'b.jsonl', resume=True, **kw)
+    assert fresh.submitted == 1
+
+
+class ForgetfulBatchProvider(CountingBatchProvider):
+    """Answers for batch ids in `gone` like the OpenAI client does for unknown ids"""
+
+    def __init__(self, provider):
+        super().__init__(provider)
+        self.gone = set()
+
+    def status(self, batch_id):
+        if batch_id in self.gone:
+            err = RuntimeError(f'No batch found with id {batch_id}')
+            err.status_code = 404  # like openai.NotFoundError
+            raise err
+        return super().status(batch_id)
+
+
+def test_resume_resubmits_failed_or_unknown_batches(tmp_path):
+    """A saved batch that failed, or that the API no longer knows, is replaced by a new one"""
+    batch = ForgetfulBatchProvider(EchoProvider())
+    kw = dict(poll_interval=0.01, timeout=5)
+    critique_chunks_batch(batch, 'm', ['good one'], tmp_path / 'b.jsonl', **kw)
+    failed = (tmp_path / 'b.id').read_text()
+    batch._batches[failed]['status'] = 'failed'
+    again = critique_chunks_batch(batch, 'm', ['good one'], tmp_path / 'b.jsonl', resume=True, **kw)
+    assert batch.submitted == 2 and again[0]['kfa'] == '[DIAGNOSIS]: HOOK m'
+
+    batch.gone.add((tmp_path / 'b.id').read_text())
+    critique_chunks_batch(batch, 'm', ['good one'], tmp_path / 'b.jsonl', resume=True, **kw)
+    assert batch.submitted == 3 and (tmp_path / 'b.id').read_text() not in batch.gone | {failed}
+
+
+def test_batch_run_with_mock_provider(tmp_path, monkeypatch, capsys):
+    """With provider: mock, --batch runs the batch in-process, needs no API key and settles the cache"""
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg.update(provider='mock')
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['analytics']['enabled'] = False
+    cfg['cache']['dir'] = str(tmp_path / 'cache')
+    cfg['batch']['poll_interval_s'] = 0.01
+    p = tmp_path / 'talk.txt'
+    p.write_text(synthetic_keynote(1500))
+    result = run_batch(str(p), cfg)
+    assert result['outputs'] and not any(o.get('error') for o in result['outputs'])
+    assert f"Cache: 0 hits, {len(result['outputs'])} misses" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_batch_file_format(pathlib.Path(tempfile.mkdtemp()))
+    test_critique_chunks_batch(pathlib.Path(tempfile.mkdtemp()))
+    test_resume_reattaches_to_saved_batch(pathlib.Path(tempfile.mkdtemp()))
+    test_resume_resubmits_failed_or_unknown_batches(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Batch tests passed!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the provider response cache
+"""
+import os, time
+from kfa.providers.base import BaseProvider
+from kfa.cache import ResponseCache, CachedProvider, cache_key
+
+
+class CountingProvider(BaseProvider):
+    def __init__(self):
+        self.calls = 0
+
+    def respond(self, messages, model, **kwargs):
+        self.calls += 1
+        return f"{model}:{messages[-1]['content']}:{self.calls}"
+
+
+MSGS = [{'role': 'user', 'content': 'hello'}]
+
+
+def test_cache_hits_and_misses(tmp_path):
+    """Identical requests are served from disk; changed params miss"""
+    inner = CountingProvider()
+    provider = CachedProvider(inner, ResponseCache(str(tmp_path)))
+    first = provider.respond(MSGS, 'm', temperature=0.2)
+    assert provider.respond(MSGS, 'm', temperature=0.2) == first
+    provider.respond(MSGS, 'm', temperature=0.7)
+    assert inner.calls == 2
+    assert provider.cache.stats() == {'hits': 1, 'misses': 2}
+    assert not list(tmp_path.rglob('*.tmp'))  # entries are written atomically, no temp files left
+
+
+def test_cache_bypass_refreshes(tmp_path):
+    """Bypass always calls the provider and overwrites the stored response"""
+    inner = CountingProvider()
+    cache = ResponseCache(str(tmp_path))
+    CachedProvider(inner, cache).respond(MSGS, 'm')
+    fresh = CachedProvider(inner, cache, bypass=True).respond(MSGS, 'm')
+    assert inner.calls == 2
+    assert cache.get(cache_key('m', MSGS)) == fresh
+
+
+def test_cache_eviction(tmp_path):
+    """Expired entries go first, then the oldest until under the size cap"""
+    cache = ResponseCache(str(tmp_path), max_mb=None, max_age_days=1)
+    cache.put('aa01', 'old')
+    old = time.time() - 2 * 86400
+    os.utime(cache._path('aa01'), (old, old))
+    cache.put('bb02', 'new')
+    assert cache.evict() == 1
+    assert cache.get('aa01') is None and cache.get('bb02') == 'new'
+
+    cache.max_bytes = 1
+    assert cache.evict() == 1
+    assert cache.get('bb02') is None
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    for t in (test_cache_hits_and_misses, test_cache_bypass_refreshes, test_cache_eviction):
+        t(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Cache tests passed!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for checkpoint journals and resumed runs
+"""
+import pytest
+from kfa.config import load_config
+from kfa.providers.base import BaseProvider
+from kfa.checkpoint import Journal, journal_path, find_unfinished
+from kfa.cli import run
+
+
+class Crash(BaseException):
+    """Stands in for the process being killed: not caught as a chunk failure"""
+
+
+class CrashingProvider(BaseProvider):
+    def __init__(self, crash_after=None):
+        self.crash_after = crash_after
+        self.calls = 0
+
+    def respond(self, messages, model, **kwargs):
+        if self.crash_after is not None and self.calls >= self.crash_after:
+            raise Crash()
+        self.calls += 1
+        return f"[DIAGNOSIS]: PACE_CONTROL call {self.calls}"
+
+
+def make_cfg(tmp_path):
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['chunking']['chunk_tokens'] = 100
+    cfg['params']['concurrency'] = 1
+    return cfg
+
+
+def test_journal_ignores_torn_tail_and_other_settings(tmp_path):
+    """Entries survive reopen; a half-written line and mismatched settings are dropped"""
+    settings = {'style_model': 'm'}
+    j = Journal(tmp_path, 'talk.md', settings)
+    j.record({'id': 0, 'text': 'a', 'kfa': 'A'})
+    j.record({'id': 1, 'text': 'b', 'kfa': '[ERROR]: x', 'error': 'x'})
+    with open(journal_path(tmp_path), 'a', encoding='utf-8') as fh:
+        fh.write('{"type": "chunk", "id": 2, "fp"')
+    assert list(Journal(tmp_path, 'talk.md', settings).load().values()) == ['A']
+    assert Journal(tmp_path, 'talk.md', {'style_model': 'other'}).load() == {}
+    assert Journal(tmp_path, 'other.md', settings).load() == {}
+
+
+def test_resume_skips_finished_chunks(tmp_path):
+    """A run killed midway resumes with only the unfinished chunks"""
+    cfg = make_cfg(tmp_path)
+    talk = tmp_path / 'talk.txt'
+    talk.write_text(" ".join(f"Sentence {i} of a long keynote transcript." for i in range(120)))
+
+    with pytest.raises(Crash):
+        run(str(talk), cfg, provider=CrashingProvider(crash_after=3), run_id='r1')
+    assert find_unfinished(cfg['io']['out_dir'], str(talk)) == 'r1'
+
+    provider = CrashingProvider()
+    result = run(str(talk), cfg, provider=provider, resume=True)
+    assert result['run_id'] == 'r1'
+    assert provider.calls == len(result['outputs']) - 3
+    assert all('error' not in o for o in result['outputs'])
+    assert find_unfinished(cfg['io']['out_dir'], str(talk)) is None
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_journal_ignores_torn_tail_and_other_settings(pathlib.Path(tempfile.mkdtemp()))
+    test_resume_skips_finished_chunks(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Checkpoint tests passed!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for sentence splitting and chunk packing
+"""
+import io
+from kfa.chunking import Chunk, naive_sentence_split, iter_sentences, iter_chunks, chunk_text, chunk_text_stable, simple_token_estimate
+from kfa.incremental import fingerprint
+from kfa.timing import time_span
+
+
+SAMPLE = "First point. Second point!  Third?\n\nNew paragraph here. " * 40 + "Closing line."
+
+
+def test_iter_sentences_matches_split():
+    """Streaming split gives the same sentences however the input is cut up"""
+    for step in (1, 3, 7, 64):
+        pieces = [SAMPLE[i:i + step] for i in range(0, len(SAMPLE), step)]
+        assert list(iter_sentences(pieces)) == naive_sentence_split(SAMPLE)
+
+
+def test_chunks_respect_budget_and_overlap():
+    """Chunks stay within budget and start with the tail of the previous chunk"""
+    chunks = [c.text for c in chunk_text(SAMPLE, chunk_tokens=60, overlap_tokens=10)]
+    assert len(chunks) > 5
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert sum(simple_token_estimate(s) for s in naive_sentence_split(cur)) <= 60
+        first = naive_sentence_split(cur)[0]
+        assert first in prev
+
+
+def test_iter_chunks_streams_file():
+    """A file object chunks the same as the full string"""
+    assert list(iter_chunks(io.StringIO(SAMPLE), 60, 10)) == chunk_text(SAMPLE, 60, 10)
+
+
+def test_chunks_carry_offsets_and_overlap():
+    """Each chunk is its exact span of the source and knows the prefix it repeats from the one before"""
+    pieces = [SAMPLE[i:i + 5] for i in range(0, len(SAMPLE), 5)]
+    for chunks in (chunk_text(SAMPLE, 60, 10), list(iter_chunks(pieces, 60, 10)), chunk_text_stable(SAMPLE, 60, 10)):
+        assert chunks[0].overlap == 0 and chunks[0].start == 0
+        for prev, cur in zip(chunks, chunks[1:]):
+            assert cur.text == SAMPLE[cur.start:cur.end] and cur.id == prev.id + 1
+            assert cur.overlap > 0 and prev.text.endswith(cur.text[:cur.overlap])
+            assert prev.start < cur.start < prev.end <= cur.end
+        assert chunks[-1].end == len(SAMPLE)
+    assert [c.overlap for c in chunk_text(SAMPLE, 60, 0)][1:] == [0] * (len(chunk_text(SAMPLE, 60, 0)) - 1)
+
+
+def test_chunk_records_share_the_source():
+    """Chunks slice one buffer; pieces of a long chunk keep document offsets and times"""
+    chunks = chunk_text(SAMPLE, 400, 0)
+    assert all(c._buf is SAMPLE for c in chunks) and not hasattr(chunks[0], '__dict__')
+    assert chunks[1].hash == fingerprint(chunks[1].text) == fingerprint(chunks[1])
+    scene = Chunk(SAMPLE, chunks[0].start, chunks[0].end, start_s=60.0, end_s=90.0)
+    pieces = chunk_text(scene, 60, 10)
+    assert len(pieces) > 1 and pieces[0].start == scene.start and pieces[-1].end == scene.end
+    assert all(p._buf is SAMPLE and p.text == SAMPLE[p.start:p.end] for p in pieces)
+    assert {time_span(p) for p in pieces} == {(60.0, 90.0)}
+    assert all(0 < p.tokens <= 60 for p in pieces)
+
+
+def test_oversized_sentence_has_no_empty_chunk():
+    """A sentence larger than the budget becomes its own chunk"""
+    text = "Short. " + "x" * 400 + ". Tail."
+    chunks = [c.text for c in chunk_text(text, chunk_tokens=20, overlap_tokens=5)]
+    assert "" not in chunks
+    assert any("x" * 400 in c for c in chunks)
+
+
+if __name__ == "__main__":
+    test_iter_sentences_matches_split()
+    test_chunks_respect_budget_and_overlap()
+    test_iter_chunks_streams_file()
+    test_chunks_carry_offsets_and_overlap()
+    test_chunk_records_share_the_source()
+    test_oversized_sentence_has_no_empty_chunk()
+    print("✅ Chunking tests passed!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent chunk critique
+"""
+import asyncio, threading, time
+from types import SimpleNamespace
+import pytest
+from kfa.cache import CachedProvider, ResponseCache
+from kfa.providers.base import BaseProvider
+from kfa.providers.openai_provider import OpenAIProvider, StreamError
+from kfa.critique import critique_chunks, acritique_chunks, stream_critique_chunks
+
+
+class EchoProvider(BaseProvider):
+    """Returns the snippet back, sleeping longer for earlier chunks"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def respond(self, messages, model, **kwargs):
+        snippet = messages[-1]['content']
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.fail_on and self.fail_on in snippet:
+                raise RuntimeError('boom')
+            time.sleep(0.05 if 'chunk-0' in snippet else 0.01)
+            return snippet
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_critique_chunks_keeps_order():
+    """Results come back in chunk order even when they finish out of order"""
+    provider = EchoProvider()
+    chunks = [f'chunk-{i}' for i in range(8)]
+    outputs = critique_chunks(provider, 'test-model', chunks, concurrency=4)
+    assert [o['id'] for o in outputs] == list(range(8))
+    assert all(o['text'] in o['kfa'] for o in outputs)
+    assert 1 < provider.max_in_flight <= 4
+
+
+def test_critique_chunks_isolates_failures():
+    """One failing chunk does not abort the others"""
+    provider = EchoProvider(fail_on='chunk-2')
+    outputs = critique_chunks(provider, 'test-model', [f'chunk-{i}' for i in range(4)], concurrency=2)
+    assert [o['id'] for o in outputs if 'error' in o] == [2]
+    assert outputs[2]['kfa'].startswith('[ERROR]')
+    assert 'chunk-3' in outputs[3]['kfa']
+
+
+def test_acritique_chunks_uses_default_arespond():
+    """Sync-only providers work on the async path via BaseProvider.arespond"""
+    provider = EchoProvider(fail_on='chunk-1')
+    outputs = asyncio.run(acritique_chunks(provider, 'test-model', [f'chunk-{i}' for i in range(5)], concurrency=3))
+    assert [o['id'] for o in outputs] == list(range(5))
+    assert [o['id'] for o in outputs if 'error' in o] == [1]
+    assert provider.max_in_flight <= 3
+
+    threads = []
+    asyncio.run(acritique_chunks(EchoProvider(), 'test-model', ['a', 'b'], on_output=lambda o: threads.append(threading.get_ident())))
+    assert len(threads) == 2 and threading.get_ident() not in threads  # blocking hooks stay off the loop
+
+
+class WordStreamProvider(EchoProvider):
+    """Streams the snippet back one word at a time"""
+
+    def stream(self, messages, model, **kwargs):
+        for word in self.respond(messages, model, **kwargs).split():
+            yield word + ' '
+
+
+def test_stream_critique_chunks_in_order():
+    """Deltas arrive grouped per chunk and in chunk order, each closed by its output"""
+    provider = WordStreamProvider(fail_on='chunk-2')
+    events = list(stream_critique_chunks(provider, 'test-model', [f'chunk-{i}' for i in range(4)], concurrency=4))
+    ends = [(i, out) for i, delta, out in events if out is not None]
+    assert [i for i, _ in ends] == [0, 1, 2, 3]
+    assert 'error' in ends[2][1]
+    deltas = "".join(d for i, d, out in events if i == 1 and d)
+    assert deltas.strip() == ends[1][1]['kfa'].strip()
+    seen = [i for i, _, _ in events]
+    assert seen == sorted(seen)
+
+
+def test_stream_critique_chunks_stops_when_closed():
+    """Only `concurrency` chunks run ahead, and closing the stream early starts no more"""
+    provider = WordStreamProvider()
+    calls = []
+    respond = provider.respond
+    provider.respond = lambda messages, model, **kw: calls.append(1) or respond(messages, model, **kw)
+    events = stream_critique_chunks(provider, 'test-model', [f'chunk-{i}' for i in range(20)], concurrency=2)
+    start = time.monotonic()
+    next(events)
+    events.close()
+    assert time.monotonic() - start < 0.3
+    time.sleep(0.1)
+    assert len(calls) == 2
+
+
+class FakeResponses:
+    def __init__(self, *events):
+        self.events = events
+
+    def create(self, **kwargs):
+        return iter(self.events)
+
+
+def test_failed_stream_raises_and_is_not_cached(tmp_path):
+    """Failed, incomplete and error streams raise after their deltas; nothing is cached"""
+    delta = SimpleNamespace(type='response.output_text.delta', delta='[DIAGNOSIS]: half')
+    usage = SimpleNamespace(input_tokens=5, output_tokens=2)
+    endings = [
+        SimpleNamespace(type='response.failed', response=SimpleNamespace(usage=usage, error=SimpleNamespace(message='server_error'))),
+        SimpleNamespace(type='response.incomplete', response=SimpleNamespace(usage=usage, incomplete_details=SimpleNamespace(reason='max_output_tokens'))),
+        SimpleNamespace(type='error', message='overloaded', code=None),
+    ]
+    for end in endings:
+        inner = OpenAIProvider.__new__(OpenAIProvider)
+        inner.client = SimpleNamespace(responses=FakeResponses(delta, end))
+        provider = CachedProvider(inner, ResponseCache(str(tmp_path)))
+        seen = []
+        with pytest.raises(StreamError):
+            for d in provider.stream([{'role': 'user', 'content': 'x'}], 'm'):
+                seen.append(d)
+        assert seen == ['[DIAGNOSIS]: half']
+    assert not list(tmp_path.rglob('*.json'))
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_critique_chunks_keeps_order()
+    test_critique_chunks_isolates_failures()
+    test_acritique_chunks_uses_default_arespond()
+    test_stream_critique_chunks_in_order()
+    test_stream_critique_chunks_stops_when_closed()
+    test_failed_stream_raises_and_is_not_cached(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Critique tests passed!")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming report export
+"""
+import csv
+import pytest
+from kfa.export import ReportWriter
+from kfa.merge import merge_chunks
+
+
+def make_outputs(n):
+    return [{'id': i, 'text': f'Line {i}.', 'kfa': f'[DIAGNOSIS]: HOOK issue {i}\n[REWRITE]: r{i}'} for i in range(n)]
+
+
+def test_writer_matches_merge_and_orders_chunks(tmp_path):
+    """Out-of-order completions land in chunk order; the report equals merge_chunks"""
+    md, notes = tmp_path / 'r.md', tmp_path / 'n.csv'
+    writer = ReportWriter(md, notes)
+    outputs = make_outputs(5)
+    for i in (2, 0, 4, 1):
+        writer.add(outputs[i])
+    assert md.read_text(encoding='utf-8').count('## Scene') == 3  # 0-2 flushed, 4 waits for 3
+    writer.add(outputs[3])
+    assert writer.close() == 5
+    assert md.read_text(encoding='utf-8') == merge_chunks(make_outputs(5))
+    rows = list(csv.reader(open(notes, encoding='utf-8')))
+    assert [r[0] for r in rows[1:]] == ['0', '1', '2', '3', '4'] and rows[1][1] == 'HOOK'
+
+
+def test_writer_reports_gaps(tmp_path):
+    """Closing with a chunk missing is an error, not a silently short report"""
+    writer = ReportWriter(tmp_path / 'r.md')
+    writer.add(make_outputs(2)[1])
+    with pytest.raises(ValueError):
+        writer.close()
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_writer_matches_merge_and_orders_chunks(pathlib.Path(tempfile.mkdtemp()))
+    test_writer_reports_gaps(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Export tests passed!")
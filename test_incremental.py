@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental re-analysis
+"""
+from kfa.chunking import chunk_text_stable
+from kfa import incremental
+
+
+def make_doc(n=200):
+    return " ".join(f"Sentence number {i} talks about topic {i % 7} in some detail." for i in range(n))
+
+
+def test_stable_chunks_resync_after_edit():
+    """Editing one sentence changes only the chunks around it"""
+    before = chunk_text_stable(make_doc(), chunk_tokens=120, overlap_tokens=20)
+    edited = make_doc().replace("Sentence number 100 talks", "Sentence number 100 now rambles on and on about")
+    after = chunk_text_stable(edited, chunk_tokens=120, overlap_tokens=20)
+    changed = {c.hash for c in after} - {c.hash for c in before}
+    assert len(before) > 10
+    assert 1 <= len(changed) <= 3
+
+
+def test_plan_and_assemble(tmp_path):
+    """Unchanged chunks reuse prior output; settings changes invalidate the manifest"""
+    settings = {'style_model': 'm', 'temperature': 0.2, 'max_output_tokens': 10}
+    path = incremental.manifest_path(str(tmp_path), 'talk.md')
+    prior = [{'id': 0, 'text': 'a', 'kfa': 'A'}, {'id': 1, 'text': 'b', 'kfa': 'B'},
+             {'id': 2, 'text': 'c', 'kfa': '[ERROR]: x', 'error': 'x'}]
+    incremental.save_manifest(path, prior, settings)
+    assert [f.name for f in path.parent.iterdir()] == [path.name]  # written atomically, no temp left
+
+    chunks = ['a', 'B2', 'c']
+    reused, todo = incremental.plan(chunks, incremental.load_manifest(path, settings))
+    assert sorted(reused) == [0] and todo == [1, 2]
+    fresh = [{'id': 0, 'text': 'B2', 'kfa': 'new B'}, {'id': 1, 'text': 'c', 'kfa': 'C'}]
+    outputs = incremental.assemble(chunks, reused, todo, fresh)
+    assert [(o['id'], o['kfa']) for o in outputs] == [(0, 'A'), (1, 'new B'), (2, 'C')]
+
+    assert incremental.load_manifest(path, dict(settings, temperature=0.5)) == {}
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_stable_chunks_resync_after_edit()
+    test_plan_and_assemble(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Incremental tests passed!")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the background job queue
+"""
+import subprocess, sys, time
+from kfa.jobs import JobStore, JobQueue
+
+CFG = {'chunking': {'strategy': 'tokens'}, 'io': {'export_csv': True}}
+
+
+def wait(store, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError('job did not finish')
+
+
+def test_job_progress_and_result(tmp_path):
+    """Jobs move queued -> running -> done and record progress"""
+    def runner(path, cfg, on_progress=None, run_id=None):
+        for i in range(3):
+            on_progress(i + 1, 3)
+        return {'md_path': f'out/runs/{run_id}/keynote_kfa.md', 'csv_path': None}
+
+    store = JobStore(tmp_path / 'jobs.sqlite3')
+    queue = JobQueue(store, runner)
+    job = wait(store, queue.submit(str(tmp_path / 'in.txt'), CFG, cleanup=False))
+    assert job['status'] == 'done'
+    assert (job['done'], job['total']) == (3, 3)
+    assert job['md_path'] == f"out/runs/{job['id']}/keynote_kfa.md"
+
+
+def test_failed_job_and_restart(tmp_path):
+    """Runner errors are recorded; unfinished jobs fail on restart unless their process is alive"""
+    def runner(path, cfg, on_progress=None, run_id=None):
+        raise RuntimeError('no api key')
+
+    store = JobStore(tmp_path / 'jobs.sqlite3')
+    job = wait(store, JobQueue(store, runner).submit('missing.txt', CFG, cleanup=False))
+    assert job['status'] == 'failed' and 'no api key' in job['error']
+
+    gone = subprocess.Popen([sys.executable, '-c', 'pass'])
+    gone.wait()
+    stale = store.create('x.txt', 'tokens', owner=gone.pid)
+    sibling = store.create('y.txt', 'tokens')  # queued by a live process (this one)
+    JobQueue(store, runner)
+    assert store.get(stale)['status'] == 'failed'
+    assert store.get(sibling)['status'] == 'queued'
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_job_progress_and_result(pathlib.Path(tempfile.mkdtemp()))
+    test_failed_job_and_restart(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Job tests passed!")
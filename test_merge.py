@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for overlap-aware merging of chunk critiques
+"""
+from kfa.chunking import chunk_text
+from kfa.merge import merge_chunks, reconcile_rewrite, render_chunk
+
+TEXT = " ".join(f"Sentence number {i} makes a point." for i in range(60))
+
+
+def critique(rewrite):
+    return f"[DIAGNOSIS]: PACE_CONTROL slow start\n[REWRITE]: {rewrite}\n[RATIONALE]: Tighter."
+
+
+def test_overlap_is_quoted_once():
+    """A chunk's overlap with the previous chunk is not quoted again; nothing is lost"""
+    chunks = chunk_text(TEXT, chunk_tokens=60, overlap_tokens=15)
+    outputs = [{'id': i, 'text': c, 'kfa': critique("Fine.")} for i, c in enumerate(chunks)]
+    md = merge_chunks(outputs)
+    for i in range(60):
+        assert md.count(f"Sentence number {i} makes") == 1
+    assert len(md) < sum(len(render_chunk(o)) for o in outputs)
+    assert "> … Sentence number" in md
+
+
+def test_overlapping_rewrites_are_reconciled():
+    """Leading rewrite sentences that repeat the previous rewrite's ending are dropped"""
+    prev = "Open strong. Slow down here. Let the number land."
+    assert reconcile_rewrite("Let the number land! Then pivot.", prev, 1) == "… Then pivot."
+    assert reconcile_rewrite("let the numbers land. Slow down here. Then pivot.", prev, 2) == "… Then pivot."
+    assert reconcile_rewrite("Something new. Let the number land.", prev, 1) == "Something new. Let the number land."
+    assert reconcile_rewrite("Let the number land.", prev, 1) == "… (as in the previous scene)"
+    assert reconcile_rewrite("Let the number land.", prev, 0) == "Let the number land."
+
+    chunks = chunk_text(TEXT, chunk_tokens=60, overlap_tokens=15)
+    outputs = [{'id': 0, 'text': chunks[0], 'kfa': critique("Open strong. Let the number land.")},
+               {'id': 1, 'text': chunks[1], 'kfa': critique("Let the number land. Then pivot.")}]
+    md = merge_chunks(outputs)
+    assert md.count("Let the number land") == 1 and "[REWRITE]: … Then pivot." in md
+    assert "[RATIONALE]: Tighter." in md
+
+
+if __name__ == "__main__":
+    test_overlap_is_quoted_once()
+    test_overlapping_rewrites_are_reconciled()
+    print("✅ Merge tests passed!")
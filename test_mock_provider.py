@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline mock and record/replay providers and the benchmark
+"""
+import asyncio, time
+import pytest
+from kfa.bench import bench_size, synthetic_keynote
+from kfa.cache import CachedProvider, ResponseCache
+from kfa.cli import _base_provider, _provider_source, run
+from kfa.config import load_config
+from kfa.parse import parse_critique
+from kfa.providers.mock import MockError, MockProvider
+from kfa.providers.replay import FixtureMissing, ReplayProvider
+
+MSG = [{'role': 'system', 'content': 'sys'}, {'role': 'user', 'content': 'Chunk:\nWe shipped it. Then we learned.'}]
+
+
+def make_cfg(tmp_path):
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['analytics']['enabled'] = False
+    cfg['cache']['enabled'] = False
+    return cfg
+
+
+def test_mock_is_deterministic_and_parseable():
+    """Same request, same tagged critique; latency and failures follow the settings"""
+    a, b = MockProvider(), MockProvider()
+    out = a.respond(MSG, 'm')
+    assert out == b.respond(MSG, 'm') == "".join(a.stream(MSG, 'm'))
+    assert asyncio.run(a.arespond(MSG, 'm')) == out
+    assert parse_critique(out).tags and not parse_critique(out).unknown_tags
+
+    slow = MockProvider(latency=0.05, per_token=0.001)
+    t0 = time.perf_counter()
+    slow.respond(MSG, 'm')
+    assert time.perf_counter() - t0 >= 0.05 + 0.001 * 10
+
+    flaky = MockProvider(error_rate=0.5, throttle_rate=0.2, seed=1)
+    codes = []
+    for _ in range(200):
+        try:
+            flaky.respond(MSG, 'm')
+        except MockError as e:
+            codes.append(e.status_code)
+    assert flaky.calls == 200 and flaky.failures == len(codes)
+    assert 20 < codes.count(429) < 60 and 80 < codes.count(500) < 120
+
+
+def test_record_then_replay_offline(tmp_path):
+    """Recorded fixtures answer later runs without the wrapped provider"""
+    rec = ReplayProvider(MockProvider(), tmp_path / 'fx', mode='record')
+    out = rec.respond(MSG, 'm', temperature=0.2)
+    assert rec.recorded == 1 and len(list((tmp_path / 'fx').glob('*.json'))) == 1
+
+    rep = ReplayProvider(fixtures=tmp_path / 'fx', mode='replay')
+    assert rep.respond(MSG, 'm', temperature=0.2) == out and rep.replayed == 1
+    with pytest.raises(FixtureMissing):
+        rep.respond(MSG, 'm', temperature=0.7)
+    with pytest.raises(ValueError):
+        ReplayProvider(mode='record')
+
+
+def test_mock_provider_from_config(tmp_path):
+    """provider: mock and replay settings select the offline stack; scene maps cut the text"""
+    cfg = make_cfg(tmp_path)
+    cfg['provider'] = 'mock'
+    assert isinstance(_base_provider(cfg), MockProvider)
+    cfg['replay'] = {'mode': 'replay', 'dir': str(tmp_path / 'fx')}
+    rep = _base_provider(cfg)
+    assert isinstance(rep, ReplayProvider) and rep.provider is None
+
+    cfg['replay']['mode'] = 'auto'
+    cfg['chunking']['strategy'] = 'scene_map'
+    cfg['chunking']['scene_window_tokens'] = 800
+    p = tmp_path / 'talk.txt'
+    p.write_text(synthetic_keynote(3000))
+    first = run(str(p), cfg)
+    assert len(first['outputs']) > 2 and not any(o.get('error') for o in first['outputs'])
+    cfg['replay']['mode'] = 'replay'
+    second = run(str(p), cfg)
+    assert len(list((tmp_path / 'fx').glob('*.json'))) > len(first['outputs'])  # critiques + scene map calls
+    assert all(o['critique'].tags and not o['critique'].unknown_tags for o in second['outputs'])
+    assert [o['text'] for o in second['outputs']] == [o['text'] for o in first['outputs']]
+
+
+def test_mock_runs_stay_out_of_real_runs(tmp_path):
+    """Mock responses, manifests and journals are keyed apart from OpenAI runs on the same cache"""
+    cfg = make_cfg(tmp_path)
+    cfg['cache'] = {'enabled': True, 'dir': str(tmp_path / 'cache')}
+    cfg['chunking']['incremental'] = True
+    cfg['provider'] = 'mock'
+    p = tmp_path / 'talk.txt'
+    p.write_text(synthetic_keynote(1500))
+    mocked = run(str(p), cfg)
+    assert len(list((tmp_path / 'cache').glob('*/*.json'))) == len(mocked['outputs'])
+
+    cfg['provider'] = 'openai'
+    assert _provider_source(cfg) is None
+    real = MockProvider()  # stands in for OpenAI; counts its calls
+    cached = CachedProvider(real, ResponseCache(str(tmp_path / 'cache')), source=_provider_source(cfg))
+    run(str(p), cfg, provider=cached)
+    assert real.calls == len(mocked['outputs']) and cached.cache.hits == 0
+
+
+def test_bench_reports_stages():
+    """One small size runs end to end and reports throughput and percentiles"""
+    cfg = load_config('missing.yaml')
+    cfg['analytics']['enabled'] = False
+    r = bench_size(1500, cfg, {'latency': 0.001}, repeats=2)
+    assert r['chunks'] >= 1 and r['chunks_per_s'] > 0 and r['failed_chunks'] == 0
+    assert set(r['stages']) == {'read', 'chunk', 'plan', 'critique', 'export', 'chunk_call', 'run'}
+    assert r['stages']['chunk_call']['p95_s'] >= r['stages']['chunk_call']['p50_s'] > 0
+    assert r['input_tokens'] > r['output_tokens'] > 0
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_mock_is_deterministic_and_parseable()
+    test_record_then_replay_offline(pathlib.Path(tempfile.mkdtemp()))
+    test_mock_provider_from_config(pathlib.Path(tempfile.mkdtemp()))
+    test_mock_runs_stay_out_of_real_runs(pathlib.Path(tempfile.mkdtemp()))
+    test_bench_reports_stages()
+    print("✅ Mock provider tests passed!")
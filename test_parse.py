@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for critique parsing and the exporters that share it
+"""
+import csv, json
+from kfa.parse import parse_critique, attach_critiques
+from kfa.export import export_csv, export_records
+from kfa.merge import merge_chunks
+
+KFA = """**[DIAGNOSIS]**: PACE_CONTROL, HOOK — rushed open; PACE_CONTROL again; MADE_UP_TAG
+stakes arrive late
+[REWRITE]: Start with the artifact.
+Then pause.
+[RATIONALE]: Slower lines land.
+"""
+
+
+def test_parse_critique():
+    """Sections split in one pass; tags are deduplicated and checked against TAGS"""
+    c = parse_critique(KFA)
+    assert c.tags == ('PACE_CONTROL', 'HOOK')
+    assert c.unknown_tags == ('MADE_UP_TAG',)
+    assert c.summary().startswith('PACE_CONTROL, HOOK')
+    assert c.rewrite == "Start with the artifact.\nThen pause."
+    assert c.rationale == "Slower lines land."
+    assert parse_critique("no structure here") == parse_critique("")
+
+
+def test_exporters_share_parsed_records(tmp_path):
+    """CSV carries tags, records carry every field, the report lists tags; errors stay empty"""
+    outputs = attach_critiques([
+        {'id': 0, 'text': 'Hello.', 'kfa': KFA},
+        {'id': 1, 'text': 'Bye.', 'kfa': '[ERROR]: [DIAGNOSIS] boom', 'error': 'boom'},
+    ])
+    export_csv(outputs, tmp_path / 'notes.csv')
+    rows = list(csv.reader(open(tmp_path / 'notes.csv', encoding='utf-8')))
+    assert rows[1][:2] == ['0', 'PACE_CONTROL;HOOK'] and rows[2][1] == ''
+
+    export_records(outputs, tmp_path / 'records.jsonl')
+    recs = [json.loads(l) for l in open(tmp_path / 'records.jsonl', encoding='utf-8')]
+    assert recs[0]['tags'] == ['PACE_CONTROL', 'HOOK'] and recs[0]['rewrite'].startswith('Start')
+    assert recs[1]['error'] == 'boom'
+
+    assert "**Tags:** `PACE_CONTROL` `HOOK`" in merge_chunks(outputs)
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_parse_critique()
+    test_exporters_share_parsed_records(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Parse tests passed!")
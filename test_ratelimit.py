@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for rate limiting, backoff and adaptive concurrency
+"""
+import asyncio, threading
+import pytest
+from kfa.providers.base import BaseProvider
+from kfa.ratelimit import TokenBucket, AIMDController, RateLimitedProvider, retry_after
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__('rate limited')
+        self.response = FakeResponse(headers or {})
+
+
+class FlakyProvider(BaseProvider):
+    def __init__(self, failures, error=RateLimitError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def respond(self, messages, model, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error()
+        return 'ok'
+
+
+MSGS = [{'role': 'user', 'content': 'hi'}]
+
+
+def test_token_bucket_waits_when_empty():
+    """Reservations past capacity report the refill time"""
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_aimd_controller():
+    """Additive increase on success, one multiplicative cut per cooldown"""
+    c = AIMDController(initial=4, min_limit=1, max_limit=8, cooldown=60)
+    for _ in range(8):
+        c.on_success(0.1)
+    assert 5 <= c.limit <= 6
+    c.on_throttle()
+    c.on_throttle()
+    assert 2.5 <= c.limit <= 3
+
+
+def test_aimd_async_waiters_wake_on_release():
+    """aacquire sleeps until a slot frees (from any thread); cancelled waiters leave no trace"""
+    c = AIMDController(initial=1, max_limit=1)
+    c.acquire()
+
+    async def main():
+        cancelled = asyncio.create_task(c.aacquire())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        waiter = asyncio.create_task(c.aacquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done() and len(c._waiters) == 1
+        threading.Timer(0.01, c.release).start()
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(main())
+    assert c.in_flight == 1 and not c._waiters
+
+
+def test_retries_rate_limits_then_succeeds():
+    """429s are retried with backoff and cut the concurrency limit"""
+    inner = FlakyProvider(failures=2)
+    provider = RateLimitedProvider(inner, controller=AIMDController(initial=4, max_limit=4), base_delay=0.01)
+    assert provider.respond(MSGS, 'm') == 'ok'
+    assert inner.calls == 3 and provider.throttled == 2
+    assert provider.controller.limit < 4
+    assert provider.controller.in_flight == 0
+
+
+def test_non_retryable_errors_propagate():
+    """Client errors are raised at once"""
+    inner = FlakyProvider(failures=1, error=ValueError)
+    with pytest.raises(ValueError):
+        RateLimitedProvider(inner, base_delay=0.01).respond(MSGS, 'm')
+    assert inner.calls == 1
+
+
+def test_retry_after_headers():
+    """Retry-After in seconds or milliseconds is honoured"""
+    assert retry_after(RateLimitError({'retry-after': '3'})) == 3
+    assert retry_after(RateLimitError({'retry-after-ms': '250'})) == 0.25
+    assert retry_after(RateLimitError()) is None
+    assert retry_after(RateLimitError({'retry-after': 'soon-ish'})) is None
+
+
+if __name__ == "__main__":
+    test_token_bucket_waits_when_empty()
+    test_aimd_controller()
+    test_aimd_async_waiters_wake_on_release()
+    test_retries_rate_limits_then_succeeds()
+    test_non_retryable_errors_propagate()
+    test_retry_after_headers()
+    print("✅ Rate limit tests passed!")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming and parallel input reading
+"""
+import time
+import pytest
+from kfa.reader import read_input, iter_paragraphs, iter_text, read_many
+from kfa.chunking import chunk_text
+
+SRT = """1
+00:00:01,000 --> 00:00:04,000
+Good morning everyone.
+Thanks for coming.
+
+2
+00:00:05,000 --> 00:00:07,500
+Three years ago our servers melted.
+
+
+
+3
+00:00:08,000 --> 00:00:09,000
+We almost lost the company.
+"""
+
+
+def make_docx(path, paras):
+    from docx import Document
+    doc = Document()
+    for p in paras:
+        doc.add_paragraph(p)
+    doc.save(str(path))
+
+
+def test_srt_paragraphs(tmp_path):
+    """Cue text becomes one paragraph per cue; indices, timings and blank runs are dropped"""
+    p = tmp_path / 'talk.srt'
+    p.write_text(SRT)
+    assert list(iter_paragraphs(p)) == [
+        "Good morning everyone.\nThanks for coming.",
+        "Three years ago our servers melted.",
+        "We almost lost the company.",
+    ]
+    assert read_input(p) == "\n\n".join(iter_paragraphs(p))
+
+
+def test_large_srt_is_linear(tmp_path):
+    """Many blank lines (quadratic before) and a multi-MB file read quickly"""
+    p = tmp_path / 'big.srt'
+    cue = "{i}\n00:00:01,000 --> 00:00:02,000\nLine {i} of the talk.\n" + "\n" * 50
+    p.write_text("".join(cue.format(i=i) for i in range(100000)))
+    start = time.perf_counter()
+    text = read_input(p)
+    assert time.perf_counter() - start < 5
+    assert text.count("\n\n") == 99999
+
+
+def test_chunking_consumes_stream(tmp_path):
+    """Chunking the streamed pieces gives the same chunks as the whole text"""
+    for name, body in (('talk.srt', SRT * 50), ('talk.txt', "Hello there. General Kenobi!\n\n" * 300)):
+        p = tmp_path / name
+        p.write_text(body)
+        assert chunk_text(iter_text(p, block_size=97), 120, 20) == chunk_text(read_input(p), 120, 20)
+
+
+def test_read_many_in_order_with_docx_pool(tmp_path):
+    """Results keep input order; DOCX files parse in worker processes; errors can be returned"""
+    paths = []
+    for k in range(3):
+        d = tmp_path / f'talk{k}.docx'
+        make_docx(d, [f'Talk {k} opening.', '', f'Talk {k} close.'])
+        paths.append(str(d))
+    (tmp_path / 'notes.txt').write_text('Plain notes.')
+    paths.insert(1, str(tmp_path / 'notes.txt'))
+    texts = read_many(paths + [str(tmp_path / 'missing.txt')], return_exceptions=True)
+    assert texts[0] == 'Talk 0 opening.\n\nTalk 0 close.'
+    assert texts[1] == 'Plain notes.'
+    assert texts[3].startswith('Talk 2')
+    assert isinstance(texts[4], OSError)
+    with pytest.raises(OSError):
+        read_many([str(tmp_path / 'missing.txt')])
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_srt_paragraphs(pathlib.Path(tempfile.mkdtemp()))
+    test_large_srt_is_linear(pathlib.Path(tempfile.mkdtemp()))
+    test_chunking_consumes_stream(pathlib.Path(tempfile.mkdtemp()))
+    test_read_many_in_order_with_docx_pool(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Reader tests passed!")
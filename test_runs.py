@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for per-run output directories and retention
+"""
+import os, time
+from kfa.checkpoint import Journal
+from kfa.runs import run_paths, cleanup_runs, runs_root
+
+
+def make_run(root, name, age_s, finished=True):
+    d = run_paths(root, name)['out_dir']
+    if finished is not None:
+        j = Journal(d, 'in.txt', {})
+        j.record({'id': 0, 'text': 'a', 'kfa': 'A'})
+        if finished:
+            j.complete()
+    t = time.time() - age_s
+    os.utime(d, (t, t))
+
+
+def test_run_paths_are_isolated(tmp_path):
+    """Two runs never share artifact paths"""
+    a, b = run_paths(tmp_path), run_paths(tmp_path)
+    assert a['run_id'] != b['run_id']
+    assert a['md_path'] != b['md_path']
+    assert run_paths(tmp_path, 'fixed')['md_path'].endswith(os.path.join('runs', 'fixed', 'keynote_kfa.md'))
+
+
+def test_cleanup_runs(tmp_path):
+    """Keeps the newest runs, drops old ones, never touches protected runs"""
+    for i, name in enumerate(['r1', 'r2', 'r3', 'r4', 'r5']):
+        make_run(tmp_path, name, (10 - i) * 86400 if name == 'r1' else 10 - i)
+    removed = cleanup_runs(tmp_path, keep=2, max_age_days=7, protect=('r3',))
+    assert sorted(removed) == ['r1', 'r2']
+    assert sorted(p.name for p in runs_root(tmp_path).iterdir()) == ['r3', 'r4', 'r5']
+
+
+def test_cleanup_spares_unfinished_runs(tmp_path):
+    """Runs still writing elsewhere (or waiting for --resume) survive until too old"""
+    make_run(tmp_path, 'writing', 60, finished=False)    # a long run in another process
+    make_run(tmp_path, 'starting', 50, finished=None)    # no chunk finished yet
+    make_run(tmp_path, 'abandoned', 8 * 86400, finished=False)
+    for i in range(3):
+        make_run(tmp_path, f'done{i}', i)
+    removed = cleanup_runs(tmp_path, keep=2, max_age_days=7)
+    assert sorted(removed) == ['abandoned', 'done2']
+    assert sorted(p.name for p in runs_root(tmp_path).iterdir()) == ['done0', 'done1', 'starting', 'writing']
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_run_paths_are_isolated(pathlib.Path(tempfile.mkdtemp()))
+    test_cleanup_runs(pathlib.Path(tempfile.mkdtemp()))
+    test_cleanup_spares_unfinished_runs(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Run directory tests passed!")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for scene map parsing and scene alignment
+"""
+import asyncio, threading
+from kfa.cache import ResponseCache, CachedProvider
+from kfa.providers.base import BaseProvider
+from kfa.prompts import SCENEMAP_SEAM_USER
+from kfa.scenemap import parse_scene_map, cut_by_scenes, build_scene_map, abuild_scene_map, merge_scene_maps
+
+SCENE_MAP = """## [SCENES]
+1. "Good morning everyone, thank you for" — warm open, sets stakes
+2. "Three years ago our servers melted" — the crisis
+- "So what did we learn from" — lessons and the turn
+
+## [BRIDGES]
+- From crisis to lessons: pause, then ask the question
+## [HEAVY_BEATS]
+- "We almost lost the company."
+"""
+
+TALK = ("Good morning everyone, thank you for coming. It is great to be here. " * 5
+        + "Three years ago our servers melted down on launch day. We almost lost the company. " * 5
+        + "So what did we learn from all that? We learned to test. We learned to listen. " * 5)
+
+
+def test_parse_scene_map_reads_only_scenes():
+    """Bullets from other sections are not scenes"""
+    scenes = parse_scene_map(SCENE_MAP)
+    assert len(scenes) == 3
+    assert scenes[1].startswith('"Three years ago')
+
+
+def test_cut_by_scenes_aligns_anchors():
+    """Each scene starts at its anchor, on a sentence boundary, and the text is covered"""
+    chunks = [c.text for c in cut_by_scenes(TALK, parse_scene_map(SCENE_MAP))]
+    assert len(chunks) == 3
+    assert chunks[0].startswith("Good morning")
+    assert chunks[1].startswith("Three years ago")
+    assert chunks[2].startswith("So what did we learn")
+    assert " ".join(chunks).split() == TALK.split()
+
+
+def test_cut_by_scenes_tolerates_paraphrase_and_misses():
+    """A loosely quoted anchor still aligns; an unmatched scene merges into the previous one"""
+    scenes = ["opening", '"three years back, our servers melted down"', '"a line nobody said"']
+    chunks = [c.text for c in cut_by_scenes(TALK, scenes)]
+    assert len(chunks) == 2
+    assert chunks[1].startswith("Three years ago")
+
+
+def test_cut_by_scenes_searches_near_the_last_cut():
+    """A refrain quoted in full far ahead does not pull a scene past its real, nearby start"""
+    sents = [f"Part {i} of the talk covers idea {i * 7 % 13} with an example." for i in range(600)]
+    sents[20] = "We keep shipping small things every week."
+    sents[590] = "We keep shipping small things every week and we never stop."
+    scenes = ['opening', '"We keep shipping small things every week and we never stop"']
+    scenes += [f'"Part {i} of the talk covers"' for i in range(40, 600, 20)]
+    chunks = cut_by_scenes(" ".join(sents), scenes)
+    assert len(chunks) == len(scenes)
+    assert chunks[1].text.startswith("We keep shipping") and chunks[2].text.startswith("Part 40 ")
+
+
+class SceneMapProvider(BaseProvider):
+    """Maps a window to one scene quoting its first words; seams add one bridge"""
+
+    def __init__(self):
+        self.maps = self.seams = 0
+        self.lock = threading.Lock()
+
+    def respond(self, messages, model, **kwargs):
+        body = messages[-1]['content']
+        with self.lock:
+            if body.startswith(SCENEMAP_SEAM_USER):
+                self.seams += 1
+                return "[BRIDGES]\n- carry it over\n[SAME_SCENE]: no"
+            self.maps += 1
+        window = body.split("\n\n", 1)[1]
+        return f'[SCENES]\n- "{" ".join(window.split()[:8])}" scene\n[BRIDGES]\n- none'
+
+
+def long_talk(n=600, edit=None):
+    sents = [f"Part {i} of the talk covers idea {i * 7 % 13} with an example." for i in range(n)]
+    if edit is not None:
+        sents[edit] = "This sentence was rewritten completely for the new version."
+    return " ".join(sents)
+
+
+def test_map_reduce_scene_map(tmp_path):
+    """Windows are mapped in parallel and joined locally; only seams go back to the model"""
+    inner = SceneMapProvider()
+    provider = CachedProvider(inner, ResponseCache(str(tmp_path)))
+    md = build_scene_map(provider, 'g', long_talk(), window_tokens=300)
+    scenes = parse_scene_map(md)
+    assert len(scenes) == inner.maps > 9
+    assert inner.seams == inner.maps - 1
+    assert scenes[0].startswith('"Part 0 of the talk')
+    assert len(cut_by_scenes(long_talk(), scenes)) == len(scenes)
+
+    maps, seams = inner.maps, inner.seams
+    build_scene_map(provider, 'g', long_talk(edit=300), window_tokens=300)
+    assert inner.maps - maps <= 2 and inner.seams - seams <= 4
+
+
+def test_short_text_is_one_call():
+    """Below the window size the scene map is a single request, sync or async"""
+    inner = SceneMapProvider()
+    build_scene_map(inner, 'g', TALK, window_tokens=6000)
+    asyncio.run(abuild_scene_map(inner, 'g', TALK, window_tokens=6000))
+    assert (inner.maps, inner.seams) == (2, 0)
+
+
+def test_merge_scene_maps_keeps_every_scene():
+    """Window maps are concatenated; a seam adds bridges and drops a scene split across windows"""
+    parts = ["[SCENES]\n- a\n- b\n[BRIDGES]\n- a to b",
+             "[SCENES]\n- b again\n- c\n[HEAVY_BEATS]\n- c lands",
+             "[SCENES]\n- d\n"]
+    seams = ["[BRIDGES]\n- b runs on\n[SAME_SCENE]: yes", "[BRIDGES]\n- c to d\n[SAME_SCENE]: no"]
+    md = merge_scene_maps(parts, seams)
+    assert parse_scene_map(md) == ["a", "b", "c", "d"]
+    assert "- a to b\n- b runs on\n- c to d" in md and "- c lands" in md
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_parse_scene_map_reads_only_scenes()
+    test_cut_by_scenes_aligns_anchors()
+    test_cut_by_scenes_tolerates_paraphrase_and_misses()
+    test_cut_by_scenes_searches_near_the_last_cut()
+    test_map_reduce_scene_map(pathlib.Path(tempfile.mkdtemp()))
+    test_short_text_is_one_call()
+    test_merge_scene_maps_keeps_every_scene()
+    print("✅ Scene map tests passed!")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-document input expansion and scheduling
+"""
+import json, threading
+from kfa import scheduler
+from kfa.bench import synthetic_keynote
+from kfa.config import load_config
+from kfa.providers.base import BaseProvider
+from kfa.providers.mock import MockProvider
+from kfa.scheduler import expand_inputs, run_many
+
+
+class CountingProvider(BaseProvider):
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def respond(self, messages, model, **kwargs):
+        with self.lock:
+            self.calls += 1
+        return "[DIAGNOSIS]: PACE_CONTROL rushed\n[REWRITE]: slower\n[RATIONALE]: breathe"
+
+
+def make_inputs(tmp_path):
+    talks = tmp_path / 'talks'
+    (talks / 'day2').mkdir(parents=True)
+    (talks / 'a.txt').write_text("Opening line. " * 200)
+    (talks / 'day2' / 'b.md').write_text("Second talk. " * 50)
+    (talks / 'day2' / 'a.txt').write_text("Same stem. " * 20)
+    (talks / 'notes.csv').write_text("ignored")
+    return talks
+
+
+def test_expand_inputs(tmp_path):
+    """Directories recurse over supported types; globs and manifests dedupe"""
+    talks = make_inputs(tmp_path)
+    found = expand_inputs([str(talks)])
+    assert len(found) == 3 and not any(f.endswith('.csv') for f in found)
+    manifest = tmp_path / 'list.txt'
+    manifest.write_text("# conference\ntalks/**/*.md\ntalks/a.txt\n")
+    assert len(expand_inputs([str(talks / 'a.txt')], str(manifest))) == 2
+
+
+def test_run_many_writes_per_document_outputs(tmp_path):
+    """Every document gets its own report and the batch gets an index"""
+    talks = make_inputs(tmp_path)
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['chunking']['chunk_tokens'] = 200
+    provider = CountingProvider()
+    summary = run_many(expand_inputs([str(talks)]), cfg, provider=provider, run_id='batch')
+    docs = summary['documents']
+    assert sorted(d['name'] for d in docs) == ['a', 'a-1', 'b']
+    assert all(d['error'] is None and d['failed_chunks'] == 0 for d in docs)
+    assert provider.calls == sum(d['chunks'] for d in docs)
+    index = json.loads((tmp_path / 'out' / 'runs' / 'batch' / 'index.json').read_text())
+    assert len(index['documents']) == 3
+    for d in docs:
+        assert 'PACE_CONTROL' in open(d['md_path'], encoding='utf-8').read()
+
+
+def test_run_many_reports_bookkeeping_failures(tmp_path, monkeypatch):
+    """A document whose report writer fails ends with an error instead of vanishing"""
+    talks = make_inputs(tmp_path)
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['chunking']['chunk_tokens'] = 200
+    writer = scheduler._writer
+
+    def broken_for_b(cfg, paths, reused=None):
+        w = writer(cfg, paths, reused)
+        if paths['out_dir'].endswith('b'):
+            w.add = lambda out: (_ for _ in ()).throw(OSError('disk full'))
+        return w
+
+    monkeypatch.setattr(scheduler, '_writer', broken_for_b)
+    docs = {d['name']: d for d in run_many(expand_inputs([str(talks)]), cfg, provider=CountingProvider())['documents']}
+    assert docs['b']['md_path'] is None and 'disk full' in docs['b']['error']
+    assert docs['a']['error'] is None and docs['a']['md_path']
+
+
+class InFlightProvider(MockProvider):
+    def __init__(self):
+        super().__init__(latency=0.005)
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def respond(self, messages, model, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return super().respond(messages, model, **kwargs)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_run_many_scene_maps_stay_within_concurrency(tmp_path):
+    """Scene maps built on pool workers don't open a second pool of their own"""
+    for name in 'abc':
+        (tmp_path / f'{name}.txt').write_text(synthetic_keynote(3000))
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['analytics']['enabled'] = False
+    cfg['cache']['enabled'] = False
+    cfg['chunking'].update(strategy='scene_map', scene_window_tokens=500)
+    cfg['params']['concurrency'] = 3
+    provider = InFlightProvider()
+    summary = run_many(expand_inputs([str(tmp_path)]), cfg, provider=provider)
+    assert all(d['error'] is None for d in summary['documents'])
+    assert provider.max_in_flight <= 3
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_expand_inputs(pathlib.Path(tempfile.mkdtemp()))
+    test_run_many_writes_per_document_outputs(pathlib.Path(tempfile.mkdtemp()))
+    test_run_many_scene_maps_stay_within_concurrency(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Scheduler tests passed!")
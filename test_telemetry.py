@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for run reports: stage spans, per-call latency and token usage, /metrics totals
+"""
+import json
+from kfa.cli import run, run_batch
+from kfa.config import load_config
+from kfa.providers.mock import MockProvider
+from kfa.providers.local_batch import LocalBatchProvider
+from kfa.telemetry import TOTALS, RunMetrics, note_usage, labelled, percentile
+
+
+def make_cfg(tmp_path):
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['analytics']['enabled'] = False
+    cfg['chunking']['chunk_tokens'] = 120
+    cfg['chunking']['overlap_tokens'] = 20
+    return cfg
+
+
+def write_talk(tmp_path, n=30):
+    p = tmp_path / 'talk.txt'
+    p.write_text("\n\n".join(f"Paragraph {i} tells a story. It has a point and a pause." for i in range(n)))
+    return p
+
+
+def test_run_report_has_stages_calls_and_chunks(tmp_path):
+    """run() writes run_report.json with every stage and one entry per critiqued chunk"""
+    result = run(str(write_talk(tmp_path)), make_cfg(tmp_path), provider=MockProvider(latency=0.01))
+    report = json.load(open(result['report_path'], encoding='utf-8'))
+    assert report == json.loads(json.dumps(result['report']))
+    assert {'read', 'chunk', 'plan', 'critique', 'export'} <= set(report['stages'])
+    n = len(result['outputs'])
+    assert report['chunks_total'] == report['chunks_critiqued'] == n > 1
+    assert [c['id'] for c in report['chunks']] == list(range(n))
+    assert all(c['latency_s'] >= 0.01 and c['attempts'] == 1 and c['input_tokens'] > 0 for c in report['chunks'])
+    calls = report['calls']
+    assert calls['count'] == n and calls['by_stage']['critique']['count'] == n
+    assert calls['input_tokens'] == sum(c['input_tokens'] for c in report['chunks'])
+    assert calls['latency_p95_s'] >= calls['latency_p50_s'] >= 0.01
+    assert report['settings']['chunk_tokens'] == 120
+
+
+def test_metrics_spans_labels_and_prometheus():
+    """Usage noted inside an instrumented call lands on that call; totals render as Prometheus text"""
+    class Usage(MockProvider):
+        def respond(self, messages, model, **kwargs):
+            note_usage(7, 3)
+            note_usage(7, 3)  # e.g. a retry
+            return "ok"
+
+    m = RunMetrics('r1')
+    p = m.instrument(Usage())
+    with m.span('critique'):
+        with labelled(chunk=1):
+            p.respond([{'role': 'user', 'content': 'x'}], 'model-"a"')
+    note_usage(100, 100)  # outside any call: ignored
+    report = m.finish(chunk_ids=[5, 6])
+    assert report['chunks'][0]['id'] == 6
+    assert (report['calls']['attempts'], report['calls']['input_tokens'], report['calls']['output_tokens']) == (2, 14, 6)
+    text = TOTALS.prometheus()
+    assert 'kfa_provider_tokens_total{model="model-\\"a\\"",direction="input"}' in text
+    assert 'kfa_provider_calls_total{model="model-\\"a\\"",stage="critique",status="ok"}' in text
+    assert percentile([3, 1, 2, 4], 50) == 2 and percentile([3, 1, 2, 4], 95) == 4 and percentile([], 50) is None
+
+
+def test_batch_run_report(tmp_path):
+    """Batch runs report stage spans too"""
+    cfg = make_cfg(tmp_path)
+    cfg['metrics']['report'] = False
+    cfg['batch']['poll_interval_s'] = 0.01
+    result = run_batch(str(write_talk(tmp_path, 5)), cfg, batch_provider=LocalBatchProvider(MockProvider()))
+    assert result['report_path'] is None and 'critique' in result['report']['stages']
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_run_report_has_stages_calls_and_chunks(pathlib.Path(tempfile.mkdtemp()))
+    test_metrics_spans_labels_and_prometheus()
+    test_batch_run_report(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Telemetry tests passed!")
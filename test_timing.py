@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for SRT cue timings and time-window chunking
+"""
+import csv
+from kfa.config import load_config
+from kfa.providers.base import BaseProvider
+from kfa.reader import read_input, read_srt
+from kfa.timing import chunk_by_time, parse_cue_timing, time_span
+from kfa.scenemap import cut_by_scenes
+from kfa.cli import run
+
+
+def make_srt(n=40, step=20):
+    cues = []
+    for i in range(n):
+        t0, t1 = i * step, i * step + step - 2
+        cues.append(f"{i + 1}\n00:{t0 // 60:02d}:{t0 % 60:02d},000 --> 00:{t1 // 60:02d}:{t1 % 60:02d},500\n"
+                    f"Caption {i} says something.\nSecond line {i}.\n")
+    return "\n".join(cues)
+
+
+class EchoProvider(BaseProvider):
+    def respond(self, messages, model, **kwargs):
+        return "[DIAGNOSIS]: PACE_CONTROL\n[REWRITE]: slower"
+
+
+def test_read_srt_keeps_cue_spans(tmp_path):
+    """Text matches read_input; every cue maps to its caption text and time"""
+    p = tmp_path / 'talk.srt'
+    p.write_text(make_srt())
+    text, cues = read_srt(p)
+    assert text == read_input(p)
+    assert len(cues) == 40
+    assert text[cues.offset[3]:cues.offset[3] + cues.length[3]] == "Caption 3 says something.\nSecond line 3."
+    assert (cues.start[3], cues.end[3]) == (60.0, 78.5)
+    assert parse_cue_timing("00:01:02,5 --> 01:00:00.250 X1:0") == (62.5, 3600.25)
+
+
+def test_chunk_by_time_windows(tmp_path):
+    """Cues group by the window their start falls in, with the window's time span"""
+    p = tmp_path / 'talk.srt'
+    p.write_text(make_srt())
+    text, cues = read_srt(p)
+    chunks = chunk_by_time(text, cues, window_s=120)
+    assert len(chunks) == 7  # 800 s of cues in 2-minute windows
+    assert time_span(chunks[0]) == (0.0, 118.5)
+    assert chunks[1].text.startswith("Caption 6 says")
+    assert "\n\n".join(map(str, chunks)) == text
+
+    scenes = cut_by_scenes(text, ['"Caption 0 says"', '"Caption 20 says something"'], cues=cues)
+    assert [time_span(s) for s in scenes] == [(0.0, 398.5), (400.0, 798.5)]
+
+
+def test_time_strategy_run(tmp_path):
+    """A time-window run labels scenes and CSV rows with their media times"""
+    p = tmp_path / 'talk.srt'
+    p.write_text(make_srt())
+    cfg = load_config(str(tmp_path / 'missing.yaml'))
+    cfg['io']['out_dir'] = str(tmp_path / 'out')
+    cfg['chunking']['strategy'] = 'time'
+    cfg['chunking']['window_minutes'] = 5
+    result = run(str(p), cfg, provider=EchoProvider())
+    assert len(result['outputs']) == 3
+    assert "## Scene 1 [00:05:00–00:09:58]" in open(result['md_path'], encoding='utf-8').read()
+    rows = list(csv.DictReader(open(result['csv_path'], encoding='utf-8')))
+    assert (rows[2]['start_s'], rows[2]['end_s']) == ('600.0', '798.5')
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_read_srt_keeps_cue_spans(pathlib.Path(tempfile.mkdtemp()))
+    test_chunk_by_time_windows(pathlib.Path(tempfile.mkdtemp()))
+    test_time_strategy_run(pathlib.Path(tempfile.mkdtemp()))
+    print("✅ Timing tests passed!")
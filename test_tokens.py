@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tests for pluggable token counting
+"""
+import pytest
+from kfa.tokens import estimate_tokens, get_token_counter
+from kfa.chunking import chunk_text
+
+
+def test_estimate_tokens():
+    """Estimate follows both chars and words"""
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("The quick brown fox jumps over the lazy dog.") in range(9, 13)
+
+
+def test_counter_is_memoized_and_auto_falls_back():
+    """Counters are shared per kind/model and cache repeated sentences"""
+    counter = get_token_counter('estimate')
+    assert counter is get_token_counter('estimate')
+    counter("Same sentence.")
+    counter("Same sentence.")
+    assert counter.cache_info().hits >= 1
+    assert get_token_counter('auto')("Hello there, friend.") >= 1
+    with pytest.raises(ValueError):
+        get_token_counter('bogus')
+
+
+def test_chunk_text_uses_counter():
+    """Chunk budget is measured with the supplied counter"""
+    text = " ".join(f"Sentence {i} is here." for i in range(50))
+    one_per_sentence = chunk_text(text, chunk_tokens=5, overlap_tokens=0, count_tokens=lambda s: 1)
+    assert len(one_per_sentence) == 10
+
+
+if __name__ == "__main__":
+    test_estimate_tokens()
+    test_counter_is_memoized_and_auto_falls_back()
+    test_chunk_text_uses_counter()
+    print("✅ Token tests passed!")